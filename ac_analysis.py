@@ -0,0 +1,168 @@
+"""
+交流稳态（相量）分析与频率扫描
+
+各元件换成角频率 ω 下的复导纳后组装复数 MNA 方程组：
+    电阻类元件 Y = 1/R      电容 Y = jωC      电感 Y = 1/(jωL)
+电源按相量激励处理（默认幅值为电压值、相位为0），求出每个频率下各节点电压的幅值和相位，
+可用于幅频、相频特性（波特图）一类的实验。
+所有频率共用同一个符号结构：小规模的稠密方程组把各频率的矩阵堆叠成 (频率数, n, n) 数组批量求解，
+规模较大或使用稀疏矩阵时逐个频率做LU分解（稀疏矩阵共用同一稀疏模式）。
+小灯泡在交流分析中按额定工作点的电阻处理。
+"""
+import logging
+
+import numpy as np
+
+import circuit_solver
+from netlist import NetlistSolver, terminal_voltages, is_voltage_source, TYPE_CAPACITOR, TYPE_INDUCTOR
+
+logger = logging.getLogger('CircuitSimulator')
+
+# 批量求解时一次堆叠的矩阵元素总数上限（频率数 × n²），超过时分批，限制内存占用
+AC_BATCH_ELEMENTS = 1 << 22
+
+
+class ACResult:
+    """
+    频率扫描的结果
+
+    Attributes:
+        frequencies: 频率(Hz)，形状为 (频率数,)
+        node_voltages: 节点电压相量，形状为 (频率数, 节点数)
+        voltage: 元件电压相量 node1 - node2，形状为 (频率数, 元件数)
+        current: 元件电流相量，符号约定与直流求解相同，形状为 (频率数, 元件数)
+        connected: 各元件是否两端都已连接
+    """
+
+    def __init__(self, frequencies, node_voltages, voltage, current, connected):
+        self.frequencies = frequencies
+        self.node_voltages = node_voltages
+        self.voltage = voltage
+        self.current = current
+        self.connected = connected
+
+    @property
+    def magnitude(self):
+        """各频率下各节点电压的幅值"""
+        return np.abs(self.node_voltages)
+
+    @property
+    def phase(self):
+        """各频率下各节点电压的相位(度)"""
+        return np.degrees(np.angle(self.node_voltages))
+
+    def transfer(self, output_node, input_node):
+        """
+        两节点电压之比 V(output_node) / V(input_node)
+
+        Returns:
+            (增益dB, 相位(度))，形状均为 (频率数,)
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = self.node_voltages[:, output_node] / self.node_voltages[:, input_node]
+            return 20 * np.log10(np.abs(ratio)), np.degrees(np.angle(ratio))
+
+
+def admittances(netlist, structure, solver, frequencies):
+    """
+    按印记顺序计算各两端元件在各频率下的复导纳
+
+    Returns:
+        形状为 (频率数, 两端元件数) 的复数数组
+    """
+    omega = 2 * np.pi * np.asarray(frequencies, dtype=float)
+    g = solver.conductances(netlist, structure)
+    Y = np.repeat(g[None, :].astype(complex), len(omega), axis=0)
+    types = netlist.type_codes[structure.branch_index]
+    storage = netlist.storage_value[structure.branch_index]
+    # 容量为0的电容、电感退化为直流模型中的电阻
+    capacitors = np.flatnonzero((types == TYPE_CAPACITOR) & (storage > 0))
+    inductors = np.flatnonzero((types == TYPE_INDUCTOR) & (storage > 0))
+    Y[:, capacitors] = 1j * omega[:, None] * storage[capacitors]
+    Y[:, inductors] = 1 / (1j * omega[:, None] * storage[inductors])
+    return Y
+
+
+def _solve_frequencies(structure, Y, z):
+    """
+    求解各频率下的复数方程组，无法求解的频率对应行为 NaN
+
+    Returns:
+        形状为 (频率数, n) 的解矩阵
+    """
+    m = len(Y)
+    X = np.full((m, structure.n), np.nan, dtype=complex)
+    if structure.sparse or structure.n > circuit_solver.SWEEP_BATCH_LIMIT:
+        # 稀疏结构的批量组装结果是 CSC 矩阵列表，不能堆叠求解；规模较大时批量稠密求解反而更慢。
+        # 这两种情况逐个频率分解（稀疏结构共用同一稀疏模式）
+        for f, A in enumerate(structure.assemble_batch(Y)):
+            try:
+                X[f] = circuit_solver.LUFactorization(A).solve(z)
+            except (np.linalg.LinAlgError, RuntimeError):
+                pass
+        return X
+
+    chunk = max(1, AC_BATCH_ELEMENTS // max(structure.n * structure.n, 1))
+    for start in range(0, m, chunk):
+        stack = structure.assemble_batch(Y[start:start + chunk])
+        rhs = np.broadcast_to(z[:, None], (len(stack), structure.n, 1))
+        try:
+            X[start:start + chunk] = np.linalg.solve(stack, rhs)[:, :, 0]
+        except np.linalg.LinAlgError:
+            # 个别频率使矩阵奇异（如LC谐振的理想回路）时逐个求解
+            for i, A in enumerate(stack):
+                try:
+                    X[start + i] = np.linalg.solve(A, z)
+                except np.linalg.LinAlgError:
+                    pass
+    return X
+
+
+def ac_sweep(netlist, frequencies, source_phasors=None, sparse=None):
+    """
+    在一组频率下求解电路的交流稳态
+
+    Args:
+        netlist: 电路网表
+        frequencies: 频率(Hz)数组，必须为正数
+        source_phasors: 各电源的电压相量（按网表中电源出现的顺序，可为复数），默认取电压值、相位为0
+        sparse: 是否使用稀疏矩阵，None 按方程组规模自动选择
+
+    Returns:
+        ACResult
+
+    Raises:
+        ValueError: 频率不为正数，或电源相量个数不符
+        np.linalg.LinAlgError: 方程组为空
+    """
+    frequencies = np.atleast_1d(np.asarray(frequencies, dtype=float))
+    if not np.all(frequencies > 0):
+        raise ValueError("频率必须为正数")
+
+    solver = NetlistSolver(sparse)
+    solver.nonlinear_bulbs = False
+    structure = solver.prepare(netlist)
+    if structure is None:
+        raise np.linalg.LinAlgError("Empty system")
+
+    if source_phasors is None:
+        phasors = netlist.source_value[structure.source_index].astype(complex)
+    else:
+        source_phasors = np.asarray(source_phasors, dtype=complex)
+        sources = np.flatnonzero(is_voltage_source(netlist.type_codes))
+        if len(source_phasors) != len(sources):
+            raise ValueError(f"电源相量个数应为 {len(sources)}")
+        phasors = source_phasors[np.searchsorted(sources, structure.source_index)]
+
+    Y = admittances(netlist, structure, solver, frequencies)
+    z = structure.rhs(phasors)
+    X = _solve_frequencies(structure, Y, z)
+
+    # 两端元件电流由复导纳求出，约定与直流求解相同：(v2 - v1)·Y
+    branch_current = -structure.branch_voltages(X, np.arange(len(structure.branch_index))) * Y
+    node_voltages, _, current = solver.component_values(
+        netlist, structure, X, (structure.branch_index, branch_current))
+    v1, v2 = terminal_voltages(netlist, node_voltages)
+    connected = (netlist.node1 >= 0) & (netlist.node2 >= 0)
+    logger.debug(f"交流分析: {len(frequencies)} 个频率, {structure.n} 个未知数")
+    return ACResult(frequencies, node_voltages, v1 - v2, current, connected)
@@ -0,0 +1,272 @@
+"""
+电路求解基准：用合成电路测量求解流程各阶段的耗时和峰值内存
+
+生成器: series(串联链) / parallel(并联组) / ladder(梯形网络) / mesh(二维电阻网格) / random(随机连通图)
+阶段:   节点识别 → 方程组装 → LU分解 → 回代 → 结果写回
+
+用法:
+    python benchmarks/bench_solver.py [--generators series mesh] [--sizes 10 1000 100000]
+                                      [--repeat 3] [--json 结果.json] [--compare 旧结果.json]
+
+电路以 Circuit.to_dict() 的格式生成，经 Netlist.from_circuit_dict 编译，全程不需要 QApplication。
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import scipy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import netlist  # noqa: E402
+import circuit_solver  # noqa: E402
+
+PHASES = ["identify_nodes", "assemble", "factorize", "back_substitute", "write_back"]
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+
+
+class CircuitBuilder:
+    """按抽象节点添加元件，最后把同一节点上的连接点用导线依次相连，生成 to_dict 格式的数据"""
+
+    def __init__(self):
+        self.components = []
+        self.terminals = {}  # 节点 -> [(组件序号, 连接点序号)]
+
+    def add(self, name, node_a, node_b, **properties):
+        index = len(self.components)
+        self.components.append({"name": name, "properties": properties})
+        self.terminals.setdefault(node_a, []).append((index, 0))
+        self.terminals.setdefault(node_b, []).append((index, 1))
+
+    def resistor(self, node_a, node_b, value):
+        self.add("定值电阻", node_a, node_b, 电阻值=float(value))
+
+    def source(self, node_a, node_b, voltage=12.0):
+        self.add("电源", node_a, node_b, 电压值=float(voltage))
+
+    def to_dict(self):
+        wires = []
+        for points in self.terminals.values():
+            for (ci_a, pi_a), (ci_b, pi_b) in zip(points, points[1:]):
+                wires.append({
+                    "path_points": [],
+                    "source": {"component_index": ci_a, "point_index": pi_a},
+                    "target": {"component_index": ci_b, "point_index": pi_b},
+                })
+        return {"components": self.components, "wires": wires}
+
+
+def series_circuit(num_elements):
+    """电源与 num_elements-1 个电阻串联成一个回路"""
+    builder = CircuitBuilder()
+    count = max(1, num_elements - 1)
+    builder.source(1, 0)
+    for i in range(count):
+        builder.resistor(i + 1, i + 2 if i < count - 1 else 0, 10.0 + i % 7)
+    return builder.to_dict()
+
+
+def parallel_circuit(num_elements):
+    """电源两端并联 num_elements-1 个电阻"""
+    builder = CircuitBuilder()
+    builder.source(1, 0)
+    for i in range(max(1, num_elements - 1)):
+        builder.resistor(1, 0, 100.0 + i % 13)
+    return builder.to_dict()
+
+
+def ladder_circuit(num_elements):
+    """梯形网络：每节一个串联电阻和一个对地电阻"""
+    builder = CircuitBuilder()
+    builder.source(1, 0)
+    for i in range(max(1, (num_elements - 1) // 2)):
+        builder.resistor(i + 1, i + 2, 10.0 + i % 7)
+        builder.resistor(i + 2, 0, 100.0 + i % 13)
+    return builder.to_dict()
+
+
+def mesh_circuit(num_elements):
+    """k×k 二维电阻网格（约 2k² 个电阻），电源接在两个对角之间"""
+    k = max(2, int(round(np.sqrt(max(1, num_elements - 1) / 2.0))))
+    builder = CircuitBuilder()
+
+    def node(row, col):
+        return row * k + col
+
+    builder.source(node(k - 1, k - 1), node(0, 0))
+    for row in range(k):
+        for col in range(k):
+            if col + 1 < k:
+                builder.resistor(node(row, col), node(row, col + 1), 10.0 + (row + col) % 5)
+            if row + 1 < k:
+                builder.resistor(node(row, col), node(row + 1, col), 10.0 + (row * col) % 5)
+    return builder.to_dict()
+
+
+def random_circuit(num_elements, seed=0, span=32):
+    """
+    随机连通图：先生成随机生成树保证连通，再随机添加其余电阻
+    每个电阻连接的两个节点编号相差不超过 span，与实际电路一样以局部连接为主，
+    避免完全随机图在大规模时LU分解的填充过多
+    """
+    rng = random.Random(seed)
+    num_resistors = max(1, num_elements - 1)
+    num_nodes = max(2, num_resistors // 3 + 1)
+    builder = CircuitBuilder()
+    builder.source(num_nodes - 1, 0)
+    for node in range(1, num_nodes):
+        builder.resistor(node, rng.randrange(max(0, node - span), node), rng.uniform(1.0, 1000.0))
+    for _ in range(num_resistors - (num_nodes - 1)):
+        a = rng.randrange(num_nodes - 1)
+        b = rng.randrange(a + 1, min(num_nodes, a + span + 1))
+        builder.resistor(a, b, rng.uniform(1.0, 1000.0))
+    return builder.to_dict()
+
+
+GENERATORS = {
+    "series": series_circuit,
+    "parallel": parallel_circuit,
+    "ladder": ladder_circuit,
+    "mesh": mesh_circuit,
+    "random": random_circuit,
+}
+
+
+def run_pipeline(data, table):
+    """
+    执行一次完整的求解流程（每次都重新识别节点、组装和分解，不使用缓存）
+
+    Returns:
+        (各阶段耗时字典, 网表, MNA结构)
+    """
+    timings = {}
+    solver = netlist.NetlistSolver()
+    solver.reuse_factorization = False
+
+    start = time.perf_counter()
+    circuit_netlist = netlist.Netlist.from_circuit_dict(data)
+    timings["identify_nodes"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    A, z, structure = solver.build_system(circuit_netlist)
+    timings["assemble"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    factorization = circuit_solver.LUFactorization(A)
+    timings["factorize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    x = factorization.solve(z)
+    timings["back_substitute"] = time.perf_counter() - start
+
+    # 与 Circuit.update_component_values 相同的整列写入
+    start = time.perf_counter()
+    node_voltages, voltage, current = solver.component_values(circuit_netlist, structure, x)
+    connected = (circuit_netlist.node1 >= 0) & (circuit_netlist.node2 >= 0)
+    solution = netlist.NetlistSolution(x, node_voltages, voltage, current, connected,
+                                       x[structure.num_node_vars:])
+    n = table.size
+    table.voltage[:n][connected] = solution.voltage[connected]
+    table.current[:n][connected] = solution.current[connected]
+    table.power[:n][connected] = solution.power[connected]
+    timings["write_back"] = time.perf_counter() - start
+
+    return timings, circuit_netlist, structure
+
+
+def benchmark(generator, size, repeat):
+    """对一个生成器和规模测量各阶段的最短耗时和峰值内存"""
+    data = GENERATORS[generator](size)
+    table = netlist.ComponentTable()
+    for comp in data["components"]:
+        table.add(comp["name"])
+
+    best = {phase: float("inf") for phase in PHASES}
+    for _ in range(repeat):
+        timings, circuit_netlist, structure = run_pipeline(data, table)
+        for phase in PHASES:
+            best[phase] = min(best[phase], timings[phase])
+
+    # 峰值内存单独测一次，避免 tracemalloc 的开销影响计时
+    tracemalloc.start()
+    run_pipeline(data, table)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "generator": generator,
+        "elements": len(circuit_netlist),
+        "nodes": circuit_netlist.num_nodes,
+        "unknowns": structure.n,
+        "sparse": bool(structure.sparse),
+        "phases_s": best,
+        "total_s": sum(best.values()),
+        "peak_memory_bytes": peak,
+    }
+
+
+def environment():
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def print_results(results, baseline=None):
+    """以表格打印结果；提供基准结果时附加总耗时之比（旧/新，大于1表示变快）"""
+    baseline_totals = {}
+    if baseline:
+        baseline_totals = {(r["generator"], r["elements"]): r["total_s"] for r in baseline.get("results", [])}
+
+    header = f"{'生成器':<8} {'元件数':>8} {'未知数':>8}" + "".join(f" {phase[:10]:>11}" for phase in PHASES)
+    header += f" {'总计(ms)':>10} {'峰值内存(MB)':>12}"
+    if baseline_totals:
+        header += f" {'加速比':>8}"
+    print(header)
+    for r in results:
+        line = f"{r['generator']:<8} {r['elements']:>8} {r['unknowns']:>8}"
+        line += "".join(f" {r['phases_s'][phase] * 1e3:>11.3f}" for phase in PHASES)
+        line += f" {r['total_s'] * 1e3:>10.3f} {r['peak_memory_bytes'] / 2**20:>12.2f}"
+        old = baseline_totals.get((r["generator"], r["elements"]))
+        if old:
+            line += f" {old / r['total_s']:>8.2f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="电路求解各阶段的性能基准")
+    parser.add_argument("--generators", nargs="+", choices=list(GENERATORS), default=list(GENERATORS),
+                        help="要测试的电路生成器")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="元件数量（近似）")
+    parser.add_argument("--repeat", type=int, default=3, help="每项计时重复次数（取最小值）")
+    parser.add_argument("--json", help="将结果写入JSON文件")
+    parser.add_argument("--compare", help="与之前保存的JSON结果比较总耗时")
+    args = parser.parse_args()
+
+    results = []
+    for generator in args.generators:
+        for size in args.sizes:
+            results.append(benchmark(generator, size, args.repeat))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+MNA印记（stamping）基准：比较逐元件循环填充与向量化组装
+
+用法:
+    python benchmarks/bench_stamping.py [--sizes 100 500 2000] [--repeat 5] [--json 输出文件]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import netlist  # noqa: E402
+
+
+def ladder_netlist(num_sections):
+    """电阻梯形网络：一个电源 + 每节一个串联电阻和一个对地电阻"""
+    names = ["电源"]
+    node1 = [1]
+    node2 = [0]
+    resistance = [0.001]
+    source_value = [12.0]
+    for i in range(num_sections):
+        names += ["定值电阻", "定值电阻"]
+        node1 += [i + 1, i + 2]
+        node2 += [i + 2, 0]
+        resistance += [10.0 + i % 7, 100.0 + i % 13]
+        source_value += [0.0, 0.0]
+    return netlist.Netlist(names, node1, node2, resistance, source_value)
+
+
+def loop_build(circuit_netlist):
+    """原 Circuit.build_mna_matrices 的逐元件循环实现（稠密矩阵），作为对照"""
+    nodes = set()
+    voltage_sources = []
+    for k in range(len(circuit_netlist)):
+        nodes.add(int(circuit_netlist.node1[k]))
+        nodes.add(int(circuit_netlist.node2[k]))
+        if circuit_netlist.type_codes[k] == netlist.TYPE_SOURCE:
+            voltage_sources.append(k)
+
+    num_nodes = len(nodes)
+    n = num_nodes - 1 + len(voltage_sources)
+    A = np.zeros((n, n), dtype=float)
+    z = np.zeros(n, dtype=float)
+    var_index_map = {'node_voltages': {}, 'branch_currents': {}}
+    node_index = 0
+    for node in sorted(nodes):
+        if node != 0:
+            var_index_map['node_voltages'][node] = node_index
+            node_index += 1
+    for i, k in enumerate(voltage_sources):
+        var_index_map['branch_currents'][k] = num_nodes - 1 + i
+
+    for k in range(len(circuit_netlist)):
+        if circuit_netlist.type_codes[k] == netlist.TYPE_SOURCE:
+            continue
+        r = float(circuit_netlist.resistance[k])
+        if r <= 0 or r == float('inf'):
+            continue
+        g = 1.0 / r
+        node1 = int(circuit_netlist.node1[k])
+        node2 = int(circuit_netlist.node2[k])
+        if node1 != 0 and node2 != 0:
+            idx1 = var_index_map['node_voltages'][node1]
+            idx2 = var_index_map['node_voltages'][node2]
+            A[idx1, idx1] += g
+            A[idx2, idx2] += g
+            A[idx1, idx2] -= g
+            A[idx2, idx1] -= g
+        elif node1 != 0:
+            idx1 = var_index_map['node_voltages'][node1]
+            A[idx1, idx1] += g
+        elif node2 != 0:
+            idx2 = var_index_map['node_voltages'][node2]
+            A[idx2, idx2] += g
+
+    for k in voltage_sources:
+        idx_i = var_index_map['branch_currents'][k]
+        node1 = int(circuit_netlist.node1[k])
+        node2 = int(circuit_netlist.node2[k])
+        if node1 != 0:
+            idx1 = var_index_map['node_voltages'][node1]
+            A[idx_i, idx1] = 1
+            A[idx1, idx_i] = 1
+        if node2 != 0:
+            idx2 = var_index_map['node_voltages'][node2]
+            A[idx_i, idx2] = -1
+            A[idx2, idx_i] = -1
+        z[idx_i] = circuit_netlist.source_value[k]
+    return A, z
+
+
+def vectorized_build(circuit_netlist, solver):
+    """向量化组装（强制稠密，便于与循环实现逐项比较）"""
+    A, z, _ = solver.build_system(circuit_netlist, sparse=False)
+    return A, z
+
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes, repeat):
+    results = []
+    for size in sizes:
+        circuit_netlist = ladder_netlist(size)
+        A_loop, z_loop = loop_build(circuit_netlist)
+        A_vec, z_vec = vectorized_build(circuit_netlist, netlist.NetlistSolver())
+        max_diff = float(max(np.abs(A_loop - A_vec).max(), np.abs(z_loop - z_vec).max()))
+
+        loop_time = best_time(lambda: loop_build(circuit_netlist), repeat)
+        # 冷启动：每次都重新建立符号结构
+        cold_time = best_time(lambda: vectorized_build(circuit_netlist, netlist.NetlistSolver()), repeat)
+        # 热启动：符号结构已缓存，只代入数值
+        warm_solver = netlist.NetlistSolver()
+        vectorized_build(circuit_netlist, warm_solver)
+        warm_time = best_time(lambda: vectorized_build(circuit_netlist, warm_solver), repeat)
+
+        results.append({
+            "elements": len(circuit_netlist),
+            "unknowns": int(A_loop.shape[0]),
+            "loop_s": loop_time,
+            "vectorized_cold_s": cold_time,
+            "vectorized_warm_s": warm_time,
+            "speedup_cold": loop_time / cold_time,
+            "speedup_warm": loop_time / warm_time,
+            "max_abs_diff": max_diff,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MNA印记循环与向量化组装对比")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000], help="梯形网络节数")
+    parser.add_argument("--repeat", type=int, default=5, help="每项计时重复次数（取最小值）")
+    parser.add_argument("--json", help="将结果写入JSON文件")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat)
+    print(f"{'元件数':>8} {'未知数':>8} {'循环(ms)':>10} {'向量化冷(ms)':>14} {'向量化热(ms)':>14} {'加速比(热)':>10} {'最大差值':>10}")
+    for r in results:
+        print(f"{r['elements']:>8} {r['unknowns']:>8} {r['loop_s'] * 1e3:>10.2f} "
+              f"{r['vectorized_cold_s'] * 1e3:>14.2f} {r['vectorized_warm_s'] * 1e3:>14.2f} "
+              f"{r['speedup_warm']:>10.1f} {r['max_abs_diff']:>10.1e}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
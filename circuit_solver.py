@@ -0,0 +1,478 @@
+import logging
+import warnings
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+import scipy.sparse.csgraph as csgraph
+
+# 获取当前已经配置的logger
+logger = logging.getLogger('CircuitSimulator')
+
+# MNA方程组未知数超过该数量时改用稀疏矩阵组装与稀疏LU求解
+SPARSE_MATRIX_THRESHOLD = 200
+
+# 相对已分解矩阵变化的元件数不超过该值时，用 Sherman–Morrison/Woodbury 低秩更新代替重新分解
+LOW_RANK_UPDATE_LIMIT = 4
+# 低秩更新的误差放大倍数上限，超过时视为病态，回退到完整分解
+LOW_RANK_MAX_GROWTH = 1e8
+# 低秩更新结果的相对残差上限
+LOW_RANK_MAX_RESIDUAL = 1e-9
+# 误差放大倍数不超过该值时更新误差可以忽略，不再校验残差；介于两者之间时才校验
+LOW_RANK_CHECK_GROWTH = 1e4
+
+# 参数扫描时方程组未知数不超过该值则堆叠成三维数组批量求解，否则使用秩1更新公式
+SWEEP_BATCH_LIMIT = 64
+# 逐个元件秩1更新时，每批回代的右端项个数
+SINGLE_UPDATE_CHUNK = 256
+
+
+def use_sparse(n, sparse=None):
+    """
+    判断规模为n的方程组是否使用稀疏路径
+
+    Args:
+        n: 方程组未知数个数
+        sparse: True/False 强制指定，None 表示按规模自动选择
+
+    Returns:
+        bool: 是否使用稀疏矩阵
+    """
+    if sparse is None:
+        return n > SPARSE_MATRIX_THRESHOLD
+    return bool(sparse)
+
+
+def solve_linear_system(A, z):
+    """
+    求解 Ax = z，稠密矩阵使用 LAPACK LU，稀疏矩阵使用 SuperLU 直接分解
+
+    Args:
+        A: 稠密数组或稀疏矩阵
+        z: 右端向量
+
+    Returns:
+        解向量 x
+
+    Raises:
+        np.linalg.LinAlgError: 矩阵奇异或解中出现非有限值
+    """
+    return LUFactorization(A).solve(z)
+
+
+class LUFactorization:
+    """MNA矩阵的LU分解（实数或复数，如交流分析的导纳矩阵），可对多个右端向量重复求解"""
+
+    def __init__(self, A):
+        self.sparse = sp.issparse(A)
+        self.n = A.shape[0]
+        self.complex = np.iscomplexobj(A.data if self.sparse else A)
+        if self.sparse:
+            try:
+                self._lu = spla.splu(A.tocsc())
+            except RuntimeError as e:
+                # SuperLU 对奇异矩阵抛出 RuntimeError，统一成 LinAlgError 便于上层处理
+                raise np.linalg.LinAlgError(str(e))
+        else:
+            with warnings.catch_warnings():
+                # 奇异性由下面的主元检查统一报告
+                warnings.simplefilter("ignore", la.LinAlgWarning)
+                lu, piv = la.lu_factor(np.asarray(A, dtype=complex if self.complex else float),
+                                       check_finite=False)
+            if np.any(np.diag(lu) == 0):
+                raise np.linalg.LinAlgError("Singular matrix")
+            self._lu = (lu, piv)
+
+    def solve(self, b, transpose=False):
+        """
+        求解 Ax = b（transpose 时求解 Aᵀx = b，如伴随灵敏度分析），b 可以是向量或每列一个右端项的二维数组
+        实矩阵的复数右端项分别求解实部和虚部
+
+        Raises:
+            np.linalg.LinAlgError: 解中出现非有限值
+        """
+        if np.iscomplexobj(b) and not self.complex:
+            return self.solve(np.real(b), transpose) + 1j * self.solve(np.imag(b), transpose)
+        b = np.asarray(b, dtype=complex if self.complex else float)
+        if self.sparse:
+            x = self._lu.solve(b, trans='T' if transpose else 'N')
+        else:
+            x = la.lu_solve(self._lu, b, trans=1 if transpose else 0, check_finite=False)
+        if not np.all(np.isfinite(x)):
+            raise np.linalg.LinAlgError("Singular matrix")
+        return x
+
+
+class MNAStructure:
+    """
+    MNA方程组的符号结构：变量编号和每个元件在矩阵中的印记位置
+    拓扑不变时可反复使用，只需代入新的电导值和电源电压即可重新组装
+
+    两端元件 k 连接矩阵索引 idx1[k]、idx2[k]（-1 表示参考节点），
+    电压源 j 的支路电流变量位于 num_node_vars + j
+    """
+
+    def __init__(self, num_node_vars, branch_nodes, source_nodes, sparse=None):
+        """
+        Args:
+            num_node_vars: 非参考节点个数
+            branch_nodes: 形状为(k, 2)的两端元件矩阵索引，-1 表示参考节点
+            source_nodes: 形状为(m, 2)的电压源正负极矩阵索引，-1 表示参考节点
+            sparse: True/False 强制指定，None 表示按规模自动选择
+        """
+        branch_nodes = np.asarray(branch_nodes, dtype=np.int64).reshape(-1, 2)
+        source_nodes = np.asarray(source_nodes, dtype=np.int64).reshape(-1, 2)
+        self.num_node_vars = num_node_vars
+        self.num_branches = len(branch_nodes)
+        self.num_sources = len(source_nodes)
+        self.n = num_node_vars + self.num_sources
+        self.sparse = use_sparse(self.n, sparse)
+        self.branch_nodes = branch_nodes
+        self.source_nodes = source_nodes
+
+        # 电导印记：每个元件最多4项，(行, 列, 符号)，元件序号用于从电导向量取值
+        i1 = branch_nodes[:, 0]
+        i2 = branch_nodes[:, 1]
+        owner = np.arange(self.num_branches)
+        stamp_rows = np.concatenate([i1, i2, i1, i2])
+        stamp_cols = np.concatenate([i1, i2, i2, i1])
+        stamp_sign = np.concatenate([np.ones(2 * self.num_branches), -np.ones(2 * self.num_branches)])
+        stamp_owner = np.concatenate([owner, owner, owner, owner])
+        keep = (stamp_rows >= 0) & (stamp_cols >= 0)
+        self._stamp_owner = stamp_owner[keep]
+        self._stamp_sign = stamp_sign[keep]
+
+        # 电压源印记为常数 ±1
+        branch_idx = num_node_vars + np.arange(self.num_sources)
+        s1 = source_nodes[:, 0]
+        s2 = source_nodes[:, 1]
+        fixed_rows = np.concatenate([branch_idx, s1, branch_idx, s2])
+        fixed_cols = np.concatenate([s1, branch_idx, s2, branch_idx])
+        fixed_vals = np.concatenate([np.ones(2 * self.num_sources), -np.ones(2 * self.num_sources)])
+        fixed_keep = (fixed_rows >= 0) & (fixed_cols >= 0)
+        self._fixed_vals = fixed_vals[fixed_keep]
+
+        rows = np.concatenate([stamp_rows[keep], fixed_rows[fixed_keep]])
+        cols = np.concatenate([stamp_cols[keep], fixed_cols[fixed_keep]])
+
+        # 预先计算每个三元组落在矩阵存储中的位置，重新组装时只做一次 bincount
+        if self.sparse:
+            keys = cols * self.n + rows  # CSC 按列优先、列内按行排序
+            unique_keys, self._slot = np.unique(keys, return_inverse=True)
+            self._indices = unique_keys % self.n
+            self._indptr = np.searchsorted(unique_keys // self.n, np.arange(self.n + 1))
+            self._num_slots = len(unique_keys)
+        else:
+            self._slot = rows * self.n + cols
+            self._num_slots = self.n * self.n
+        self._scatter = None
+
+    def assemble(self, conductances):
+        """
+        代入电导向量组装矩阵
+
+        Args:
+            conductances: 长度为 num_branches 的电导数组，交流分析时为复导纳
+
+        Returns:
+            稠密的 numpy 数组或 CSC 格式的稀疏矩阵
+        """
+        g = np.asarray(conductances)
+        vals = np.concatenate([self._stamp_sign * g[self._stamp_owner], self._fixed_vals])
+        data = np.bincount(self._slot, weights=vals.real, minlength=self._num_slots)
+        if np.iscomplexobj(vals):
+            data = data + 1j * np.bincount(self._slot, weights=vals.imag, minlength=self._num_slots)
+        if self.sparse:
+            return sp.csc_matrix((data, self._indices, self._indptr), shape=(self.n, self.n))
+        return data.reshape(self.n, self.n)
+
+    def assemble_batch(self, conductances):
+        """
+        一次组装多组电导（形状为 (m, num_branches)，可为复数）对应的矩阵，符号结构只计算一次
+
+        Returns:
+            稠密结构返回形状为 (m, n, n) 的数组，可直接交给 np.linalg.solve 批量求解；
+            稀疏结构返回 m 个共用 indices/indptr 的 CSC 矩阵
+        """
+        g = np.asarray(conductances)
+        if self._scatter is None:
+            # 三元组 -> 存储位置的求和矩阵
+            entries = len(self._slot)
+            self._scatter = sp.csr_matrix((np.ones(entries), (self._slot, np.arange(entries))),
+                                          shape=(self._num_slots, entries))
+        fixed = np.broadcast_to(self._fixed_vals, (len(g), len(self._fixed_vals)))
+        vals = np.concatenate([self._stamp_sign * g[:, self._stamp_owner], fixed], axis=1)
+        data = np.asarray((self._scatter @ vals.T).T)
+        if self.sparse:
+            return [sp.csc_matrix((row, self._indices, self._indptr), shape=(self.n, self.n)) for row in data]
+        return data.reshape(len(g), self.n, self.n)
+
+    def incidence_matrix(self, branches):
+        """
+        返回指定两端元件的关联矩阵 U（n×k），第k列在 idx1 处为+1、idx2 处为-1
+        元件电导变化 Δg 对矩阵的影响为 U diag(Δg) Uᵀ
+        """
+        branches = np.asarray(branches, dtype=np.int64)
+        U = np.zeros((self.n, len(branches)), dtype=float)
+        columns = np.arange(len(branches))
+        i1 = self.branch_nodes[branches, 0]
+        i2 = self.branch_nodes[branches, 1]
+        U[i1[i1 >= 0], columns[i1 >= 0]] += 1.0
+        U[i2[i2 >= 0], columns[i2 >= 0]] -= 1.0
+        return U
+
+    def rhs(self, source_values):
+        """由电压源电压组装右端向量 z（交流分析时电压为复相量）"""
+        z = np.zeros(self.n, dtype=np.result_type(np.asarray(source_values), float))
+        z[self.num_node_vars:] = source_values
+        return z
+
+    def stamp_currents(self, z, branches, currents):
+        """
+        把与两端元件 branches 并联的电流源（从 idx1 经元件流向 idx2）加入右端向量 z（原地修改）
+        非线性元件的线性化模型和储能元件的伴随模型都表示为电导并联电流源
+        """
+        currents = np.asarray(currents, dtype=float)
+        i1 = self.branch_nodes[branches, 0]
+        i2 = self.branch_nodes[branches, 1]
+        np.add.at(z, i1[i1 >= 0], -currents[i1 >= 0])
+        np.add.at(z, i2[i2 >= 0], currents[i2 >= 0])
+        return z
+
+    def matvec(self, conductances, x):
+        """
+        不组装矩阵计算 A x（A 为代入电导 conductances 的 MNA 矩阵），用于校验残差
+
+        Returns:
+            (A x, |A| |x|)，后者用作残差的相对尺度
+        """
+        x = np.asarray(x, dtype=float)
+        g = np.asarray(conductances, dtype=float)
+        padded = np.append(x, 0.0)  # 索引-1（参考节点）落在末尾补的0上
+        i1 = np.where(self.branch_nodes[:, 0] >= 0, self.branch_nodes[:, 0], self.n)
+        i2 = np.where(self.branch_nodes[:, 1] >= 0, self.branch_nodes[:, 1], self.n)
+        s1 = np.where(self.source_nodes[:, 0] >= 0, self.source_nodes[:, 0], self.n)
+        s2 = np.where(self.source_nodes[:, 1] >= 0, self.source_nodes[:, 1], self.n)
+        branch = self.num_node_vars + np.arange(self.num_sources)
+        # 两端元件的电流 G(v1 - v2) 从 idx1 流出、流入 idx2；电压源行为 v1 - v2，支路电流计入两极的KCL
+        current = g * (padded[i1] - padded[i2])
+        magnitude = np.abs(g) * (np.abs(padded[i1]) + np.abs(padded[i2]))
+        rows = np.concatenate([i1, i2, branch, branch, s1, s2])
+        values = np.concatenate([current, -current, padded[s1], -padded[s2], x[branch], -x[branch]])
+        scale = np.concatenate([magnitude, magnitude, np.abs(padded[s1]), np.abs(padded[s2]),
+                                np.abs(x[branch]), np.abs(x[branch])])
+        y = np.bincount(rows, weights=values, minlength=self.n + 1)[:self.n]
+        bound = np.bincount(rows, weights=scale, minlength=self.n + 1)[:self.n]
+        return y, bound
+
+    def branch_voltages(self, x, branches):
+        """两端元件 branches 的电压 v(idx1) - v(idx2)，参考节点电压为0，x 可以带前置的批量维度"""
+        x = np.asarray(x)
+        padded = np.concatenate([x, np.zeros(x.shape[:-1] + (1,))], axis=-1)
+        # 索引-1 正好落在末尾补的0上
+        return padded[..., self.branch_nodes[branches, 0]] - padded[..., self.branch_nodes[branches, 1]]
+
+
+def connected_labels(num_nodes, node_a, node_b):
+    """
+    以边 (node_a[k], node_b[k]) 把 num_nodes 个节点划分为连通分量（向量化的并查集）
+
+    Returns:
+        长度为 num_nodes 的分量编号数组，编号按各分量最小节点的顺序从0开始
+    """
+    node_a = np.asarray(node_a, dtype=np.int64)
+    node_b = np.asarray(node_b, dtype=np.int64)
+    graph = sp.coo_matrix((np.ones(len(node_a)), (node_a, node_b)), shape=(num_nodes, num_nodes))
+    _, labels = csgraph.connected_components(graph, directed=False)
+    return labels
+
+
+class DisjointSet:
+    """并查集（按大小合并 + 路径减半），元素为任意可哈希对象"""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def add(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        """返回item所在集合的代表元，未出现过的元素自动成为单元素集合"""
+        parent = self.parent
+        if item not in parent:
+            self.add(item)
+            return item
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        """合并a、b所在集合，返回合并后的代表元"""
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+
+def low_rank_update_solve(factorization, structure, base_conductances, conductances, z):
+    """
+    基于已有分解，用 Woodbury 恒等式求解电导变化后的方程组（单个元件时即 Sherman–Morrison）
+
+    A' = A + U C Uᵀ，C = diag(Δg)
+    x = y - W (I + C Uᵀ W)⁻¹ C Uᵀ y，其中 y = A⁻¹z，W = A⁻¹U
+    只需 k+1 次回代和一个 k×k 的小方程组，无需重新分解
+
+    Args:
+        factorization: 基准电导 base_conductances 下的 LUFactorization
+        structure: 对应的 MNAStructure
+        base_conductances: 分解时使用的电导向量
+        conductances: 当前电导向量
+        z: 当前右端向量
+
+    Returns:
+        解向量 x；变化元件过多、更新病态或残差过大时返回 None，由调用方回退到完整分解
+    """
+    changed = np.flatnonzero(conductances != base_conductances)
+    if len(changed) > LOW_RANK_UPDATE_LIMIT:
+        return None
+
+    y = factorization.solve(z)
+    if len(changed) == 0:
+        return y
+
+    delta = conductances[changed] - base_conductances[changed]
+    U = structure.incidence_matrix(changed)
+    W = factorization.solve(U).reshape(structure.n, len(changed))
+    CUtW = delta[:, None] * (U.T @ W)
+    S = np.eye(len(changed)) + CUtW
+
+    # 电容矩阵 S 接近奇异时（如闭合开关断开），相消误差会被放大
+    smallest = np.linalg.svd(S, compute_uv=False)[-1]
+    growth = (1.0 + np.linalg.norm(CUtW, 2)) / smallest if smallest > 0 else np.inf
+    if growth > LOW_RANK_MAX_GROWTH:
+        return None
+
+    x = y - W @ np.linalg.solve(S, delta * (U.T @ y))
+    if growth <= LOW_RANK_CHECK_GROWTH:
+        return x
+
+    # 放大倍数偏大时按更新后的电导校验残差（不组装矩阵），防止精度不足的结果被采用
+    Ax, bound = structure.matvec(conductances, x)
+    residual = np.linalg.norm(Ax - z)
+    scale = np.linalg.norm(z) + np.linalg.norm(bound)
+    if not np.isfinite(residual) or residual > LOW_RANK_MAX_RESIDUAL * max(scale, 1e-300):
+        return None
+    return x
+
+
+def sweep_conductance(structure, factorization, conductances, z, branch, branch_conductances):
+    """
+    扫描单个两端元件的电导，一次性求出每个取值下的解
+
+    小规模方程组把所有取值的矩阵堆叠为 (m, n, n) 数组，用批量 np.linalg.solve 求解；
+    大规模方程组利用秩1更新的闭式解 x(Δg) = y - w·Δg(uᵀy)/(1 + Δg·uᵀw)，
+    只需在已有分解上做两次回代
+
+    Args:
+        structure: MNAStructure
+        factorization: conductances 下的 LUFactorization
+        conductances: 当前电导向量
+        z: 右端向量
+        branch: 被扫描元件在电导向量中的序号
+        branch_conductances: 长度为 m 的电导取值数组
+
+    Returns:
+        形状为 (m, n) 的解矩阵，无法求解的取值对应行为 NaN
+    """
+    values = np.asarray(branch_conductances, dtype=float)
+    delta = values - conductances[branch]
+    u = structure.incidence_matrix([branch])[:, 0]
+
+    if structure.n <= SWEEP_BATCH_LIMIT:
+        A = structure.assemble(conductances)
+        if sp.issparse(A):
+            A = A.toarray()
+        stack = A[None, :, :] + delta[:, None, None] * np.outer(u, u)[None, :, :]
+        rhs = np.broadcast_to(z[:, None], (len(values), structure.n, 1))
+        try:
+            return np.linalg.solve(stack, rhs)[:, :, 0]
+        except np.linalg.LinAlgError:
+            # 个别取值使矩阵奇异时逐个求解，奇异的取值记为 NaN
+            X = np.full((len(values), structure.n), np.nan)
+            for i in range(len(values)):
+                try:
+                    X[i] = np.linalg.solve(stack[i], z)
+                except np.linalg.LinAlgError:
+                    pass
+            return X
+
+    y = factorization.solve(z)
+    w = factorization.solve(u)
+    uy = u @ y
+    uw = u @ w
+    denom = 1.0 + delta * uw
+    X = y[None, :] - (delta * uy / np.where(denom == 0, np.inf, denom))[:, None] * w[None, :]
+
+    # 接近相消的取值（growth 过大）重新组装并完整求解
+    growth = (1.0 + np.abs(delta * uw)) / np.maximum(np.abs(denom), 1e-300)
+    for i in np.flatnonzero(growth > LOW_RANK_MAX_GROWTH):
+        g = conductances.copy()
+        g[branch] = values[i]
+        try:
+            X[i] = solve_linear_system(structure.assemble(g), z)
+        except np.linalg.LinAlgError:
+            X[i] = np.nan
+    return X
+
+
+def single_branch_updates(structure, factorization, conductances, z, branches, branch_conductances):
+    """
+    多个“只改一个元件”的情形：第i种情形只把元件 branches[i] 的电导改为 branch_conductances[i]，
+    一次求出所有情形的解（如逐个元件的断路、短路故障）
+
+    每种情形都是秩1更新 x_i = y - w_i·Δg_i(u_iᵀy)/(1 + Δg_i·u_iᵀw_i)，其中 W = A⁻¹U
+    对所有元件做一次多右端项回代（分块进行，限制内存），不需要重新分解
+
+    Args:
+        structure: MNAStructure
+        factorization: conductances 下的 LUFactorization
+        conductances: 当前电导向量
+        z: 右端向量
+        branches: 长度为 m 的元件序号（电导向量中的位置），可以重复
+        branch_conductances: 长度为 m 的新电导
+
+    Returns:
+        形状为 (m, n) 的解矩阵，矩阵奇异的情形对应行为 NaN
+    """
+    branches = np.asarray(branches, dtype=np.int64)
+    delta = np.asarray(branch_conductances, dtype=float) - conductances[branches]
+    y = factorization.solve(z)
+    X = np.empty((len(branches), structure.n))
+    for start in range(0, len(branches), SINGLE_UPDATE_CHUNK):
+        chunk = slice(start, start + SINGLE_UPDATE_CHUNK)
+        U = structure.incidence_matrix(branches[chunk])
+        W = factorization.solve(U).reshape(structure.n, U.shape[1])
+        uy = U.T @ y
+        uw = np.einsum('ij,ij->j', U, W)
+        denom = 1.0 + delta[chunk] * uw
+        X[chunk] = y[None, :] - (delta[chunk] * uy / np.where(denom == 0, np.inf, denom))[:, None] * W.T
+
+        # 接近相消（growth 过大）的情形重新组装并完整求解
+        growth = (1.0 + np.abs(delta[chunk] * uw)) / np.maximum(np.abs(denom), 1e-300)
+        for i in start + np.flatnonzero(growth > LOW_RANK_MAX_GROWTH):
+            g = conductances.copy()
+            g[branches[i]] = branch_conductances[i]
+            try:
+                X[i] = solve_linear_system(structure.assemble(g), z)
+            except np.linalg.LinAlgError:
+                X[i] = np.nan
+    return X
@@ -0,0 +1,267 @@
+"""
+元件模型注册表：每种元件在一处声明其类型编码、连接点、默认属性、求解参数、MNA 印记和绘制方式
+
+新增元件（如 README 中的二极管、三极管）时用 register() 注册一个 ComponentModel，
+再在 Component 上实现 painter 指定的绘制方法即可，界面、网表编译和求解器都通过注册表分派，
+不再逐处比较元件名称。本模块与 Qt 无关：连接点颜色用 Qt.GlobalColor 的名称表示，绘制方法用方法名表示。
+"""
+import numpy as np
+
+# 元件类型编码（元件表中以 int8 存储）
+TYPE_OTHER = 0
+TYPE_SOURCE = 1
+TYPE_RESISTOR = 2
+TYPE_RHEOSTAT = 3
+TYPE_SWITCH = 4
+TYPE_WIRE = 5
+TYPE_AMMETER = 6
+TYPE_VOLTMETER = 7
+TYPE_BULB = 8
+TYPE_CAPACITOR = 9
+TYPE_INDUCTOR = 10
+
+# MNA 印记方式：两端支路按电导印记；电压源增加一个支路电流变量和一行约束方程
+STAMP_NONE = None
+STAMP_CONDUCTANCE = "conductance"
+STAMP_VOLTAGE_SOURCE = "voltage_source"
+
+
+def resistive_conductance(resistance):
+    """
+    电阻类元件的印记函数：对同类元件的电阻数组整体求电导，无效电阻（非正数或无穷大）记为0
+    resistance 可以带前置的批量维度
+    """
+    resistance = np.asarray(resistance, dtype=float)
+    valid = (resistance > 0) & np.isfinite(resistance)
+    return np.where(valid, 1.0 / np.where(valid, resistance, 1.0), 0.0)
+
+
+class Terminal:
+    """
+    元件的一个连接点
+
+    Attributes:
+        point_type: 连接点类型 "input" / "output"
+        side: -1 画在元件左侧，1 画在右侧
+        color: 连接点颜色（Qt.GlobalColor 的名称），None 为默认颜色
+    """
+
+    __slots__ = ('point_type', 'side', 'color')
+
+    def __init__(self, point_type, side, color=None):
+        self.point_type = point_type
+        self.side = side
+        self.color = color
+
+
+# 常用的连接点布局：普通两端元件左进右出；有极性的元件正极为红色、负极为黑色
+PLAIN_TERMINALS = (Terminal("input", -1), Terminal("output", 1))
+SOURCE_TERMINALS = (Terminal("output", 1, "red"), Terminal("input", -1, "black"))  # 正极在右侧
+METER_TERMINALS = (Terminal("input", -1, "red"), Terminal("output", 1, "black"))  # 正极在左侧
+
+
+def _constant(value):
+    return lambda properties: value
+
+
+def _zero(properties):
+    return 0.0
+
+
+class ComponentModel:
+    """
+    一种元件的模型
+
+    Attributes:
+        name: 元件名称（界面和保存文件中使用）
+        type_code: 类型编码
+        terminals: Terminal 元组，顺序即 node1、node2
+        defaults: 默认属性
+        stamp: MNA 印记方式 STAMP_CONDUCTANCE / STAMP_VOLTAGE_SOURCE / STAMP_NONE
+        conductance: 印记函数，由同类元件的电阻数组整体求电导（见 resistive_conductance）
+        resistance: 由属性求电阻值(Ω)的函数
+        source_value: 由属性求电源电压(V)的函数
+        rated_voltage: 由属性求额定电压(V)的函数（非线性小灯泡）
+        storage: 由属性求储能参数的函数（电容F、电感H），瞬态和交流分析使用
+        ideal_conductor: 电阻足够小时是否作为理想导体合并两端节点
+        derive: 由其他属性更新派生属性的函数（原地修改），没有派生属性时为None
+        painter: Component 上绘制元件符号的方法名
+        value_label: 元件上方显示的属性 (属性名, 默认值, 单位)，不显示时为None
+        polarity_labels: 是否在连接点旁标出正负极
+    """
+
+    def __init__(self, name, type_code, terminals=PLAIN_TERMINALS, defaults=None,
+                 stamp=STAMP_CONDUCTANCE, conductance=resistive_conductance, resistance=_zero,
+                 source_value=_zero, rated_voltage=_zero, storage=_zero, ideal_conductor=False,
+                 derive=None, painter=None, value_label=None, polarity_labels=False):
+        self.name = name
+        self.type_code = type_code
+        self.terminals = tuple(terminals)
+        self.defaults = dict(defaults or {})
+        self.stamp = stamp
+        self.conductance = conductance
+        self.resistance = resistance
+        self.source_value = source_value
+        self.rated_voltage = rated_voltage
+        self.storage = storage
+        self.ideal_conductor = ideal_conductor
+        self.derive = derive
+        self.painter = painter
+        self.value_label = value_label
+        self.polarity_labels = polarity_labels
+
+    def __repr__(self):
+        return f"ComponentModel({self.name!r}, {self.type_code})"
+
+    @property
+    def terminal_count(self):
+        return len(self.terminals)
+
+    def default_properties(self):
+        """新建元件的属性字典（副本）"""
+        return dict(self.defaults)
+
+    def parameters(self, properties):
+        """
+        求解所需的网表参数
+
+        Returns:
+            (电阻值, 电源电压, 额定电压, 储能参数)
+        """
+        return (self.resistance(properties), self.source_value(properties),
+                self.rated_voltage(properties), self.storage(properties))
+
+
+# 未注册的元件：没有连接点，不参与求解
+UNKNOWN_MODEL = ComponentModel("", TYPE_OTHER, terminals=(), stamp=STAMP_NONE)
+
+_models = {}
+_models_by_code = {TYPE_OTHER: UNKNOWN_MODEL}
+# 按标志汇总的类型编码，注册表变化时清空
+_code_cache = {}
+
+
+def register(model):
+    """
+    注册（或替换）一种元件模型
+
+    Raises:
+        ValueError: 类型编码已被其他元件使用，或超出元件表的存储范围
+    """
+    existing = _models_by_code.get(model.type_code)
+    if existing is not None and existing.name != model.name:
+        raise ValueError(f"类型编码 {model.type_code} 已被 {existing.name or '未知元件'} 使用")
+    if not 0 < model.type_code < 128:
+        raise ValueError(f"类型编码应在 1-127 之间: {model.type_code}")
+    _models[model.name] = model
+    _models_by_code[model.type_code] = model
+    _code_cache.clear()
+    return model
+
+
+def get_model(name):
+    """元件名称对应的模型，未注册的名称返回 UNKNOWN_MODEL"""
+    return _models.get(name, UNKNOWN_MODEL)
+
+
+def model_for_code(code):
+    """类型编码对应的模型"""
+    return _models_by_code.get(int(code), UNKNOWN_MODEL)
+
+
+def models():
+    """所有已注册的模型，按注册顺序"""
+    return list(_models.values())
+
+
+def codes_where(attribute, value=True):
+    """属性 attribute 等于 value 的元件类型编码数组，如 codes_where("stamp", STAMP_VOLTAGE_SOURCE)"""
+    key = (attribute, value)
+    codes = _code_cache.get(key)
+    if codes is None:
+        codes = np.array([model.type_code for model in _models.values() if getattr(model, attribute) == value],
+                         dtype=np.int8)
+        _code_cache[key] = codes
+    return codes
+
+
+def type_groups(type_codes):
+    """
+    按类型把元件分组，求解器用于按类型整体调用印记函数
+
+    Returns:
+        [(模型, 元件下标数组), ...]，按类型编码排序
+    """
+    type_codes = np.asarray(type_codes)
+    order = np.argsort(type_codes, kind='stable')
+    codes, starts = np.unique(type_codes[order], return_index=True)
+    bounds = np.append(starts, len(order))
+    return [(model_for_code(code), order[bounds[i]:bounds[i + 1]]) for i, code in enumerate(codes)]
+
+
+def _rheostat_resistance(properties):
+    try:
+        max_resistance = float(properties.get("最大电阻值", 20.0))
+        position = float(properties.get("滑动位置", 0.5))
+        return max_resistance * max(0.0, min(1.0, position))
+    except (ValueError, TypeError):
+        return 10.0
+
+
+def _rheostat_derive(properties):
+    """滑动变阻器的当前电阻值由最大电阻值和滑片位置决定"""
+    properties["当前电阻值"] = _rheostat_resistance(properties)
+
+
+register(ComponentModel(
+    "定值电阻", TYPE_RESISTOR,
+    defaults={"电阻值": 100.0, "可调范围": "0.1-1000"},
+    resistance=lambda properties: properties.get("电阻值", 100.0),
+    painter="_paint_resistor", value_label=("电阻值", 100.0, "Ω")))
+register(ComponentModel(
+    "滑动变阻器", TYPE_RHEOSTAT,
+    # 初始电阻为最大值的一半
+    defaults={"最大电阻值": 20.0, "滑动位置": 0.5, "当前电阻值": 10.0},
+    resistance=_rheostat_resistance, derive=_rheostat_derive,
+    painter="_paint_potentiometer", value_label=("当前电阻值", 10.0, "Ω")))
+register(ComponentModel(
+    "开关", TYPE_SWITCH,
+    defaults={"状态": False},
+    # 闭合几乎无电阻，断开几乎无穷大电阻
+    resistance=lambda properties: 0.001 if properties.get("状态", False) else 1e9,
+    ideal_conductor=True, painter="_paint_switch"))
+register(ComponentModel(
+    "导线", TYPE_WIRE,
+    resistance=_constant(0.001), ideal_conductor=True, painter="_paint_wire"))
+register(ComponentModel(
+    "电源", TYPE_SOURCE, terminals=SOURCE_TERMINALS,
+    defaults={"电压值": 12.0, "可调范围": "0-24"},
+    stamp=STAMP_VOLTAGE_SOURCE, conductance=None,
+    resistance=_constant(0.001),  # 内阻很小（求解时按理想电压源处理）
+    source_value=lambda properties: properties.get("电压值", 12.0),
+    painter="_paint_power_source", value_label=("电压值", 12.0, "V")))
+register(ComponentModel(
+    "电流表", TYPE_AMMETER, terminals=METER_TERMINALS,
+    resistance=_constant(0.1), ideal_conductor=True,
+    painter="_paint_ammeter", polarity_labels=True))
+register(ComponentModel(
+    "电压表", TYPE_VOLTMETER, terminals=METER_TERMINALS,
+    resistance=_constant(1e6), painter="_paint_voltmeter", polarity_labels=True))
+register(ComponentModel(
+    "小灯泡", TYPE_BULB,
+    defaults={"电阻值": 20.0, "额定电压": 6.0, "亮度": 0.0, "亮度档位": 0, "总档位": 9},
+    resistance=lambda properties: properties.get("电阻值", 20.0),
+    rated_voltage=lambda properties: properties.get("额定电压", 6.0),
+    painter="_paint_bulb"))
+register(ComponentModel(
+    "电容", TYPE_CAPACITOR,
+    defaults={"电容值": 100.0},  # μF
+    resistance=_constant(1e9),  # 直流稳态下电容相当于断路
+    storage=lambda properties: properties.get("电容值", 100.0) * 1e-6,
+    painter="_paint_capacitor", value_label=("电容值", 100.0, "μF")))
+register(ComponentModel(
+    "电感", TYPE_INDUCTOR,
+    defaults={"电感值": 100.0},  # mH
+    resistance=_constant(0.001),  # 直流稳态下电感相当于短路
+    storage=lambda properties: properties.get("电感值", 100.0) * 1e-3,
+    painter="_paint_inductor", value_label=("电感值", 100.0, "mH")))
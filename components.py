@@ -12,6 +12,14 @@ from PyQt6.QtWidgets import (QGraphicsItem, QGraphicsEllipseItem, QGraphicsRectI
 from PyQt6.QtCore import Qt, QRectF, QPointF
 from PyQt6.QtGui import QPainter, QPen, QColor, QBrush, QPainterPath, QFont
 import numpy as np
+import circuit_solver
+import perf_stats
+import netlist
+import component_models
+import transient
+import ac_analysis
+import fault_analysis
+import equivalent_resistance
 
 # 创建logs目录
 if not os.path.exists('logs'):
@@ -178,9 +186,24 @@ class Wire(QGraphicsPathItem):
         if self.scene():
             self.scene().removeItem(self)
 
+    def _connected_circuits(self):
+        """返回导线两端组件所属的电路（去重）"""
+        circuits = []
+        for point in (self.source_point, self.target_point):
+            component = point.parentItem() if point else None
+            circuit = getattr(component, 'circuit', None)
+            if circuit is not None and circuit not in circuits:
+                circuits.append(circuit)
+        return circuits
+
     def disconnect_endpoint(self, is_start):
         """断开指定端点的连接"""
         try:
+            # 两端都已连接的导线断开一端会改变电路拓扑
+            if self.source_point and self.target_point:
+                for circuit in self._connected_circuits():
+                    circuit.on_wire_disconnected(self)
+            
             if is_start and self.source_point:
                 if self in self.source_point.connected_wires:
                     self.source_point.connected_wires.remove(self)
@@ -213,6 +236,11 @@ class Wire(QGraphicsPathItem):
                 self.target_component = connection_point.parentItem()
                 connection_point.connected_wires.append(self)
                 logger.debug(f"导线终点连接到: {connection_point.parentItem().name if connection_point.parentItem() else 'None'}")
+            
+            # 两端均已连接时，导线把两个连接点合并为同一节点
+            if self.source_point and self.target_point:
+                for circuit in self._connected_circuits():
+                    circuit.on_wire_connected(self)
         except Exception as e:
             logger.error(f"连接导线端点出错: {str(e)}", exc_info=True)
     
@@ -301,13 +329,19 @@ class ConnectionPoint(QGraphicsEllipseItem):
         self.setPen(QPen(Qt.GlobalColor.black, 1))
         self.setAcceptHoverEvents(True)
         self.connected_wires = []
+        # 是否被选为等效电路的端点（Ctrl+单击切换）
+        self.terminal_selected = False
+        
+    def set_terminal_selected(self, selected):
+        self.terminal_selected = selected
+        self.setBrush(QBrush(Qt.GlobalColor.green if selected else Qt.GlobalColor.yellow))
         
     def hoverEnterEvent(self, event):
         self.setBrush(QBrush(Qt.GlobalColor.red))
         super().hoverEnterEvent(event)
         
     def hoverLeaveEvent(self, event):
-        self.setBrush(QBrush(Qt.GlobalColor.yellow))
+        self.setBrush(QBrush(Qt.GlobalColor.green if self.terminal_selected else Qt.GlobalColor.yellow))
         super().hoverLeaveEvent(event)
 
 class Component(QGraphicsItem):
@@ -315,6 +349,7 @@ class Component(QGraphicsItem):
         super().__init__(parent)
         self.setZValue(1)
         self.name = name
+        self.record = None  # 所属电路元件表中的行句柄，由Circuit.add_component设置
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsMovable)
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable)
         self.setAcceptHoverEvents(True)
@@ -324,70 +359,31 @@ class Component(QGraphicsItem):
         self.connection_points = []
         self.setup_connection_points()
         
-        self.voltage = 0
-        self.current = 0
-        self.node1 = None
-        self.node2 = None
-        
-        # 添加属性设置
-        self.properties = {}
-        if self.name == "定值电阻":
-            self.properties["电阻值"] = 100.0  # 默认100欧姆
-            self.properties["可调范围"] = "0.1-1000"  # 可调范围提示
-        elif self.name == "滑动变阻器":
-            self.properties["最大电阻值"] = 20.0
-            self.properties["滑动位置"] = 0.5
-            self.properties["当前电阻值"] = 10.0  # 初始电阻为最大值的一半
-        elif self.name == "开关":
-            self.properties["状态"] = False
-        elif self.name == "电源":
-            self.properties["电压值"] = 12.0  # 默认12V
-            self.properties["可调范围"] = "0-24"  # 可调范围提示
-        elif self.name == "小灯泡":
-            self.properties["电阻值"] = 20.0  # 默认20欧姆
-            self.properties["额定电压"] = 6.0  # 默认6V
-            self.properties["亮度"] = 0.0  # 初始亮度为0
-            self.properties["亮度档位"] = 0  # 初始档位为0（共10档，0-9）
-            self.properties["总档位"] = 9  # 默认9档
+        self._voltage = 0
+        self._current = 0
+        self._node1 = None
+        self._node2 = None
+        self.circuit = None  # 所属电路，由Circuit.add_component设置
+        
+        # 添加属性设置（默认值由元件模型声明）
+        self.properties = self.model.default_properties()
+    
+    @property
+    def model(self):
+        """元件模型（component_models.ComponentModel），由名称决定，改名后随之改变"""
+        return component_models.get_model(self.name)
             
     def setup_connection_points(self):
-        """设置组件的连接点"""
-        if self.name in ["定值电阻", "滑动变阻器", "导线", "开关", "小灯泡"]:
-            # 左侧输入点
-            input_point = ConnectionPoint(self, "input")
-            input_point.setPos(-self.boundingRect().width() / 2 - 3, 0)
-            self.connection_points.append(input_point)
-            
-            # 右侧输出点
-            output_point = ConnectionPoint(self, "output")
-            output_point.setPos(self.boundingRect().width() / 2 + 3, 0)
-            self.connection_points.append(output_point)
-        elif self.name == "电源":
-            # 正极（右侧）
-            pos_point = ConnectionPoint(self, "output")
-            pos_point.setPos(self.boundingRect().width() / 2 + 3, 0)
-            pos_point.setBrush(QBrush(Qt.GlobalColor.red))
-            self.connection_points.append(pos_point)
-            
-            # 负极（左侧）
-            neg_point = ConnectionPoint(self, "input")
-            neg_point.setPos(-self.boundingRect().width() / 2 - 3, 0)
-            neg_point.setBrush(QBrush(Qt.GlobalColor.black))
-            self.connection_points.append(neg_point)
-            
-        elif self.name in ["电流表", "电压表"]:
-            # 左侧输入点（正极）
-            input_point = ConnectionPoint(self, "input")
-            input_point.setPos(-self.boundingRect().width() / 2 - 3, 0)
-            input_point.setBrush(QBrush(Qt.GlobalColor.red))
-            self.connection_points.append(input_point)
-            
-            # 右侧输出点（负极）
-            output_point = ConnectionPoint(self, "output")
-            output_point.setPos(self.boundingRect().width() / 2 + 3, 0)
-            output_point.setBrush(QBrush(Qt.GlobalColor.black))
-            self.connection_points.append(output_point)
-            
+        """按元件模型声明的连接点设置组件的连接点，顺序即 node1、node2"""
+        model = self.model
+        for terminal in model.terminals:
+            point = ConnectionPoint(self, terminal.point_type)
+            point.setPos(terminal.side * (self.boundingRect().width() / 2 + 3), 0)
+            if terminal.color is not None:
+                point.setBrush(QBrush(getattr(Qt.GlobalColor, terminal.color)))
+            self.connection_points.append(point)
+        
+        if model.polarity_labels:
             # 添加正负极标识
             font = QFont()
             font.setPointSize(8)
@@ -401,6 +397,75 @@ class Component(QGraphicsItem):
             neg_label.setFont(font)
             neg_label.setPos(27, -5)
         
+    # 电压、电流和节点编号在加入电路后存放于电路的元件表中
+    @property
+    def voltage(self):
+        return self._voltage if self.record is None else self.record.voltage
+    
+    @voltage.setter
+    def voltage(self, value):
+        if self.record is None:
+            self._voltage = value
+        else:
+            self.record.voltage = value
+    
+    @property
+    def current(self):
+        return self._current if self.record is None else self.record.current
+    
+    @current.setter
+    def current(self, value):
+        if self.record is None:
+            self._current = value
+        else:
+            self.record.current = value
+    
+    @property
+    def power(self):
+        """元件功率（电压与电流之积的绝对值）"""
+        if self.record is None:
+            return abs(self._voltage * self._current)
+        return self.record.power
+    
+    @property
+    def node1(self):
+        if self.record is None:
+            return self._node1
+        node = self.record.node1
+        return None if node < 0 else node
+    
+    @node1.setter
+    def node1(self, value):
+        if self.record is None:
+            self._node1 = value
+        else:
+            self.record.node1 = -1 if value is None else value
+    
+    @property
+    def node2(self):
+        if self.record is None:
+            return self._node2
+        node = self.record.node2
+        return None if node < 0 else node
+    
+    @node2.setter
+    def node2(self, value):
+        if self.record is None:
+            self._node2 = value
+        else:
+            self.record.node2 = -1 if value is None else value
+    
+    def sync_record(self):
+        """将影响求解的参数（类型、电阻、电源电压、灯泡额定电压）写入元件表，属性变化后调用"""
+        if self.record is None:
+            return
+        self.record.name = self.name
+        self.record.resistance = self.get_resistance()
+        _, self.record.source_value, self.record.rated_voltage, self.record.storage_value = \
+            self.model.parameters(self.properties)
+        if self.circuit is not None:
+            self.circuit.mark_values_changed()
+        
     def get_closest_connection_point(self, scene_pos):
         """获取最近的连接点"""
         min_dist = float('inf')
@@ -424,18 +489,9 @@ class Component(QGraphicsItem):
                 wire.update_endpoints_from_connection_points()
 
     def _update_current_resistance(self):
-        """更新滑动变阻器的当前电阻值"""
-        try:
-            if self.name == "滑动变阻器":
-                max_resistance = float(self.properties.get("最大电阻值", 20.0))
-                position = float(self.properties.get("滑动位置", 0.5))
-                # 确保位置在0-1之间
-                position = max(0.0, min(1.0, position))
-                self.properties["当前电阻值"] = max_resistance * position
-        except (ValueError, TypeError) as e:
-            print(f"更新电阻值时出错: {e}")
-            # 设置默认值
-            self.properties["当前电阻值"] = 10.0
+        """更新滑动变阻器的当前电阻值（元件模型的派生属性）"""
+        if self.model.derive is not None:
+            self.model.derive(self.properties)
 
     def _update_slider_position(self):
         """根据当前电阻值更新滑片位置"""
@@ -500,36 +556,17 @@ class Component(QGraphicsItem):
             painter.setPen(QPen(Qt.GlobalColor.black, 2))
             painter.setBrush(QBrush(Qt.GlobalColor.white))
             
-            if self.name == "开关":
-                self._paint_switch(painter)
-            elif self.name == "导线":
-                self._paint_wire(painter)
-            elif self.name == "定值电阻":
-                self._paint_resistor(painter)
-            elif self.name == "滑动变阻器":
-                self._paint_potentiometer(painter)
-            elif self.name == "电流表":
-                self._paint_ammeter(painter)
-            elif self.name == "电压表":
-                self._paint_voltmeter(painter)
-            elif self.name == "电源":
-                self._paint_power_source(painter)
-            elif self.name == "小灯泡":
-                self._paint_bulb(painter)
+            model = self.model
+            if model.painter is not None:
+                getattr(self, model.painter)(painter)
             
             # 显示属性值
-            if self.name in ["定值电阻", "滑动变阻器", "电源"]:
+            if model.value_label is not None:
+                if model.derive is not None:
+                    model.derive(self.properties)
+                property_name, default, unit = model.value_label
                 painter.setPen(QPen(Qt.GlobalColor.blue))
-                if self.name == "定值电阻":
-                    resistance = self.properties.get("电阻值", 100.0)
-                    painter.drawText(-15, -25, f"{resistance:.1f}Ω")
-                elif self.name == "电源":
-                    voltage = self.properties.get("电压值", 12.0)
-                    painter.drawText(-15, -25, f"{voltage:.1f}V")
-                else:
-                    self._update_current_resistance()
-                    current_resistance = self.properties.get("当前电阻值", 10.0)
-                    painter.drawText(-15, -25, f"{current_resistance:.1f}Ω")
+                painter.drawText(-15, -25, f"{self.properties.get(property_name, default):.1f}{unit}")
                 
             # 显示电流方向
             if self.current != 0:
@@ -590,6 +627,32 @@ class Component(QGraphicsItem):
         path.lineTo(10, 0)
         painter.drawPath(path)
         
+    def _paint_capacitor(self, painter):
+        # 获取连接点位置
+        left_x = -15
+        right_x = 15
+        
+        # 绘制两块平行极板
+        painter.drawLine(left_x, 0, -4, 0)
+        painter.drawLine(4, 0, right_x, 0)
+        painter.drawLine(-4, -10, -4, 10)
+        painter.drawLine(4, -10, 4, 10)
+        
+    def _paint_inductor(self, painter):
+        # 获取连接点位置
+        left_x = -15
+        right_x = 15
+        
+        # 绘制线圈：四个相连的半圆
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        path = QPainterPath()
+        path.moveTo(-12, 0)
+        for i in range(4):
+            path.arcTo(-12 + 6 * i, -3, 6, 6, 180, -180)
+        painter.drawPath(path)
+        painter.drawLine(left_x, 0, -12, 0)
+        painter.drawLine(12, 0, right_x, 0)
+        
     def _paint_potentiometer(self, painter):
         try:
             # 获取连接点位置
@@ -814,26 +877,11 @@ class Component(QGraphicsItem):
         return [QPointF(left_x, 0), QPointF(right_x, 0)]
         
     def get_resistance(self):
-        """获取元件电阻值"""
-        if self.name == "定值电阻":
-            return self.properties.get("电阻值", 100.0)
-        elif self.name == "滑动变阻器":
-            self._update_current_resistance()
-            return self.properties.get("当前电阻值", 10.0)
-        elif self.name == "开关":
-            return 0.001 if self.properties.get("状态", False) else 1e9  # 闭合几乎无电阻，断开几乎无穷大电阻
-        elif self.name == "导线":
-            return 0.001  # 接近零电阻
-        elif self.name == "电源":
-            return 0.001  # 内阻很小
-        elif self.name == "电流表":
-            return 0.1  # 内阻很小
-        elif self.name == "电压表":
-            return 1e6  # 内阻很大
-        elif self.name == "小灯泡":
-            return self.properties.get("电阻值", 20.0)  # 默认20欧姆
-        else:
-            return 0
+        """获取元件电阻值，先更新派生属性（如滑动变阻器的当前电阻值）"""
+        model = self.model
+        if model.derive is not None:
+            model.derive(self.properties)
+        return model.resistance(self.properties)
         
     def set_property(self, name, value):
         try:
@@ -845,7 +893,7 @@ class Component(QGraphicsItem):
                 if self.name == "滑动变阻器":
                     # 获取主窗口对象
                     main_window = None
-                    for view in self.scene().views():
+                    for view in (self.scene().views() if self.scene() else []):
                         if hasattr(view, 'parent') and view.parent():
                             if hasattr(view.parent(), 'simulation_settings'):
                                 main_window = view.parent()
@@ -898,6 +946,7 @@ class Component(QGraphicsItem):
                     self.properties[name] = value
                     
                 # 更新显示
+                self.sync_record()
                 self.update()
                 
                 # 如果属性值实际发生变化，触发电路重新计算
@@ -921,6 +970,7 @@ class Component(QGraphicsItem):
                 old_state = self.properties["状态"]
                 self.properties["状态"] = not old_state
                 logger.debug(f"开关状态改变: {self.properties['状态']}")
+                self.sync_record()
                 self.update()  # 重绘开关
                 
                 # 如果状态改变且电路仿真正在进行，触发电路重新计算
@@ -965,6 +1015,10 @@ class Component(QGraphicsItem):
                                           text=self.name)
         if ok and new_name:
             self.name = new_name
+            self.sync_record()
+            # 名称决定元件类型，改名后电路需要重新建立方程组结构
+            if self.circuit is not None:
+                self.circuit.mark_topology_changed()
             self.update()
 
     def edit_properties(self):
@@ -990,6 +1044,10 @@ class Component(QGraphicsItem):
                         widget.setSuffix(" Ω")
                     elif "电压" in prop_name:
                         widget.setSuffix(" V")
+                    elif "电容" in prop_name:
+                        widget.setSuffix(" μF")
+                    elif "电感" in prop_name:
+                        widget.setSuffix(" mH")
                     property_widgets[prop_name] = widget
                     layout.addRow(f"{prop_name}:", widget)
         
@@ -1035,19 +1093,118 @@ class Component(QGraphicsItem):
                 for wire in point.connected_wires[:]:  # 使用副本进行迭代
                     wire.delete_wire()  # 使用wire的删除方法
             
+            # 从电路中移除组件
+            if self.circuit is not None:
+                self.circuit.remove_component(self)
+            
             # 从场景中移除组件
             if self.scene():
                 self.scene().removeItem(self)
 
 class Circuit:
+    # 所有电路共享的求解结果缓存：相同的电路（与元件顺序、位置无关）不再重复求解
+    solution_cache = netlist.SolutionCache()
+    
     def __init__(self):
         self.components = []
         self.connections = []
         self.nodes = {}  # 存储节点信息
         self.voltage_sources = []  # 存储电压源
         
+        # 拓扑版本号：组件增删或导线连接关系变化时递增
+        self.topology_version = 0
+        # 参数版本号：元件属性（电阻、电源电压、开关状态等）变化时递增
+        self.value_version = 0
+        # 最近一次成功写回求解结果时的(拓扑版本, 参数版本)
+        self.solved_version = None
+        # 最近一次发起求解（同步计算或提交后台）时的版本，求解失败时电路不变就不再重试
+        self.submitted_version = None
+        # 连接点并查集，导线连接时增量合并，断开时标记为需要重建
+        self._node_sets = circuit_solver.DisjointSet()
+        self._node_sets_stale = True
+        # identify_nodes / assign_node_ids 的缓存
+        self._nodes_cache = None
+        self._nodes_cache_key = None
+        self._assigned_nodes = None
+        self._point_to_node = {}
+        # 等效电阻网络及其对应的电路版本
+        self._resistance_network = None
+        # 戴维南等效的缓存：(电路版本, {(节点a, 节点b): 结果})
+        self._thevenin_cache = (None, {})
+        # 元件表：类型、节点、电阻、电源电压及求解结果的结构数组，行顺序与components一致
+        self.table = netlist.ComponentTable()
+        # 与Qt无关的网表求解器，缓存MNA符号结构与LU分解
+        self.solver = netlist.NetlistSolver(cache=Circuit.solution_cache)
+        self._netlist = None
+        # 最近一次求解的只读结果（NetlistSolution）
+        self.solution = None
+        # 分阶段计时，默认关闭
+        self.timings = perf_stats.PhaseTimer()
+        self.solver.timer = self.timings
+        
     def add_component(self, component):
+        # 节点编号等先取出，加入元件表后由表保存
+        voltage, current = component.voltage, component.current
         self.components.append(component)
+        component.circuit = self
+        component.record = self.table.add(component.name)
+        component.voltage, component.current = voltage, current
+        component.sync_record()
+        self.topology_version += 1
+        self.solution = None
+        
+    def remove_component(self, component):
+        if component in self.components:
+            self.components.remove(component)
+        if component.circuit is self:
+            component.circuit = None
+        if component.record is not None and component.record.table is self.table:
+            # 离开电路后读数保存在组件自身
+            record = component.record
+            voltage, current = record.voltage, record.current
+            self.table.remove(record)
+            component.record = None
+            component.voltage, component.current = voltage, current
+            component.node1 = component.node2 = None
+        self._node_sets_stale = True
+        self.topology_version += 1
+        self.solution = None
+        
+    def refresh_component_values(self):
+        """绕过set_property直接修改了组件属性后，调用此方法将所有组件参数重新写入元件表"""
+        for component in self.components:
+            component.sync_record()
+        
+    def state_version(self):
+        """返回电路当前的(拓扑版本, 参数版本)"""
+        return (self.topology_version, self.value_version)
+        
+    def needs_solve(self):
+        """元件读数是否与电路当前状态不符（自上次成功写回结果以来电路有变化，或求解失败）"""
+        return self.solved_version != self.state_version()
+        
+    def solve_pending(self):
+        """当前版本是否已发起过求解：后台求解尚未返回或已经失败时不再重复提交"""
+        return self.submitted_version == self.state_version()
+        
+    def mark_values_changed(self):
+        """元件参数变化：下次仿真刷新时需要重新求解"""
+        self.value_version += 1
+        
+    def mark_topology_changed(self):
+        """元件类型等影响方程组结构的变化：使节点与方程组缓存失效"""
+        self.topology_version += 1
+        
+    def on_wire_connected(self, wire):
+        """导线两端连接完成：增量合并两个连接点所在的节点"""
+        if not self._node_sets_stale:
+            self._node_sets.union(wire.source_point, wire.target_point)
+        self.topology_version += 1
+        
+    def on_wire_disconnected(self, wire):
+        """导线断开：并查集无法拆分集合，下次识别节点时重建"""
+        self._node_sets_stale = True
+        self.topology_version += 1
         
     def add_connection(self, from_comp, to_comp):
         self.connections.append((from_comp, to_comp))
@@ -1056,85 +1213,137 @@ class Circuit:
         """
         使用改进节点分析法(MNA)对电路进行分析
         """
+        version = self.state_version()
+        self.submitted_version = version
+        timings = self.timings
+        start = t = timings.clock()
+        
         # 第1步：识别电路中的节点
         nodes = self.identify_nodes()
         if not nodes:
             logging.error("电路节点识别失败，可能是电路不完整")
+            self.discard_solution()
             return False
+        t = timings.lap('identify_nodes', t)
         
         # 第2步：分配节点ID给组件
         self.assign_node_ids(nodes)
+        timings.lap('assign_node_ids', t)
         
-        # 第3步：构建MNA方程组 Ax = z
-        A, z, var_index_map = self.build_mna_matrices()
-        if A is None:
-            logging.error("构建方程组失败")
-            return False
+        # 第3步：编译为与Qt无关的网表
+        circuit_netlist = self.compile_netlist()
         
-        # 第4步：求解方程组
+        # 第4步：在网表上构建并求解MNA方程组 Ax = z
         try:
-            x = np.linalg.solve(A, z)
+            solution = self.solver.solve(circuit_netlist)
+            if solution is None:
+                logging.error("构建方程组失败")
+                self.discard_solution()
+                return False
             # 更新组件的电压和电流
-            self.update_component_values(x, var_index_map)
+            t = timings.clock()
+            self.update_component_values(solution)
+            self.solved_version = version
+            timings.lap('update_component_values', t)
+            timings.lap('total', start)
             return True
         except np.linalg.LinAlgError as e:
             logging.error(f"电路方程组求解失败: {e}")
+            self.discard_solution()
+            return False
+        
+    def snapshot_netlist(self):
+        """
+        为后台求解准备网表快照：识别节点、分配节点编号并复制网表
+        返回: (网表副本, 对应的电路版本)，电路不完整时网表为None
+        """
+        version = self.state_version()
+        self.submitted_version = version
+        t = self.timings.clock()
+        nodes = self.identify_nodes()
+        if not nodes:
+            logging.error("电路节点识别失败，可能是电路不完整")
+            self.discard_solution()
+            return None, version
+        t = self.timings.lap('identify_nodes', t)
+        self.assign_node_ids(nodes)
+        self.timings.lap('assign_node_ids', t)
+        return self.compile_netlist().copy(), version
+        
+    def apply_solution(self, solution, version):
+        """
+        写回后台求解的结果；快照之后拓扑已变化（元件表行可能已移动）时丢弃结果
+        返回: 是否已写回
+        """
+        if version[0] != self.topology_version:
             return False
+        t = self.timings.clock()
+        self.update_component_values(solution)
+        self.solved_version = version
+        self.timings.lap('update_component_values', t)
+        return True
+        
+    def discard_solution(self):
+        """
+        求解失败：清零元件读数，不再显示与当前电路不符的旧结果
+        needs_solve() 保持为True，电路再次变化后重新求解
+        """
+        self.solution = None
+        n = self.table.size
+        self.table.voltage[:n] = 0.0
+        self.table.current[:n] = 0.0
+        self.table.power[:n] = 0.0
         
     def identify_nodes(self):
         """
-        使用BFS算法识别电路中的节点
-        节点定义为一组相互连接的连接点
+        使用并查集识别电路中的节点
+        节点定义为一组相互连接的连接点，拓扑未变化时直接返回缓存结果
         返回: 字典 {节点ID: 连接点列表}
         """
-        # 获取所有连接点
-        all_connection_points = []
-        for component in self.components:
-            all_connection_points.extend(component.connection_points)
+        cache_key = (self.topology_version, len(self.components))
+        if self._nodes_cache is not None and self._nodes_cache_key == cache_key:
+            return self._nodes_cache
         
-        # 使用BFS查找连接的节点
-        nodes = {}  # {node_id: [connection_points]}
-        node_id = 0
-        visited = set()
-        
-        for start_point in all_connection_points:
-            if start_point in visited:
-                continue
-            
-            # 开始BFS
-            node_points = []
-            queue = [start_point]
-            while queue:
-                current_point = queue.pop(0)
-                if current_point in visited:
-                    continue
-                
-                visited.add(current_point)
-                node_points.append(current_point)
-                
-                # 查找所有连接的导线
-                for wire in current_point.connected_wires:
-                    # 获取导线另一端的连接点
-                    next_point = None
-                    if wire.source_point == current_point and wire.target_point:
-                        next_point = wire.target_point
-                    elif wire.target_point == current_point and wire.source_point:
-                        next_point = wire.source_point
-                    
-                    if next_point and next_point not in visited:
-                        queue.append(next_point)
+        if self._node_sets_stale:
+            self._rebuild_node_sets()
         
-            # 创建新节点
-            if node_points:
-                nodes[node_id] = node_points
-                node_id += 1
+        # 按组件顺序遍历连接点，首次出现的集合分配新的节点ID
+        nodes = {}  # {node_id: [connection_points]}
+        root_to_node = {}
+        find = self._node_sets.find
+        for component in self.components:
+            for point in component.connection_points:
+                root = find(point)
+                node_id = root_to_node.get(root)
+                if node_id is None:
+                    node_id = len(root_to_node)
+                    root_to_node[root] = node_id
+                    nodes[node_id] = []
+                nodes[node_id].append(point)
         
         # 默认第0个节点为参考节点(地)
         logging.debug(f"识别到 {len(nodes)} 个节点")
+        self._nodes_cache = nodes
+        self._nodes_cache_key = cache_key
         return nodes
+    
+    def _rebuild_node_sets(self):
+        """根据当前所有导线重建连接点并查集"""
+        node_sets = circuit_solver.DisjointSet()
+        for component in self.components:
+            for point in component.connection_points:
+                node_sets.add(point)
+                for wire in point.connected_wires:
+                    if wire.source_point and wire.target_point:
+                        node_sets.union(wire.source_point, wire.target_point)
+        self._node_sets = node_sets
+        self._node_sets_stale = False
 
     def assign_node_ids(self, nodes):
-        """为每个组件分配节点ID"""
+        """为每个组件分配节点ID，节点划分与上次相同时跳过"""
+        if nodes is self._assigned_nodes:
+            return True
+        
         # 清除先前的节点分配
         for component in self.components:
             component.node1 = None
@@ -1145,6 +1354,7 @@ class Circuit:
         for node_id, points in nodes.items():
             for point in points:
                 point_to_node[point] = node_id
+        self._point_to_node = point_to_node
         
         # 为每个组件分配节点
         for component in self.components:
@@ -1153,154 +1363,270 @@ class Circuit:
                 component.node2 = point_to_node.get(component.connection_points[1])
                 logging.debug(f"组件 {component.name} 分配节点: {component.node1}, {component.node2}")
         
+        self._assigned_nodes = nodes
         return True
 
-    def build_mna_matrices(self):
+    def compile_netlist(self):
+        """
+        获取组件的网表（需先调用assign_node_ids），组件顺序与self.components一致
+        网表直接引用元件表中的数组，不逐个访问组件
+        返回: netlist.Netlist
+        """
+        self._netlist = self.table.netlist()
+        return self._netlist
+    
+    def build_mna_matrices(self, sparse=None):
         """
         构建改进节点分析(MNA)的矩阵
+        按规模组装为稠密矩阵或稀疏矩阵
+        sparse: True/False 强制指定，None 表示按矩阵规模自动选择
         返回: A矩阵, z向量, 变量索引映射
         """
-        # 计算节点数和电压源数量
-        nodes = set()
-        voltage_sources = []
-        
-        for component in self.components:
-            if component.node1 is not None:
-                nodes.add(component.node1)
-            if component.node2 is not None:
-                nodes.add(component.node2)
-            
-            # 识别电压源
-            if component.name == "电源":
-                voltage_sources.append(component)
-        
-        num_nodes = len(nodes)
-        num_voltage_sources = len(voltage_sources)
-        
-        # MNA矩阵大小: [节点数-1 + 电压源数]
-        # 节点0作为参考节点(地)，不包含在方程中
-        n = num_nodes - 1 + num_voltage_sources
-        if n <= 0:
+        A, z, structure = self.solver.build_system(self.compile_netlist(), sparse)
+        if structure is None:
             return None, None, None
         
-        # 创建MNA矩阵
-        A = np.zeros((n, n), dtype=float)
-        z = np.zeros(n, dtype=float)
-        
-        # 创建变量索引映射
+        # 变量索引映射
         var_index_map = {
-            'node_voltages': {}, # 节点电压索引
-            'branch_currents': {} # 支路电流索引
+            'node_voltages': {int(node): int(idx) for node, idx in enumerate(structure.node_index) if idx >= 0},
+            'branch_currents': {id(self.components[k]): structure.num_node_vars + j
+                                for j, k in enumerate(structure.source_index)}
         }
+        return A, z, var_index_map
+    
+    def transient_simulator(self, step, method=transient.TRAPEZOIDAL, adaptive=False, initial="zero"):
+        """
+        以当前电路创建瞬态仿真（不运行），返回的仿真对象与组件脱离，可以在其他线程中运行
+        参数见 transient.TransientSimulator；电路节点识别失败时返回None
+        """
+        nodes = self.identify_nodes()
+        if not nodes:
+            logging.error("电路节点识别失败，可能是电路不完整")
+            return None
+        self.assign_node_ids(nodes)
+        return transient.TransientSimulator(self.compile_netlist(), step, method, adaptive, initial)
+    
+    def ac_sweep(self, frequencies, source_phasors=None):
+        """
+        以当前电路做交流频率扫描，参数见 ac_analysis.ac_sweep
+        返回 ACResult，其中的元件顺序与 self.components 一致；电路无法求解时返回None
+        """
+        nodes = self.identify_nodes()
+        if not nodes:
+            logging.error("电路节点识别失败，可能是电路不完整")
+            return None
+        self.assign_node_ids(nodes)
+        try:
+            return ac_analysis.ac_sweep(self.compile_netlist(), frequencies, source_phasors)
+        except (ValueError, np.linalg.LinAlgError) as e:
+            logging.error(f"交流分析失败: {e}")
+            return None
+    
+    # 灵敏度分析中可调的组件属性，及属性对应的网表参数："resistance" 电阻、"source" 电源电压
+    SENSITIVITY_PROPERTIES = {
+        "定值电阻": ("电阻值", "resistance"),
+        "小灯泡": ("电阻值", "resistance"),
+        "滑动变阻器": ("滑动位置", "resistance"),
+        "电源": ("电压值", "source"),
+    }
+    
+    def sensitivity(self, meter, quantity=None):
+        """
+        伴随灵敏度：meter 的读数对电路中各可调参数的导数，复用直流求解的LU分解，
+        所有参数只需一次转置回代（见 NetlistSolver.sensitivity）
+        返回: (读数, {组件: (属性名, 属性值, 读数对该属性的导数)})，只包含 SENSITIVITY_PROPERTIES 中的组件；
+        电路无法求解时返回None
+        """
+        nodes = self.identify_nodes()
+        if not nodes:
+            logging.error("电路节点识别失败，可能是电路不完整")
+            return None
+        self.assign_node_ids(nodes)
+        try:
+            reading, d_resistance, d_source = self.solver.sensitivity(
+                self.compile_netlist(), meter.record.row, quantity)
+        except np.linalg.LinAlgError as e:
+            logging.error(f"灵敏度分析失败: {e}")
+            return None
         
-        # 为非参考节点分配索引
-        node_index = 0
-        for node in sorted(nodes):
-            if node != 0:  # 跳过参考节点
-                var_index_map['node_voltages'][node] = node_index
-                node_index += 1
-        
-        # 为电压源分配索引
-        for i, vsource in enumerate(voltage_sources):
-            var_index_map['branch_currents'][id(vsource)] = num_nodes - 1 + i
-        
-        # 填充导纳矩阵(G子矩阵)
-        for component in self.components:
-            if component.node1 is None or component.node2 is None:
-                continue
-            
-            # 跳过电压源
-            if component.name == "电源":
+        derivatives = {}
+        for k, component in enumerate(self.components):
+            if component.name not in self.SENSITIVITY_PROPERTIES:
                 continue
-            
-            # 获取组件的电阻
-            r = component.get_resistance()
-            if r <= 0 or r == float('inf'):
-                continue
-            
-            g = 1.0 / r  # 导纳 = 1/电阻
-            
-            # 获取组件连接的节点索引
-            node1 = component.node1
-            node2 = component.node2
-            
-            # 如果节点是参考节点(0)，则忽略
-            if node1 != 0 and node2 != 0:
-                idx1 = var_index_map['node_voltages'][node1]
-                idx2 = var_index_map['node_voltages'][node2]
-                
-                # 填充导纳矩阵
-                A[idx1, idx1] += g
-                A[idx2, idx2] += g
-                A[idx1, idx2] -= g
-                A[idx2, idx1] -= g
-            elif node1 != 0:
-                idx1 = var_index_map['node_voltages'][node1]
-                A[idx1, idx1] += g
-            elif node2 != 0:
-                idx2 = var_index_map['node_voltages'][node2]
-                A[idx2, idx2] += g
-        
-        # 处理电压源
-        for i, vsource in enumerate(voltage_sources):
-            # 电压源电流变量索引
-            idx_i = var_index_map['branch_currents'][id(vsource)]
-            
-            # 电压源节点
-            node1 = vsource.node1
-            node2 = vsource.node2
-            
-            # 电压源方程: v1 - v2 = V
-            if node1 != 0:
-                idx1 = var_index_map['node_voltages'][node1]
-                A[idx_i, idx1] = 1
-                A[idx1, idx_i] = 1
-            
-            if node2 != 0:
-                idx2 = var_index_map['node_voltages'][node2]
-                A[idx_i, idx2] = -1
-                A[idx2, idx_i] = -1
-            
-            # 电压值
-            z[idx_i] = vsource.properties.get("电压值", 12.0)
+            property_name, parameter = self.SENSITIVITY_PROPERTIES[component.name]
+            value = float(component.properties.get(property_name, 0.0))
+            if parameter == "source":
+                derivative = d_source[k]
+            elif component.name == "滑动变阻器":
+                # R = 最大电阻值 · 滑动位置
+                derivative = d_resistance[k] * float(component.properties.get("最大电阻值", 20.0))
+            else:
+                derivative = d_resistance[k]
+            derivatives[component] = (property_name, value, float(derivative))
+        return float(reading), derivatives
+    
+    def series_parallel_derivation(self, labels=None):
+        """
+        单电源串并联电路的化简推导（见 series_parallel），供提示系统逐步展示
+        labels: {组件: 名称}，默认用组件名称
+        返回: 推导步骤的字符串列表；电路不完整或无法按串并联化简（桥式连接、多个电源等）时返回None
+        """
+        nodes = self.identify_nodes()
+        if not nodes:
+            return None
+        self.assign_node_ids(nodes)
+        reduction = self.solver.series_parallel(self.compile_netlist())
+        if reduction is None:
+            return None
+        labels = labels or {}
+        return reduction.describe([labels.get(component, component.name) for component in self.components])
+    
+    def diagnose_faults(self, observed, limit=5):
+        """
+        故障注入诊断：逐个假设单个元件断路或短路，按预测读数与观测读数的吻合程度排序（见 fault_analysis.fault_scan）
+        observed: {组件: 观测读数的大小}，电流表和小灯泡为电流，其余为电压
+        返回: ([(组件, 故障类型, {组件: 预测读数}, 误差), ...] 最多limit个, 无故障时的误差)；电路无法求解时返回None
+        """
+        nodes = self.identify_nodes()
+        if not nodes:
+            logging.error("电路节点识别失败，可能是电路不完整")
+            return None
+        self.assign_node_ids(nodes)
+        components = list(observed)
+        try:
+            faults, baseline = fault_analysis.fault_scan(
+                self.compile_netlist(), [c.record.row for c in components], [observed[c] for c in components])
+        except np.linalg.LinAlgError as e:
+            logging.error(f"故障诊断失败: {e}")
+            return None
         
-        return A, z, var_index_map
-
-    def update_component_values(self, x, var_index_map):
-        """根据求解结果更新组件的电压和电流值"""
-        # 更新节点电压
-        node_voltages = {}
-        node_voltages[0] = 0.0  # 参考节点电压为0
+        ranked = [(self.components[fault.element], fault.kind, dict(zip(components, fault.readings)), fault.error)
+                  for fault in faults[:limit]]
+        return ranked, baseline.error
+    
+    def node_of(self, point):
+        """连接点所在的节点编号，电路不完整或连接点不属于电路时返回None"""
+        nodes = self.identify_nodes()
+        if not nodes:
+            return None
+        self.assign_node_ids(nodes)
+        return self._point_to_node.get(point)
+    
+    def resistance_network(self):
+        """
+        当前电路的等效电阻网络（equivalent_resistance.EquivalentResistance），
+        按 (拓扑版本, 参数版本) 缓存，电路不变时的查询不再重新分解；电路不完整时返回None
+        """
+        version = self.state_version()
+        if self._resistance_network is None or self._resistance_network[0] != version:
+            nodes = self.identify_nodes()
+            if not nodes:
+                return None
+            self.assign_node_ids(nodes)
+            network = equivalent_resistance.EquivalentResistance(self.compile_netlist())
+            self._resistance_network = (version, network)
+        return self._resistance_network[1]
+    
+    def equivalent_resistance(self, point_a, point_b):
+        """
+        两个连接点之间的等效电阻(Ω)，电源按短路处理，两点不连通时为inf
+        返回None表示电路不完整或连接点不属于电路
+        """
+        network = self.resistance_network()
+        node_a, node_b = self.node_of(point_a), self.node_of(point_b)
+        if network is None or node_a is None or node_b is None:
+            return None
+        return network.resistance(node_a, node_b)
+    
+    def thevenin(self, point_a, point_b):
+        """
+        从两个连接点看进去的戴维南/诺顿等效电路，复用直流求解的分解，至多一次求解加一次回代
+        （见 NetlistSolver.thevenin）；不含电源的无源网络开路电压为0、等效电阻即两点间的等效电阻
+        结果按 (拓扑版本, 参数版本) 缓存，电路变化后重新计算
+        返回: 字典 {'voltage': 开路电压(V), 'resistance': 等效电阻(Ω), 'current': 短路电流(A)}，
+              a 端为正；电路不完整、连接点不属于电路或两点不连通时返回None
+        """
+        node_a, node_b = self.node_of(point_a), self.node_of(point_b)
+        if node_a is None or node_b is None:
+            return None
+        version = self.state_version()
+        if self._thevenin_cache[0] != version:
+            self._thevenin_cache = (version, {})
+        cache = self._thevenin_cache[1]
+        if (node_a, node_b) in cache:
+            return cache[(node_a, node_b)]
         
-        for node, idx in var_index_map['node_voltages'].items():
-            node_voltages[node] = x[idx]
+        try:
+            voltage, resistance = self.solver.thevenin(self.compile_netlist(), node_a, node_b)
+        except (ValueError, np.linalg.LinAlgError) as e:
+            # 两点所在的部分没有电源：按无源网络处理
+            network = self.resistance_network()
+            resistance = network.resistance(node_a, node_b) if network is not None else np.inf
+            if not np.isfinite(resistance):
+                logging.error(f"戴维南等效计算失败: {e}")
+                return None
+            voltage = 0.0
+        current = voltage / resistance if resistance > 0 else (np.inf if voltage else 0.0)
+        result = {'voltage': voltage, 'resistance': resistance, 'current': current}
+        cache[(node_a, node_b)] = result
+        return result
+    
+    def sweep(self, component, property_name, values):
+        """
+        参数扫描：依次将component的property_name设为values中的各个值，一次性求出所有仪表读数
+        电源电压扫描为多右端项回代，电阻类参数扫描为批量求解，组件属性在扫描后恢复原值
+        返回: 字典 {仪表组件: 读数数组}，电流表为电流、电压表为电压；电路无法求解时返回None
+        """
+        values = list(values)
+        nodes = self.identify_nodes()
+        if not nodes:
+            logging.error("电路节点识别失败，可能是电路不完整")
+            return None
+        self.assign_node_ids(nodes)
+        circuit_netlist = self.compile_netlist()
+        index = component.record.row
         
-        # 更新组件电压和电流
-        for component in self.components:
-            if component.node1 is None or component.node2 is None:
-                continue
-            
-            # 计算端点电压
-            v1 = node_voltages.get(component.node1, 0.0)
-            v2 = node_voltages.get(component.node2, 0.0)
-            
-            # 组件电压
-            component.voltage = abs(v1 - v2)
-            
-            # 计算电流
+        saved_properties = dict(component.properties)
+        try:
             if component.name == "电源":
-                # 电源电流从支路电流变量获取
-                if id(component) in var_index_map['branch_currents']:
-                    idx = var_index_map['branch_currents'][id(component)]
-                    component.current = x[idx]
+                # 电源电压只影响右端项
+                voltages = values if property_name == "电压值" else [circuit_netlist.source_value[index]] * len(values)
+                voltage, current = self.solver.sweep_source(circuit_netlist, index, voltages)
             else:
-                # 其他元件的电流通过电压和电阻计算
-                r = component.get_resistance()
-                if r != float('inf') and r > 0:
-                    component.current = component.voltage / r
-                    # 确定电流方向
-                    if v1 > v2:
-                        component.current *= -1  # 从高电位流向低电位
+                # 电阻类参数：先按组件规则换算出每个取值下的电阻，再批量求解
+                resistances = []
+                for value in values:
+                    component.properties[property_name] = value
+                    if component.name == "滑动变阻器" and property_name == "当前电阻值":
+                        component._update_slider_position()
+                    resistances.append(component.get_resistance())
+                voltage, current = self.solver.sweep_resistance(circuit_netlist, index, resistances)
+        except np.linalg.LinAlgError as e:
+            logging.error(f"参数扫描求解失败: {e}")
+            return None
+        finally:
+            component.properties.clear()
+            component.properties.update(saved_properties)
+        
+        readings = {}
+        for k, meter in enumerate(self.components):
+            if meter.name == "电流表":
+                readings[meter] = current[:, k]
+            elif meter.name == "电压表":
+                readings[meter] = voltage[:, k]
+        return readings
+
+    def update_component_values(self, solution):
+        """
+        根据网表求解结果更新元件表中的电压、电流和功率
+        整列写入，不逐个调用组件方法；组件读取读数时再从表中取值
+        """
+        self.solution = solution
+        n = self.table.size
+        connected = solution.connected
+        self.table.voltage[:n][connected] = solution.voltage[connected]
+        self.table.current[:n][connected] = solution.current[connected]
+        self.table.power[:n][connected] = solution.power[connected]
 
     def to_dict(self, scene=None):
         # 组件字典
@@ -1367,8 +1693,7 @@ class Circuit:
             components.append(component)
             if scene:  # 如果提供了场景，则将组件添加到场景
                 scene.addItem(component)
-        
-        circuit.components = components
+            circuit.add_component(component)
         
         # 如果存在导线信息，创建导线
         if "wires" in data and scene:
@@ -0,0 +1,164 @@
+"""
+任意两节点间的等效电阻
+
+电源置零（电压源相当于短路），其余两端元件以电导为权构成图，等效电阻
+    R(a, b) = (e_a - e_b)ᵀ L⁺ (e_a - e_b)
+L 为加权拉普拉斯矩阵。每个连通分量去掉一个节点（接地）后的拉普拉斯矩阵对称正定，只分解一次：
+小规模电路直接求出接地拉普拉斯矩阵的逆 X，所有节点对的等效电阻 R = X_aa + X_bb - 2·X_ab
+一次向量化算出，之后每次查询 O(1)；大规模电路按需查询，每个节点对一次回代，结果缓存。
+理想导体（导线、闭合的开关、电流表）和电源两端的节点先合并，
+电阻不小于 OPEN_CIRCUIT_RESISTANCE 的元件（断开的开关、直流下的电容）视为断路。
+"""
+import logging
+
+import numpy as np
+import scipy.sparse as sp
+
+import circuit_solver
+from netlist import IDEAL_CONDUCTOR_RESISTANCE, is_voltage_source, is_ideal_conductor_type
+
+logger = logging.getLogger('CircuitSimulator')
+
+# 合并后的节点数不超过该值时预先计算所有节点对的等效电阻
+ALL_PAIRS_LIMIT = 200
+# 电阻不小于该值的元件视为断路
+OPEN_CIRCUIT_RESISTANCE = 1e9
+
+
+class EquivalentResistance:
+    """
+    网表中任意两节点间的等效电阻
+
+    用法:
+        network = EquivalentResistance(circuit_netlist)
+        network.resistance(a, b)   # 节点a、b之间的等效电阻(Ω)，不连通时为inf
+        network.matrix()           # 所有节点对的等效电阻矩阵
+    """
+
+    def __init__(self, netlist, all_pairs=None):
+        """
+        Args:
+            netlist: 电路网表（只在构造时读取）
+            all_pairs: 是否预先计算所有节点对，None 按合并后的节点数与 ALL_PAIRS_LIMIT 比较决定
+        """
+        node1, node2 = netlist.node1, netlist.node2
+        r = netlist.resistance
+        connected = (node1 >= 0) & (node2 >= 0) & (node1 != node2)
+        shorted = connected & (is_voltage_source(netlist.type_codes)
+                               | (is_ideal_conductor_type(netlist.type_codes) & (r <= IDEAL_CONDUCTOR_RESISTANCE)))
+        resistive = np.flatnonzero(connected & ~shorted & (r > 0) & (r < OPEN_CIRCUIT_RESISTANCE))
+
+        self.num_nodes = netlist.num_nodes
+        self.labels = circuit_solver.connected_labels(self.num_nodes, node1[shorted], node2[shorted])
+        num_merged = int(self.labels.max()) + 1 if self.num_nodes else 0
+        a = self.labels[node1[resistive]]
+        b = self.labels[node2[resistive]]
+        g = 1.0 / r[resistive]
+        loop = a == b
+        a, b, g = a[~loop], b[~loop], g[~loop]
+
+        # 每个连通分量中编号最小的节点接地，其余节点对应接地拉普拉斯矩阵的行列
+        self.component = circuit_solver.connected_labels(num_merged, a, b)
+        ground = np.zeros(num_merged, dtype=bool)
+        ground[np.unique(self.component, return_index=True)[1]] = True
+        self.index = np.full(num_merged, -1, dtype=np.int64)
+        self.index[~ground] = np.arange(int((~ground).sum()))
+        m = int((~ground).sum())
+
+        ia, ib = self.index[a], self.index[b]
+        rows = np.concatenate([ia, ib, ia, ib])
+        cols = np.concatenate([ia, ib, ib, ia])
+        vals = np.concatenate([g, g, -g, -g])
+        keep = (rows >= 0) & (cols >= 0)
+        laplacian = sp.coo_matrix((vals[keep], (rows[keep], cols[keep])), shape=(m, m)).tocsc()
+        if not circuit_solver.use_sparse(m):
+            laplacian = laplacian.toarray()
+        self.factorization = circuit_solver.LUFactorization(laplacian) if m else None
+        self._cache = {}
+
+        self._merged_matrix = None
+        if all_pairs is None:
+            all_pairs = num_merged <= ALL_PAIRS_LIMIT
+        if all_pairs:
+            self._merged_matrix = self._all_pairs()
+        logger.debug(f"等效电阻: {num_merged} 个合并节点, {len(g)} 个电阻, 全部节点对: {bool(all_pairs)}")
+
+    def _all_pairs(self):
+        """合并节点之间的等效电阻矩阵：R = X_aa + X_bb - 2·X_ab，X 为接地拉普拉斯矩阵的逆"""
+        num_merged = len(self.component)
+        grounded = self.index >= 0
+        # 接地节点的电位恒为0，补零后 X 覆盖所有合并节点
+        X = np.zeros((num_merged, num_merged))
+        if self.factorization is not None:
+            m = self.factorization.n
+            X[np.ix_(grounded, grounded)] = self.factorization.solve(np.eye(m)).reshape(m, m)
+        d = np.diag(X)
+        R = d[:, None] + d[None, :] - 2 * X
+        R[self.component[:, None] != self.component[None, :]] = np.inf
+        np.fill_diagonal(R, 0.0)
+        return R
+
+    def resistance(self, node_a, node_b):
+        """
+        节点 node_a、node_b（网表中的节点编号）之间的等效电阻(Ω)，两节点不连通时返回inf
+
+        Raises:
+            ValueError: 节点编号无效
+        """
+        if not (0 <= node_a < self.num_nodes and 0 <= node_b < self.num_nodes):
+            raise ValueError(f"无效的节点编号: {node_a}, {node_b}")
+        a, b = int(self.labels[node_a]), int(self.labels[node_b])
+        if a == b:
+            return 0.0
+        if self._merged_matrix is not None:
+            return float(self._merged_matrix[a, b])
+        if self.component[a] != self.component[b]:
+            return np.inf
+        key = (min(a, b), max(a, b))
+        value = self._cache.get(key)
+        if value is None:
+            value = float(self.resistances([(a, b)], merged=True)[0])
+            self._cache[key] = value
+        return value
+
+    def resistances(self, pairs, merged=False):
+        """
+        成批查询多个节点对的等效电阻，按需模式下所有节点对只做一次多右端项回代
+
+        Args:
+            pairs: [(a, b), ...] 节点编号对
+            merged: pairs 是否已经是合并后的节点编号
+
+        Returns:
+            长度为节点对数的数组
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        a, b = pairs[:, 0], pairs[:, 1]
+        if not merged:
+            a, b = self.labels[a], self.labels[b]
+        if self._merged_matrix is not None:
+            return self._merged_matrix[a, b]
+
+        result = np.where(self.component[a] == self.component[b], 0.0, np.inf)
+        solve = np.flatnonzero((a != b) & (self.component[a] == self.component[b]))
+        if len(solve) and self.factorization is not None:
+            m = self.factorization.n
+            ia, ib = self.index[a[solve]], self.index[b[solve]]
+            columns = np.arange(len(solve))
+            # 从 a 注入 1A、从 b 流出，两点电位差即等效电阻
+            rhs = np.zeros((m, len(solve)))
+            rhs[ia[ia >= 0], columns[ia >= 0]] += 1.0
+            rhs[ib[ib >= 0], columns[ib >= 0]] -= 1.0
+            potential = np.vstack([self.factorization.solve(rhs).reshape(m, len(solve)), np.zeros(len(solve))])
+            # 索引-1（接地节点）落在末尾补的0上
+            result[solve] = potential[ia, columns] - potential[ib, columns]
+        return result
+
+    def matrix(self):
+        """
+        所有节点对的等效电阻矩阵，形状为 (节点数, 节点数)
+        按需模式下首次调用时求出接地拉普拉斯矩阵的逆，之后的查询都直接查表
+        """
+        if self._merged_matrix is None:
+            self._merged_matrix = self._all_pairs()
+        return self._merged_matrix[np.ix_(self.labels, self.labels)]
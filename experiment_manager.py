@@ -1,7 +1,7 @@
 import os
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 # 获取当前已经配置的logger
 logger = logging.getLogger('CircuitSimulator')
@@ -185,6 +185,60 @@ def evaluate_experiment_progress(experiment: Dict[str, Any], circuit_data: Dict[
     
     return result
 
+# 灵敏度提示中各属性的单位
+PROPERTY_UNITS = {"电阻值": "Ω", "电压值": "V", "滑动位置": ""}
+
+def sensitivity_hints(meter_label: str, quantity: str, reading: float,
+                      derivatives: List[Tuple[str, str, float, float]],
+                      target: Optional[float] = None, limit: int = 3) -> List[str]:
+    """
+    根据仪表读数对各元件参数的导数（伴随灵敏度）生成确定性的调节建议，不需要调用大模型
+    
+    Args:
+        meter_label: 仪表名称，如"电流表1"
+        quantity: "current" 或 "voltage"
+        reading: 当前读数
+        derivatives: [(元件名称, 属性名, 属性值, 读数对属性的导数), ...]
+        target: 目标读数；给定时按线性估计计算各参数需要调到的值，否则列出影响读数最大的参数
+        limit: 最多给出的建议条数
+        
+    Returns:
+        提示文本列表，按所需改动从小到大（或影响从大到小）排序
+    """
+    unit = "A" if quantity == "current" else "V"
+    if reading < 0:
+        # 电流表读数带方向，按大小给建议
+        reading = -reading
+        derivatives = [(label, name, value, -derivative) for label, name, value, derivative in derivatives]
+    candidates = []
+    for label, property_name, value, derivative in derivatives:
+        if abs(derivative) < 1e-12:
+            continue
+        property_unit = PROPERTY_UNITS.get(property_name, "")
+        if target is None:
+            # 属性增加10%时读数的变化量，按变化量排序
+            change = 0.1 * value * derivative
+            if abs(change) < 1e-6:
+                continue
+            direction = "增大" if derivative > 0 else "减小"
+            text = (f"增大{label}的{property_name}会使{meter_label}读数{direction}："
+                    f"{property_name}每增加10%，读数约变化{abs(change):.3g}{unit}")
+            candidates.append((-abs(change), text))
+        else:
+            if property_name == "电阻值":
+                # 读数大致与电阻成反比，按电导 1/R 线性外推更准确
+                conductance = 1.0 / value + (target - reading) / (-derivative * value * value)
+                new_value = 1.0 / conductance if conductance > 0 else -1.0
+            else:
+                new_value = value + (target - reading) / derivative
+            if new_value <= 0 or (property_name == "滑动位置" and new_value > 1):
+                continue
+            text = (f"将{label}的{property_name}从{value:.3g}{property_unit}调到约{new_value:.3g}{property_unit}，"
+                    f"{meter_label}读数可从{reading:.3g}{unit}变为约{target:.3g}{unit}")
+            candidates.append((abs(new_value - value) / max(abs(value), 1e-12), text))
+    candidates.sort(key=lambda item: item[0])
+    return [text for _, text in candidates[:limit]]
+
 def create_experiment_template(name: str, difficulty: str = "中级") -> Dict[str, Any]:
     """
     创建新的实验模板
@@ -0,0 +1,137 @@
+"""
+故障注入诊断：逐个假设单个元件断路或短路，找出最能解释观测读数的故障
+
+所有元件（包括导线、开关、电流表）都作为支路参与方程组（不合并理想导体），
+每种故障只改变一个元件的电导，是对同一个LU分解的秩1更新；
+所有故障的解由一次多右端项回代批量求出（见 circuit_solver.single_branch_updates），
+再按预测读数与观测读数的相对误差排序。
+小灯泡在诊断中按"电阻值"的固定电阻处理。
+"""
+import logging
+
+import numpy as np
+
+import circuit_solver
+from netlist import NetlistSolver, TYPE_AMMETER, TYPE_BULB
+
+logger = logging.getLogger('CircuitSimulator')
+
+OPEN = "open"
+SHORT = "short"
+FAULT_LABELS = {OPEN: "断路", SHORT: "短路"}
+
+# 断路、短路故障的等效电阻，与断开的开关、导线相同
+FAULT_OPEN_RESISTANCE = 1e9
+FAULT_SHORT_RESISTANCE = 0.001
+# 计算相对误差时读数的下限，避免观测值为0时误差被无限放大
+FAULT_READING_FLOOR = 1e-3
+# 小灯泡电流不超过该值视为不亮，与小灯泡绘制发光效果的阈值相同
+BULB_LIT_CURRENT = 0.001
+
+
+class Fault:
+    """
+    单个故障假设
+
+    Attributes:
+        element: 故障元件的下标，element 为 None 表示无故障（当前电路本身）
+        kind: OPEN 或 SHORT
+        readings: 该故障下各观测元件的预测读数（大小）
+        error: 预测读数与观测读数的均方根相对误差
+    """
+
+    __slots__ = ('element', 'kind', 'readings', 'error')
+
+    def __init__(self, element, kind, readings, error):
+        self.element = element
+        self.kind = kind
+        self.readings = readings
+        self.error = error
+
+    def __repr__(self):
+        return f"Fault({self.element}, {self.kind}, error={self.error:.3g})"
+
+
+def default_quantities(netlist, elements):
+    """电流表和小灯泡观测电流，其余元件观测电压"""
+    types = netlist.type_codes[elements]
+    return np.where(np.isin(types, (TYPE_AMMETER, TYPE_BULB)), "current", "voltage")
+
+
+def fault_scan(netlist, elements, observed, quantities=None, sparse=None):
+    """
+    对每个两端元件分别假设断路和短路，按与观测读数的吻合程度排序
+
+    已经相当于断路（电阻不小于 FAULT_OPEN_RESISTANCE）的元件不再假设断路，
+    已经相当于短路的元件不再假设短路；电源不参与故障假设
+
+    Args:
+        netlist: 电路网表
+        elements: 观测读数所在元件的下标
+        observed: 各观测元件的读数（大小）
+        quantities: 各观测元件观测的物理量 "current" / "voltage"，默认见 default_quantities
+        sparse: 是否使用稀疏矩阵，None 按方程组规模自动选择
+
+    Returns:
+        (按误差从小到大排序的 Fault 列表, 无故障时的 Fault)
+
+    Raises:
+        np.linalg.LinAlgError: 方程组为空或奇异
+    """
+    elements = np.asarray(elements, dtype=np.int64)
+    observed = np.abs(np.asarray(observed, dtype=float))
+    if quantities is None:
+        quantities = default_quantities(netlist, elements)
+    is_current = np.asarray(quantities) == "current"
+
+    solver = NetlistSolver(sparse)
+    solver.collapse_ideal = False
+    solver.nonlinear_bulbs = False
+    structure = solver.prepare(netlist)
+    if structure is None or structure.n == 0:
+        raise np.linalg.LinAlgError("Empty system")
+    g = solver.conductances(netlist, structure)
+    z = solver.rhs(netlist, structure)
+    factorization = solver.factorize(structure, g)
+
+    # 候选故障：(支路在印记顺序中的位置, 故障类型, 故障后的电导)
+    r = netlist.resistance[structure.branch_index]
+    can_open = np.flatnonzero(r < FAULT_OPEN_RESISTANCE)
+    can_short = np.flatnonzero(r > FAULT_SHORT_RESISTANCE)
+    positions = np.concatenate([can_open, can_short])
+    kinds = np.array([OPEN] * len(can_open) + [SHORT] * len(can_short), dtype=object)
+    new_g = np.where(kinds == OPEN, 1.0 / FAULT_OPEN_RESISTANCE, 1.0 / FAULT_SHORT_RESISTANCE)
+
+    # 第0行为无故障的解
+    X = np.vstack([factorization.solve(z)[None, :],
+                   circuit_solver.single_branch_updates(structure, factorization, g, z, positions, new_g)])
+    G = np.repeat(g[None, :], len(X), axis=0)
+    G[np.arange(1, len(X)), positions] = new_g
+
+    # 观测元件的预测读数：支路电压、电流由解向量和（故障后的）电导求出，电源电流取支路电流变量
+    readings = np.zeros((len(X), len(elements)))
+    position_of = np.full(len(netlist), -1, dtype=np.int64)
+    position_of[structure.branch_index] = np.arange(len(structure.branch_index))
+    source_of = np.full(len(netlist), -1, dtype=np.int64)
+    source_of[structure.source_index] = np.arange(len(structure.source_index))
+    for column, element in enumerate(elements):
+        if position_of[element] >= 0:
+            p = position_of[element]
+            voltage = structure.branch_voltages(X, [p])[:, 0]
+            readings[:, column] = np.abs(voltage * G[:, p]) if is_current[column] else np.abs(voltage)
+        elif source_of[element] >= 0:
+            s = source_of[element]
+            readings[:, column] = (np.abs(X[:, structure.num_node_vars + s]) if is_current[column]
+                                   else abs(netlist.source_value[element]))
+
+    scale = np.maximum(observed, FAULT_READING_FLOOR)
+    errors = np.sqrt(np.mean(((readings - observed) / scale) ** 2, axis=1)) if len(elements) else np.zeros(len(X))
+    # 奇异的故障情形（NaN）排在最后
+    errors = np.where(np.isfinite(errors), errors, np.inf)
+
+    baseline = Fault(None, None, readings[0], float(errors[0]))
+    faults = [Fault(int(structure.branch_index[p]), kind, readings[i + 1], float(errors[i + 1]))
+              for i, (p, kind) in enumerate(zip(positions, kinds))]
+    faults.sort(key=lambda fault: fault.error)
+    logger.debug(f"故障诊断: {len(faults)} 种单元件故障, {structure.n} 个未知数")
+    return faults, baseline
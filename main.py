@@ -4,7 +4,10 @@ import json
 import logging
 import requests
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import numpy as np
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                            QHBoxLayout, QPushButton, QLabel, QGraphicsView,
                            QGraphicsScene, QMessageBox, QLineEdit, QSlider,
@@ -14,14 +17,20 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                            QDialogButtonBox, QSpinBox
 )
 from PyQt6.QtCore import Qt, QMimeData, QPointF, QTimer, QLineF, pyqtSignal, QPoint, QSettings
-from PyQt6.QtGui import QDrag, QPainter, QColor, QPen, QBrush, QTransform, QPixmap
+from PyQt6.QtGui import QDrag, QPainter, QColor, QPen, QBrush, QTransform, QPixmap, QPolygonF
 from components import Component, Circuit, Wire, ConnectionPoint, logger
+from solver_worker import SolverWorker, SolveRequest
 import experiment_manager
+import fault_analysis
+import perf_stats
+import transient
 
 # 添加一个SimulationSettingsDialog类
 class SimulationSettingsDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, timings=None, solvers=()):
         super().__init__(parent)
+        self.timings = timings
+        self.solvers = solvers
         self.setWindowTitle("仿真设置")
         self.setModal(True)
         self.setMinimumWidth(300)
@@ -47,6 +56,16 @@ class SimulationSettingsDialog(QDialog):
         self.auto_adjust_potentiometer.setChecked(True)
         layout.addRow("自动调整滑动变阻器:", self.auto_adjust_potentiometer)
         
+        # 性能统计设置
+        perf_layout = QHBoxLayout()
+        self.performance_stats = QCheckBox("启用")
+        perf_layout.addWidget(self.performance_stats)
+        self.performance_button = QPushButton("查看...")
+        self.performance_button.setEnabled(timings is not None)
+        self.performance_button.clicked.connect(self.show_performance)
+        perf_layout.addWidget(self.performance_button)
+        layout.addRow("性能统计:", perf_layout)
+        
         # 按钮
         buttons = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
@@ -60,8 +79,258 @@ class SimulationSettingsDialog(QDialog):
         return {
             "refresh_rate": self.refresh_rate_spin.value(),
             "bulb_levels": 5 if self.bulb_levels_combo.currentText() == "5档" else 9,
-            "auto_adjust_potentiometer": self.auto_adjust_potentiometer.isChecked()
+            "auto_adjust_potentiometer": self.auto_adjust_potentiometer.isChecked(),
+            "performance_stats": self.performance_stats.isChecked()
         }
+    
+    def show_performance(self):
+        """打开性能统计对话框"""
+        PerformanceDialog(self.timings, self, Circuit.solution_cache, self.solvers).exec()
+
+class PerformanceDialog(QDialog):
+    """显示电路计算各阶段耗时的最近值、均值和p95，求解结果缓存的命中情况，以及小灯泡工作点的牛顿迭代次数"""
+    
+    def __init__(self, timings, parent=None, cache=None, solvers=()):
+        super().__init__(parent)
+        self.timings = timings
+        self.cache = cache
+        self.solvers = solvers
+        self.setWindowTitle("性能统计")
+        self.setMinimumWidth(420)
+        
+        layout = QVBoxLayout(self)
+        if not timings.enabled:
+            layout.addWidget(QLabel("性能统计未启用，请在仿真设置中勾选“性能统计”"))
+        
+        grid = QGridLayout()
+        for col, title in enumerate(["阶段", "最近(ms)", "平均(ms)", "p95(ms)", "次数"]):
+            grid.addWidget(QLabel(f"<b>{title}</b>"), 0, col)
+        self.value_labels = {}
+        for row, phase in enumerate(timings.stats, start=1):
+            grid.addWidget(QLabel(perf_stats.PHASE_LABELS.get(phase, phase)), row, 0)
+            labels = [QLabel() for _ in range(4)]
+            for col, label in enumerate(labels, start=1):
+                label.setAlignment(Qt.AlignmentFlag.AlignRight)
+                grid.addWidget(label, row, col)
+            self.value_labels[phase] = labels
+        layout.addLayout(grid)
+        
+        self.cache_label = QLabel()
+        layout.addWidget(self.cache_label)
+        self.newton_label = QLabel()
+        layout.addWidget(self.newton_label)
+        
+        buttons = QHBoxLayout()
+        reset_button = QPushButton("清零")
+        reset_button.clicked.connect(self.reset_stats)
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.accept)
+        buttons.addStretch()
+        buttons.addWidget(reset_button)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+        
+        # 对话框打开期间定时刷新
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start(500)
+        self.refresh()
+    
+    def refresh(self):
+        for phase, values in self.timings.summary().items():
+            last, mean, p95, count = self.value_labels[phase]
+            last.setText(f"{values['last'] * 1000:.3f}")
+            mean.setText(f"{values['mean'] * 1000:.3f}")
+            p95.setText(f"{values['p95'] * 1000:.3f}")
+            count.setText(str(values['count']))
+        if self.cache is not None:
+            stats = self.cache.stats
+            self.cache_label.setText(
+                f"结果缓存: 命中 {stats['hits']} 次，未命中 {stats['misses']} 次，"
+                f"{len(self.cache)} 条 / {self.cache.size_bytes / 1024:.1f} KB")
+        if self.solvers:
+            # 界面线程与后台线程各有一个求解器，合计其统计
+            counts = {key: sum(solver.solve_counts[key] for solver in self.solvers)
+                      for key in ('newton_solves', 'newton_iterations', 'newton_failures')}
+            average = counts['newton_iterations'] / counts['newton_solves'] if counts['newton_solves'] else 0.0
+            self.newton_label.setText(
+                f"灯泡工作点: 求解 {counts['newton_solves']} 次，平均迭代 {average:.1f} 次，"
+                f"未收敛 {counts['newton_failures']} 次")
+    
+    def reset_stats(self):
+        self.timings.reset()
+        for solver in self.solvers:
+            for key in ('newton_solves', 'newton_iterations', 'newton_failures'):
+                solver.solve_counts[key] = 0
+        self.refresh()
+
+class TransientPlot(QWidget):
+    """瞬态分析曲线图：横轴为时间(ms)，所有曲线共用一个纵轴"""
+    
+    COLORS = ["#1976D2", "#D32F2F", "#388E3C", "#F57C00", "#7B1FA2", "#0097A7", "#5D4037", "#C2185B"]
+    
+    def __init__(self, title, unit, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.unit = unit
+        self.times = np.zeros(0)
+        self.series = []  # [(名称, 数值数组)]
+        self.setMinimumSize(480, 200)
+    
+    def set_data(self, times, series):
+        self.times = times
+        self.series = series
+        self.update()
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.fillRect(self.rect(), QColor(255, 255, 255))
+        left, top, right, bottom = 60, 20, self.width() - 10, self.height() - 25
+        painter.setPen(QPen(Qt.GlobalColor.black, 1))
+        painter.drawRect(left, top, right - left, bottom - top)
+        painter.drawText(left, top - 5, f"{self.title} ({self.unit})")
+        if len(self.times) < 2 or not self.series:
+            return
+        
+        t0, t1 = self.times[0], self.times[-1]
+        values = np.concatenate([v for _, v in self.series])
+        low, high = float(values.min()), float(values.max())
+        if high - low < 1e-12:
+            low, high = low - 1.0, high + 1.0
+        painter.drawText(5, top + 10, f"{high:.3g}")
+        painter.drawText(5, bottom, f"{low:.3g}")
+        painter.drawText(left, bottom + 15, f"{t0 * 1000:.3g}ms")
+        painter.drawText(right - 60, bottom + 15, f"{t1 * 1000:.3g}ms")
+        
+        # 样本点多于像素时按列抽样，避免绘制过多线段
+        step = max(1, len(self.times) // max(1, right - left))
+        xs = left + (self.times[::step] - t0) / max(t1 - t0, 1e-12) * (right - left)
+        for k, (name, v) in enumerate(self.series):
+            color = QColor(self.COLORS[k % len(self.COLORS)])
+            painter.setPen(QPen(color, 2))
+            ys = bottom - (v[::step] - low) / (high - low) * (bottom - top)
+            painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in zip(xs, ys)]))
+            painter.drawText(left + 10, top + 15 + 15 * k, f"{name}: {v[-1]:.4g}{self.unit}")
+
+
+class TransientDialog(QDialog):
+    """瞬态分析：设置时长、步长和积分方法，在后台线程中运行，运行期间定时刷新电表、电容和电感的曲线"""
+    
+    def __init__(self, circuit, parent=None):
+        super().__init__(parent)
+        self.circuit = circuit
+        self.simulator = None
+        self.future = None
+        self.stop_event = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transient")
+        self.setWindowTitle("瞬态分析")
+        
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self.duration_spin = QDoubleSpinBox()
+        self.duration_spin.setRange(0.1, 100000)
+        self.duration_spin.setValue(500)
+        self.duration_spin.setSuffix(" ms")
+        form.addRow("仿真时长:", self.duration_spin)
+        
+        self.step_spin = QDoubleSpinBox()
+        self.step_spin.setDecimals(3)
+        self.step_spin.setRange(0.001, 100)
+        self.step_spin.setValue(1.0)
+        self.step_spin.setSuffix(" ms")
+        form.addRow("步长:", self.step_spin)
+        
+        self.method_combo = QComboBox()
+        self.method_combo.addItems(["梯形法", "后向欧拉法"])
+        form.addRow("积分方法:", self.method_combo)
+        
+        self.initial_combo = QComboBox()
+        self.initial_combo.addItems(["零状态（电容不带电）", "直流工作点"])
+        form.addRow("初始状态:", self.initial_combo)
+        
+        self.adaptive_check = QCheckBox("启用")
+        form.addRow("自适应步长:", self.adaptive_check)
+        layout.addLayout(form)
+        
+        self.voltage_plot = TransientPlot("电压", "V")
+        self.current_plot = TransientPlot("电流", "A")
+        layout.addWidget(self.voltage_plot)
+        layout.addWidget(self.current_plot)
+        
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        
+        buttons = QHBoxLayout()
+        self.start_button = QPushButton("开始")
+        self.start_button.clicked.connect(self.start)
+        self.stop_button = QPushButton("停止")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_event.set)
+        close_button = QPushButton("关闭")
+        close_button.clicked.connect(self.reject)
+        buttons.addStretch()
+        buttons.addWidget(self.start_button)
+        buttons.addWidget(self.stop_button)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+        
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh)
+    
+    def start(self):
+        method = transient.TRAPEZOIDAL if self.method_combo.currentIndex() == 0 else transient.BACKWARD_EULER
+        initial = "zero" if self.initial_combo.currentIndex() == 0 else "dc"
+        try:
+            self.simulator = self.circuit.transient_simulator(
+                self.step_spin.value() / 1000, method, self.adaptive_check.isChecked(), initial)
+        except (ValueError, np.linalg.LinAlgError) as e:
+            QMessageBox.warning(self, "瞬态分析", f"无法进行瞬态分析: {e}")
+            return
+        if self.simulator is None:
+            QMessageBox.warning(self, "瞬态分析", "电路节点识别失败，可能是电路不完整")
+            return
+        
+        self.stop_event.clear()
+        self.future = self.executor.submit(self.simulator.run, self.duration_spin.value() / 1000, self.stop_event)
+        self.start_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.refresh_timer.start(100)
+    
+    def refresh(self):
+        if self.simulator is None:
+            return
+        times, voltage, current = self.simulator.snapshot()
+        voltage_series = []
+        current_series = []
+        for k, comp in enumerate(self.circuit.components):
+            label = f"{comp.name}{k + 1}"
+            if comp.name in ("电压表", "电容"):
+                voltage_series.append((label, voltage[:, k]))
+            if comp.name in ("电流表", "电感", "电容"):
+                current_series.append((label, current[:, k]))
+        self.voltage_plot.set_data(times, voltage_series)
+        self.current_plot.set_data(times, current_series)
+        
+        simulator = self.simulator
+        self.status_label.setText(f"t = {simulator.time * 1000:.3f} ms，{simulator.steps} 步，"
+                                  f"当前步长 {simulator.step_size * 1000:.4g} ms")
+        if self.future is not None and self.future.done():
+            self.refresh_timer.stop()
+            self.start_button.setEnabled(True)
+            self.stop_button.setEnabled(False)
+            error = self.future.exception()
+            self.future = None
+            if error is not None:
+                logger.error(f"瞬态分析失败: {error}")
+                QMessageBox.warning(self, "瞬态分析", f"瞬态分析失败: {error}")
+    
+    def done(self, result):
+        """关闭对话框时结束仿真线程"""
+        self.stop_event.set()
+        self.refresh_timer.stop()
+        self.executor.shutdown(wait=True)
+        super().done(result)
 
 class PropertyDialog(QDialog):
     def __init__(self, component, parent=None):
@@ -246,6 +515,8 @@ class ComponentButton(QPushButton):
 class WorkArea(QGraphicsView):
     # 将信号定义为类变量
     voltage_changed_signal = pyqtSignal(float)
+    # 后台求解结果已写回电路，参数为 SolveResult
+    simulation_updated = pyqtSignal(object)
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -272,11 +543,19 @@ class WorkArea(QGraphicsView):
         self.last_pan_point = QPoint()
         self.shift_key_pressed = False  # 使用Shift替代空格键
         
+        # Ctrl+单击选中的连接点（最多两个），用于求两点间的戴维南/诺顿等效电路
+        self.selected_terminals = []
+        
         # 初始化电路
         self.circuit = Circuit()
         self.simulation_running = False
         self.simulation_status = "未开始"  # 新增：仿真状态
         
+        # 后台求解线程：仿真运行中的重新计算交给它，避免拖动和输入时卡顿
+        self.background_solving = True
+        self.solver_worker = SolverWorker(self, Circuit.solution_cache)
+        self.solver_worker.solved.connect(self.on_solution_ready)
+        
         logger.debug("WorkArea初始化完成")
         
     def draw_grid(self):
@@ -406,6 +685,15 @@ class WorkArea(QGraphicsView):
                 event.accept()
                 return
             
+            # Ctrl+单击连接点：选中或取消选中等效电路的端点
+            if (event.button() == Qt.MouseButton.LeftButton and not self.current_wire and
+                    QApplication.keyboardModifiers() == Qt.KeyboardModifier.ControlModifier):
+                connection_point = self.find_connection_point(self.mapToScene(event.position().toPoint()))
+                if connection_point:
+                    self.toggle_terminal(connection_point)
+                    event.accept()
+                    return
+            
             # 继续处理线路创建逻辑
             if event.button() == Qt.MouseButton.LeftButton:
                 scene_pos = self.mapToScene(event.position().toPoint())
@@ -506,6 +794,15 @@ class WorkArea(QGraphicsView):
             reset_view_action = menu.addAction("重置视图")
             reset_view_action.triggered.connect(self.reset_view)
             
+            # 选中两个连接点后可以求等效电路
+            self.prune_terminals()
+            thevenin_action = menu.addAction("戴维南/诺顿等效 (Ctrl+单击选两个连接点)")
+            thevenin_action.setEnabled(len(self.selected_terminals) == 2)
+            thevenin_action.triggered.connect(self.show_thevenin_equivalent)
+            if self.selected_terminals:
+                clear_terminals_action = menu.addAction("清除端点选择")
+                clear_terminals_action.triggered.connect(self.clear_terminals)
+            
             # 检查是否点击在组件或导线上
             scene_pos = self.mapToScene(event.pos())
             item = self.scene().itemAt(scene_pos, QTransform())
@@ -530,6 +827,47 @@ class WorkArea(QGraphicsView):
         except Exception as e:
             logger.error(f"上下文菜单事件出错: {str(e)}", exc_info=True)
             
+    def toggle_terminal(self, point):
+        """选中或取消选中等效电路的端点，已选两个时新选的点替换较早的一个"""
+        self.prune_terminals()
+        if point in self.selected_terminals:
+            self.selected_terminals.remove(point)
+            point.set_terminal_selected(False)
+            return
+        if len(self.selected_terminals) == 2:
+            self.selected_terminals.pop(0).set_terminal_selected(False)
+        self.selected_terminals.append(point)
+        point.set_terminal_selected(True)
+        
+    def prune_terminals(self):
+        """去掉所属组件已被删除的端点"""
+        self.selected_terminals = [point for point in self.selected_terminals
+                                   if point.parentItem() in self.circuit.components]
+        
+    def clear_terminals(self):
+        for point in self.selected_terminals:
+            point.set_terminal_selected(False)
+        self.selected_terminals = []
+        
+    def show_thevenin_equivalent(self):
+        """显示两个选中连接点之间的戴维南/诺顿等效电路"""
+        self.prune_terminals()
+        if len(self.selected_terminals) != 2:
+            QMessageBox.warning(self, "提示", "请按住Ctrl单击选择两个连接点")
+            return
+        point_a, point_b = self.selected_terminals
+        result = self.circuit.thevenin(point_a, point_b)
+        if result is None:
+            QMessageBox.warning(self, "戴维南等效", "无法计算：两个连接点不在同一个连通的电路中，或电路不完整")
+            return
+        name_a, name_b = point_a.parentItem().name, point_b.parentItem().name
+        current = "∞" if np.isinf(result['current']) else f"{result['current']:.4g} A"
+        QMessageBox.information(
+            self, "戴维南/诺顿等效",
+            f"端点 A（{name_a}）、B（{name_b}），A 端为正\n\n"
+            f"戴维南等效: 开路电压 U = {result['voltage']:.4g} V，等效电阻 R = {result['resistance']:.4g} Ω\n"
+            f"诺顿等效: 短路电流 I = {current}，并联电阻 R = {result['resistance']:.4g} Ω")
+        
     def reset_view(self):
         """重置视图到默认位置和缩放"""
         self.resetTransform()
@@ -769,9 +1107,14 @@ class WorkArea(QGraphicsView):
         self.update()
     
     def update_simulation(self):
-        """此方法保留用于属性变化后的手动更新"""
-        if not self.simulation_running:
-            return
+        """
+        属性或连接变化后重新计算电路
+        电路自上次计算后没有任何变化时直接跳过
+        返回: 是否执行了重新计算
+        """
+        if (not self.simulation_running or not self.circuit.needs_solve()
+                or self.circuit.solve_pending()):
+            return False
             
         # 获取当前电压
         voltage = 5.0  # 默认值
@@ -782,11 +1125,49 @@ class WorkArea(QGraphicsView):
                 voltage = comp.properties.get("电压值", 5.0)
                 break
         
+        if self.background_solving:
+            # 提交网表快照到后台线程，结果由on_solution_ready写回
+            circuit_netlist, version = self.circuit.snapshot_netlist()
+            if circuit_netlist is not None:
+                self.solver_worker.submit(SolveRequest(self.circuit, circuit_netlist, version,
+                                                       self.circuit.timings))
+            return True
+        
         # 重新计算电路
         self.circuit.calculate_circuit(voltage)
         
         # 更新显示
         self.update()
+        return True
+    
+    def readings_current(self):
+        """
+        界面线程中的本地分析（故障诊断、灵敏度、串并联推导）之前调用：元件读数是否反映电路当前状态
+        后台求解运行时不在界面线程中求解，读数过期（结果尚未写回或求解失败）时返回False；
+        否则读数过期时直接求解
+        """
+        if not self.circuit.needs_solve():
+            return True
+        if self.background_solving and self.simulation_running:
+            return False
+        return self.circuit.calculate_circuit()
+
+    def on_solution_ready(self, result):
+        """后台求解完成（GUI线程）：写回结果并通知主窗口刷新"""
+        if result.request.circuit is not self.circuit or not self.simulation_running:
+            return
+        if result.solution is None:
+            logger.error(f"电路方程组求解失败: {result.error}")
+            # 只有最新一次提交的求解失败时才清除读数，更早的请求失败时新结果随后就到
+            if result.request.version == self.circuit.submitted_version == self.circuit.state_version():
+                self.circuit.discard_solution()
+                self.update()
+            return
+        if not self.circuit.apply_solution(result.solution, result.request.version):
+            return
+        self.circuit.timings.lap('total', result.request.submitted_at)
+        self.update()
+        self.simulation_updated.emit(result)
 
     def remove_component(self, component):
         """从场景和电路中移除组件"""
@@ -801,7 +1182,7 @@ class WorkArea(QGraphicsView):
             
             # 从电路中移除组件
             if component in self.circuit.components:
-                self.circuit.components.remove(component)
+                self.circuit.remove_component(component)
             
             logger.debug(f"组件已移除: {component.name}")
         except Exception as e:
@@ -824,12 +1205,15 @@ class MainWindow(QMainWindow):
         self.simulation_settings = {
             "refresh_rate": 10,  # 默认10Hz
             "bulb_levels": 9,    # 默认9档
-            "auto_adjust_potentiometer": True  # 默认启用自动调整
+            "auto_adjust_potentiometer": True,  # 默认启用自动调整
+            "performance_stats": False  # 默认关闭性能统计
         }
         
         # 仿真刷新计时器
         self.simulation_timer = QTimer(self)
         self.simulation_timer.timeout.connect(self.update_simulation)
+        # 测量显示所对应的(电路, 求解结果)，计时器据此跳过没有变化的刷新
+        self._measured_version = None
         
         # 创建主分割器
         self.main_splitter = QSplitter(Qt.Orientation.Horizontal)
@@ -845,6 +1229,7 @@ class MainWindow(QMainWindow):
         
         # 连接电压变化信号
         self.work_area.voltage_changed_signal.connect(self.update_voltage_input)
+        self.work_area.simulation_updated.connect(self.on_simulation_updated)
         
         # 创建菜单栏 - 在work_area创建后
         self.menubar = self.menuBar()
@@ -885,6 +1270,9 @@ class MainWindow(QMainWindow):
         settings_sim_action = simulation_menu.addAction("仿真设置")
         settings_sim_action.triggered.connect(self.show_simulation_settings)
         
+        transient_action = simulation_menu.addAction("瞬态分析...")
+        transient_action.triggered.connect(self.show_transient_analysis)
+        
         # 视图菜单
         view_menu = self.menubar.addMenu("视图")
         
@@ -935,6 +1323,11 @@ class MainWindow(QMainWindow):
         self.simulation_status_label.setStyleSheet("padding: 0 10px; font-weight: bold; color: #2c3e50;")
         self.simulation_status_label.setMinimumWidth(150)
 
+        # 电路计算耗时（启用性能统计时显示）
+        self.performance_label = QLabel("")
+        self.performance_label.setStyleSheet("padding: 0 10px; color: #8e44ad;")
+        self.performance_label.setVisible(False)
+
         self.simulation_step_label = QLabel("仿真步数: 0")
         self.simulation_step_label.setStyleSheet("padding: 0 10px; color: #16a085;")
         self.simulation_step_label.setMinimumWidth(120)
@@ -943,12 +1336,19 @@ class MainWindow(QMainWindow):
         self.measurement_label.setStyleSheet("padding: 0 10px; color: #c0392b;")
         self.measurement_label.setMinimumWidth(180)
 
+        # 后台求解从提交到显示的延迟
+        self.latency_label = QLabel("求解延迟: -")
+        self.latency_label.setStyleSheet("padding: 0 10px; color: #7f8c8d;")
+        self.latency_label.setMinimumWidth(120)
+
         # 添加一个弹性空间占位符到状态栏左侧
         self.statusBar().addWidget(QWidget(), 1)  # 权重为1，将推动其他控件到右侧
 
         # 添加到状态栏右侧
         self.statusBar().addPermanentWidget(self.simulation_status_label, 0)  # 权重为0，使控件保持原始大小
+        self.statusBar().addPermanentWidget(self.performance_label, 0)
         self.statusBar().addPermanentWidget(self.simulation_step_label, 0)
+        self.statusBar().addPermanentWidget(self.latency_label, 0)
         self.statusBar().addPermanentWidget(self.measurement_label, 0)
         
         # 创建左侧工具栏
@@ -1178,10 +1578,10 @@ class MainWindow(QMainWindow):
         components_layout = QGridLayout(components_group)
         components_layout.setSpacing(8)  # 减小组件间距
         components_layout.setContentsMargins(8, 20, 8, 8)  # 减小边距，顶部留空间给标题
-        components_group.setMinimumHeight(170)  # 设置电路元件组的最小高度
+        components_group.setMinimumHeight(210)  # 设置电路元件组的最小高度
         
         # 添加组件按钮 - 修改为更紧凑的网格布局
-        components = ["电源", "开关", "导线", "定值电阻", "滑动变阻器", "电流表", "电压表", "小灯泡"]
+        components = ["电源", "开关", "导线", "定值电阻", "滑动变阻器", "电流表", "电压表", "小灯泡", "电容", "电感"]
         for i, component in enumerate(components):
             btn = ComponentButton(component)
             btn.setMinimumSize(120, 34)  # 减小最小大小
@@ -1583,8 +1983,17 @@ class MainWindow(QMainWindow):
         # 更新状态栏
         self.statusBar().showMessage("电路已清空")
     
+    def apply_performance_setting(self):
+        """按仿真设置开启或关闭当前电路的分阶段计时"""
+        enabled = self.simulation_settings["performance_stats"]
+        self.work_area.circuit.timings.enabled = enabled
+        self.performance_label.setVisible(enabled)
+    
     def start_simulation(self):
         try:
+            # 加载或清空电路后电路对象会被替换，开始仿真时重新应用性能统计设置
+            self.apply_performance_setting()
+            
             # 重置所有组件的电气参数
             for comp in self.work_area.circuit.components:
                 comp.voltage = 0
@@ -1667,17 +2076,35 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "仿真错误", f"重置仿真时出现错误：{str(e)}")
 
     def update_simulation(self):
-        """手动触发电路重新计算"""
+        """仿真计时器回调：电路有变化时重新计算，计算结果有更新时刷新测量显示"""
         if not self.work_area.simulation_running:
             return
             
         self.work_area.update_simulation()
         
-        # 更新测量结果
+        # 属性修改可能已在WorkArea中触发过计算，这里按求解结果判断是否需要刷新测量结果
+        circuit = self.work_area.circuit
+        if (circuit, circuit.solution) != self._measured_version:
+            self.update_measurements()
+    
+    def on_simulation_updated(self, result):
+        """后台求解结果已写回：刷新测量结果并显示提交到显示的延迟"""
         self.update_measurements()
+        self.latency_label.setText(f"求解延迟: {result.latency * 1000:.1f}ms")
+    
+    def closeEvent(self, event):
+        """关闭窗口时停止后台求解线程"""
+        self.work_area.solver_worker.shutdown()
+        super().closeEvent(event)
         
     def update_measurements(self):
         """更新测量结果显示"""
+        circuit = self.work_area.circuit
+        self._measured_version = (circuit, circuit.solution)
+        if circuit.timings.enabled:
+            total = circuit.timings.stats["total"]
+            self.performance_label.setText(
+                f"计算耗时: {total.last * 1000:.1f}ms (p95 {total.percentile(95) * 1000:.1f}ms)")
         results = []
         for comp in self.work_area.circuit.components:
             if comp.name in ["电流表", "电压表"]:
@@ -1700,14 +2127,20 @@ class MainWindow(QMainWindow):
             # 更新测量结果
             self.update_measurements()
 
+    def show_transient_analysis(self):
+        """打开瞬态分析对话框"""
+        TransientDialog(self.work_area.circuit, self).exec()
+
     def show_simulation_settings(self):
         """显示仿真设置对话框"""
-        dialog = SimulationSettingsDialog(self)
+        solvers = [self.work_area.circuit.solver, self.work_area.solver_worker.solver]
+        dialog = SimulationSettingsDialog(self, self.work_area.circuit.timings, solvers)
         
         # 设置当前值
         dialog.refresh_rate_spin.setValue(self.simulation_settings["refresh_rate"])
         dialog.bulb_levels_combo.setCurrentIndex(0 if self.simulation_settings["bulb_levels"] == 5 else 1)
         dialog.auto_adjust_potentiometer.setChecked(self.simulation_settings["auto_adjust_potentiometer"])
+        dialog.performance_stats.setChecked(self.simulation_settings["performance_stats"])
         
         if dialog.exec():
             # 获取设置的值
@@ -1715,6 +2148,8 @@ class MainWindow(QMainWindow):
             old_settings = self.simulation_settings.copy()
             self.simulation_settings = new_settings
             
+            self.apply_performance_setting()
+            
             # 如果仿真正在运行，更新计时器间隔
             if self.work_area.simulation_running:
                 refresh_interval = 1000 // self.simulation_settings["refresh_rate"]
@@ -1749,7 +2184,7 @@ class MainWindow(QMainWindow):
             
             # 从电路中移除组件
             if component in self.circuit.components:
-                self.circuit.components.remove(component)
+                self.circuit.remove_component(component)
             
             logger.debug(f"组件已移除: {component.name}")
         except Exception as e:
@@ -2641,6 +3076,89 @@ class MainWindow(QMainWindow):
                 line-height: 1.6;  /* 增大行间距 */
             """)
 
+    def component_labels(self):
+        """同类组件按出现顺序编号，如"定值电阻1"，返回 {组件: 名称}"""
+        labels = {}
+        counts = {}
+        for component in self.work_area.circuit.components:
+            counts[component.name] = counts.get(component.name, 0) + 1
+            labels[component] = f"{component.name}{counts[component.name]}"
+        return labels
+    
+    def fault_hints(self, limit=3):
+        """
+        本地故障诊断：有小灯泡不亮时，以不亮的灯泡达到额定电流、其余灯泡保持当前电流为目标，
+        找出单独改变后最能满足目标的元件断路或短路（如与灯泡并联的电流表断开后灯泡即可发光）
+        后台求解运行时不在界面线程中求解，读数与电路当前状态不符时不做诊断
+        """
+        if not self.work_area.readings_current():
+            return []
+        circuit = self.work_area.circuit
+        bulbs = [c for c in circuit.components if c.name == "小灯泡"]
+        dark = [b for b in bulbs if abs(b.current) <= fault_analysis.BULB_LIT_CURRENT]
+        if not dark:
+            return []
+        observed = {b: abs(b.current) for b in bulbs}
+        for bulb in dark:
+            observed[bulb] = bulb.properties.get("额定电压", 6.0) / max(bulb.get_resistance(), 1e-9)
+        result = circuit.diagnose_faults(observed, limit)
+        if result is None:
+            return []
+        
+        ranked, baseline_error = result
+        labels = self.component_labels()
+        dark_labels = "、".join(labels[b] for b in dark)
+        actions = {fault_analysis.OPEN: "断开", fault_analysis.SHORT: "接通（闭合或用导线短接）"}
+        hints = []
+        for component, kind, predicted, error in ranked:
+            # 只保留比当前电路更接近目标、且能使所有不亮的灯泡发光的假设
+            if not (error < baseline_error
+                    and all(predicted[b] > fault_analysis.BULB_LIT_CURRENT for b in dark)):
+                continue
+            currents = "、".join(f"{predicted[b]:.3g}A" for b in dark)
+            hints.append(f"{dark_labels}不亮：若{actions[kind]}{labels[component]}，电流约为{currents}，"
+                         f"请检查{labels[component]}的连接")
+        return hints
+    
+    def sensitivity_hints(self):
+        """
+        本地灵敏度分析：对电路中每个电表，用伴随灵敏度给出调节哪些元件参数最有效的确定性建议
+        实验配置中的 target_readings（如 {"Ammeter": 0.5}）给出目标读数时，估计各参数需要调到的值
+        后台求解运行时不在界面线程中求解，读数与电路当前状态不符时不给出建议
+        """
+        if not self.work_area.readings_current():
+            return []
+        circuit = self.work_area.circuit
+        targets = {experiment_manager.get_component_mapping(key): value
+                   for key, value in self.current_experiment.get('target_readings', {}).items()}
+        labels = self.component_labels()
+        
+        hints = []
+        for meter in circuit.components:
+            if meter.name not in ("电流表", "电压表"):
+                continue
+            result = circuit.sensitivity(meter)
+            if result is None:
+                continue
+            reading, derivatives = result
+            hints.extend(experiment_manager.sensitivity_hints(
+                labels[meter], "current" if meter.name == "电流表" else "voltage", reading,
+                [(labels[component], *values) for component, values in derivatives.items()],
+                targets.get(meter.name)))
+        return hints
+    
+    def derivation_hints(self):
+        """
+        本地串并联化简：给出由各元件电阻推出总电阻和总电流的步骤，桥式或多电源电路不给出
+        后台求解运行时不在界面线程中化简，读数与电路当前状态不符时不给出推导
+        """
+        if not self.work_area.readings_current():
+            return []
+        steps = self.work_area.circuit.series_parallel_derivation(self.component_labels())
+        if not steps:
+            return []
+        return ["等效电阻推导: " + "；".join(f"({i}) {step}" for i, step in enumerate(steps, 1))]
+    
     def request_hint(self):
         """请求大模型提供针对当前实验的提示"""
         if not self.current_experiment:
@@ -2656,6 +3174,11 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "错误", "无法序列化当前电路状态。")
             return
         
+        # 先在本地做故障诊断、灵敏度分析和串并联化简推导，结果直接显示，不依赖大模型
+        local_hints = self.fault_hints() + self.sensitivity_hints() + self.derivation_hints()
+        if local_hints:
+            self.add_system_message("电路分析", "<br>".join(local_hints), "green")
+        
         # 构建提交给大模型的提示信息
         experiment_name = self.current_experiment['name']
         experiment_goal = self.current_experiment['goal']
@@ -2674,6 +3197,7 @@ class MainWindow(QMainWindow):
         实验提示信息:
         - 这个实验可能缺少以下元件: {', '.join(missing_elements_cn)}
         - 可用的实验提示: {' '.join(hints) if hints else '无'}
+        - 本地电路分析: {'；'.join(local_hints) if local_hints else '无'}
 
         请根据以上信息，提供一个针对性的提示，帮助学生继续完成实验。提示应当:
         1. 明确指出下一步应当添加什么元件或如何连接
@@ -0,0 +1,1315 @@
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import scipy.sparse as sp
+import circuit_solver
+import component_models
+import series_parallel
+# 元件类型编码与元件模型见 component_models，此处导出供求解器和分析模块使用
+from component_models import (TYPE_OTHER, TYPE_SOURCE, TYPE_RESISTOR, TYPE_RHEOSTAT, TYPE_SWITCH, TYPE_WIRE,
+                              TYPE_AMMETER, TYPE_VOLTMETER, TYPE_BULB, TYPE_CAPACITOR, TYPE_INDUCTOR,
+                              STAMP_CONDUCTANCE, STAMP_VOLTAGE_SOURCE)
+
+# 获取当前已经配置的logger
+logger = logging.getLogger('CircuitSimulator')
+
+# 理想导体（导线、闭合的开关和电流表等，见 ComponentModel.ideal_conductor）：电阻不超过
+# IDEAL_CONDUCTOR_RESISTANCE 时，求解前把其两端节点合并为一个节点，不再作为0.001Ω/0.1Ω的电阻参与方程组
+IDEAL_CONDUCTOR_RESISTANCE = 0.1
+
+# NetlistSolver 缓存的MNA符号结构个数（例如开关断开和闭合各对应一个结构）
+STRUCTURE_CACHE_SIZE = 4
+
+# 求解结果缓存：只缓存元件数不超过该值的电路（大电路计算规范哈希的开销不划算）
+SOLUTION_CACHE_MAX_ELEMENTS = 500
+# 求解结果缓存默认的内存上限（字节）
+SOLUTION_CACHE_MAX_BYTES = 8 * 1024 * 1024
+# 缓存结果校验（KCL与元件方程）的相对误差上限
+SOLUTION_CACHE_TOLERANCE = 1e-8
+
+# 小灯泡灯丝：冷态电阻为额定工作电阻（属性"电阻值"）的该比例，钨丝约为1/10
+BULB_COLD_RESISTANCE_RATIO = 0.1
+# 非线性工作点的牛顿迭代：最大迭代次数、收敛判据（灯泡电压单次变化的绝对/相对值）
+# 牛顿法在解附近二次收敛，相对变化为1e-4时结果的相对误差约为1e-8
+NEWTON_MAX_ITERATIONS = 50
+NEWTON_ABSTOL = 1e-9
+NEWTON_RELTOL = 1e-4
+# 单次迭代中灯泡电压的最大变化量，相对于额定电压与当前电压中的较大者
+NEWTON_STEP_LIMIT = 0.5
+
+def type_code(name):
+    """元件名称对应的类型编码，未知元件为 TYPE_OTHER"""
+    return component_models.get_model(name).type_code
+
+
+def terminal_count(name):
+    """元件的连接点个数"""
+    return component_models.get_model(name).terminal_count
+
+
+def component_resistance(name, properties):
+    """
+    根据元件名称和属性计算电阻值（见 ComponentModel.resistance），不修改属性
+
+    Returns:
+        电阻值(Ω)，未知元件返回0
+    """
+    return component_models.get_model(name).resistance(properties)
+
+
+def component_storage(name, properties):
+    """
+    储能元件的参数（国际单位），瞬态分析使用
+
+    Returns:
+        电容返回电容值(F，属性单位为μF)，电感返回电感值(H，属性单位为mH)，其他元件返回0
+    """
+    return component_models.get_model(name).storage(properties)
+
+
+def is_voltage_source(type_codes):
+    """各元件是否按电压源印记"""
+    return np.isin(type_codes, component_models.codes_where("stamp", STAMP_VOLTAGE_SOURCE))
+
+
+def is_ideal_conductor_type(type_codes):
+    """各元件的类型是否可以作为理想导体"""
+    return np.isin(type_codes, component_models.codes_where("ideal_conductor"))
+
+
+def conductance_groups(type_codes):
+    """
+    按印记函数把元件分组：同一印记函数的类型合并为一组，求解时每组整体调用一次
+
+    Returns:
+        [(印记函数, 下标数组), ...]；只有一组且包含全部元件时下标为None。没有印记函数的元件（电压源）不在其中
+    """
+    groups = {}
+    for model, index in component_models.type_groups(type_codes):
+        if model.stamp == STAMP_CONDUCTANCE and model.conductance is not None:
+            groups.setdefault(model.conductance, []).append(index)
+    groups = [(function, np.sort(np.concatenate(parts))) for function, parts in groups.items()]
+    if len(groups) == 1 and len(groups[0][1]) == len(type_codes):
+        return [(groups[0][0], None)]
+    return groups
+
+
+def stamp_conductances(groups, resistance):
+    """按 conductance_groups 的分组由电阻求电导，resistance 可以带前置的批量维度，不在任何组中的元件电导为0"""
+    if len(groups) == 1 and groups[0][1] is None:
+        return groups[0][0](resistance)
+    g = np.zeros(np.shape(resistance))
+    for function, index in groups:
+        g[..., index] = function(resistance[..., index])
+    return g
+
+
+def bulb_characteristic(voltage, hot_resistance, rated_voltage):
+    """
+    小灯泡灯丝的伏安特性：电阻随灯丝功率升高，R = R0·(1 + β·V²/R)
+    冷态电阻 R0 = BULB_COLD_RESISTANCE_RATIO·R额定，β 使额定电压下 R 恰为额定电阻，
+    解得 R(V) = (R0 + sqrt(R0² + 4·R0·β·V²)) / 2，对 V 光滑且电流随电压单调增加
+
+    Args:
+        voltage: 灯泡两端电压（可为数组，带符号）
+        hot_resistance: 额定电压下的电阻（属性"电阻值"）
+        rated_voltage: 额定电压
+
+    Returns:
+        (电阻, 电流, 微分电导 dI/dV)
+    """
+    r0 = BULB_COLD_RESISTANCE_RATIO * hot_resistance
+    k = 4.0 * (hot_resistance - r0) * hot_resistance / rated_voltage ** 2  # 4·R0·β
+    root = np.sqrt(r0 ** 2 + k * voltage ** 2)
+    resistance = (r0 + root) / 2
+    current = voltage / resistance
+    # dI/dV = (R - V·dR/dV) / R²
+    conductance = (resistance - voltage * (k * voltage / (2 * root))) / resistance ** 2
+    return resistance, current, conductance
+
+
+class Netlist:
+    """
+    与Qt无关的电路网表，以结构数组形式保存元件
+    node1/node2 为节点编号（-1 表示未连接），节点0为参考节点(地)
+    只包含 numpy 数组和字符串列表，可以直接 pickle 发送到工作进程
+    rated_voltage 为小灯泡的额定电压（其他元件为0），非零时灯泡按非线性灯丝模型求解；
+    storage_value 为电容(F)/电感(H)的参数（其他元件为0），只在瞬态分析中使用
+    """
+
+    def __init__(self, names, node1, node2, resistance, source_value, type_codes=None, rated_voltage=None,
+                 storage_value=None):
+        self.names = list(names)
+        if type_codes is None:
+            type_codes = [type_code(name) for name in self.names]
+        self.type_codes = np.asarray(type_codes, dtype=np.int8)
+        self.node1 = np.asarray(node1, dtype=np.int64)
+        self.node2 = np.asarray(node2, dtype=np.int64)
+        self.resistance = np.asarray(resistance, dtype=float)
+        self.source_value = np.asarray(source_value, dtype=float)
+        if rated_voltage is None:
+            rated_voltage = np.zeros(len(self.names))
+        self.rated_voltage = np.asarray(rated_voltage, dtype=float)
+        if storage_value is None:
+            storage_value = np.zeros(len(self.names))
+        self.storage_value = np.asarray(storage_value, dtype=float)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def num_nodes(self):
+        used = np.concatenate([self.node1, self.node2])
+        return int(used.max()) + 1 if len(used) and used.max() >= 0 else 0
+
+    def copy(self):
+        """复制网表的全部数组，得到与元件表脱离的快照（可交给其他线程求解）"""
+        return Netlist(self.names, self.node1.copy(), self.node2.copy(), self.resistance.copy(),
+                       self.source_value.copy(), self.type_codes.copy(), self.rated_voltage.copy(),
+                       self.storage_value.copy())
+
+    def topology(self):
+        """元件类型和节点连接的快照（副本），用于判断拓扑是否变化"""
+        return self.type_codes.copy(), self.node1.copy(), self.node2.copy()
+
+    def same_topology(self, topology):
+        """元件类型和节点连接是否与 topology() 快照相同（数值可以不同）"""
+        return (topology is not None
+                and np.array_equal(self.type_codes, topology[0])
+                and np.array_equal(self.node1, topology[1])
+                and np.array_equal(self.node2, topology[2]))
+
+    @classmethod
+    def from_circuit_dict(cls, data):
+        """
+        由 Circuit.to_dict() 的输出编译网表，不需要 QApplication
+
+        节点编号规则与 Circuit.identify_nodes 相同：按组件顺序遍历连接点，
+        首次出现的连通集合分配新的编号
+        """
+        components = data.get("components", [])
+        node_sets = circuit_solver.DisjointSet()
+        for wire in data.get("wires", []):
+            source = wire.get("source")
+            target = wire.get("target")
+            if source and target:
+                node_sets.union((source["component_index"], source["point_index"]),
+                                (target["component_index"], target["point_index"]))
+
+        names = []
+        node1 = []
+        node2 = []
+        resistance = []
+        source_value = []
+        rated_voltage = []
+        storage_value = []
+        root_to_node = {}
+        for ci, comp in enumerate(components):
+            name = comp["name"]
+            properties = comp.get("properties", {})
+            nodes = []
+            for pi in range(terminal_count(name)):
+                root = node_sets.find((ci, pi))
+                if root not in root_to_node:
+                    root_to_node[root] = len(root_to_node)
+                nodes.append(root_to_node[root])
+            if len(nodes) < 2:
+                nodes = [-1, -1]
+
+            names.append(name)
+            node1.append(nodes[0])
+            node2.append(nodes[1])
+            r, v, rated, storage = component_models.get_model(name).parameters(properties)
+            resistance.append(r)
+            source_value.append(v)
+            rated_voltage.append(rated)
+            storage_value.append(storage)
+
+        return cls(names, node1, node2, resistance, source_value, rated_voltage=rated_voltage,
+                   storage_value=storage_value)
+
+
+class NetlistSolution:
+    """
+    网表求解结果（只读）：解向量、节点电压、电压源支路电流，以及各元件的电压、电流和功率
+    所有数组在构造后设为不可写，结果可以安全地在多处共享
+    """
+
+    __slots__ = ('x', 'node_voltages', 'branch_currents', 'voltage', 'current', 'power', 'connected')
+
+    def __init__(self, x, node_voltages, voltage, current, connected, branch_currents=None):
+        if branch_currents is None:
+            branch_currents = np.zeros(0)
+        values = {
+            'x': x,
+            'node_voltages': node_voltages,
+            'branch_currents': branch_currents,
+            'voltage': voltage,
+            'current': current,
+            'power': np.abs(voltage * current),
+            'connected': connected,  # 两端均已连接、结果有效的元件
+        }
+        for field, value in values.items():
+            value = np.asarray(value)
+            value.flags.writeable = False
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, field, value):
+        raise AttributeError("NetlistSolution is immutable")
+
+    def __len__(self):
+        return len(self.voltage)
+
+
+def canonical_hash(netlist):
+    """
+    电路的规范哈希：只取决于连接关系和元件参数，与元件顺序、节点编号和画布位置无关
+
+    在元件-节点二部图上做 Weisfeiler–Lehman 颜色细化：元件初始颜色为(类型, 电阻, 电源电压)，
+    每轮节点颜色取其所连元件颜色及端子序号的多重集，元件颜色再合并两端节点的颜色，
+    直到颜色划分不再细化。两个电路同构时哈希相同；反之哈希相同的电路在使用缓存结果前
+    还要经过 SolutionCache 的校验。
+
+    Returns:
+        (摘要字符串, 节点颜色数组, 元件颜色数组)
+    """
+    num_nodes = max(netlist.num_nodes, 0)
+    connected = (netlist.node1 >= 0) & (netlist.node2 >= 0)
+    element_color = [hash((int(t), float(f"{r:.12g}"), float(f"{v:.12g}") if s else 0.0, bool(c)))
+                     for t, r, v, s, c in zip(netlist.type_codes, netlist.resistance, netlist.source_value,
+                                              is_voltage_source(netlist.type_codes), connected)]
+    incident = [[] for _ in range(num_nodes)]
+    for k in np.flatnonzero(connected):
+        incident[netlist.node1[k]].append((k, 1))
+        incident[netlist.node2[k]].append((k, 2))
+    node_color = [0] * num_nodes
+
+    num_colors = -1
+    for _ in range(len(netlist) + num_nodes + 1):
+        node_color = [hash(tuple(sorted((element_color[k], end) for k, end in edges))) for edges in incident]
+        element_color = [hash((color, node_color[a], node_color[b]) if c else color)
+                         for color, a, b, c in zip(element_color, netlist.node1, netlist.node2, connected)]
+        count = len(set(node_color)) + len(set(element_color))
+        if count == num_colors:
+            break
+        num_colors = count
+
+    digest = hashlib.blake2b(repr((sorted(element_color), sorted(node_color))).encode(), digest_size=16)
+    return digest.hexdigest(), np.array(node_color, dtype=np.int64), np.array(element_color, dtype=np.int64)
+
+
+class SolutionCache:
+    """
+    按规范哈希缓存求解结果的LRU缓存，按占用内存淘汰最久未用的条目
+
+    缓存内容按颜色保存（节点颜色 -> 电压，元件颜色 -> 电流），命中时映射回当前电路的节点和元件，
+    并用 KCL 和各元件方程校验，校验不通过时视为未命中。可在线程间共享。
+    """
+
+    def __init__(self, max_bytes=SOLUTION_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # 统计：命中、未命中、哈希相同但校验失败、因同色不同值而无法缓存的次数
+        self.stats = {'hits': 0, 'misses': 0, 'rejected': 0, 'uncacheable': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def lookup(self, netlist, ideal):
+        """
+        查找网表的缓存结果
+
+        Args:
+            netlist: 待求解的网表
+            ideal: 按理想导体处理的元件标记
+
+        Returns:
+            (NetlistSolution 或 None, 规范哈希信息)，规范哈希信息供 store() 使用
+        """
+        key = canonical_hash(netlist)
+        with self._lock:
+            entry = self._entries.get(key[0])
+            if entry is not None:
+                self._entries.move_to_end(key[0])
+            else:
+                self.stats['misses'] += 1
+        if entry is None:
+            return None, key
+
+        solution = self._rebuild(netlist, ideal, key, entry)
+        with self._lock:
+            if solution is None:
+                self.stats['rejected'] += 1
+                self.stats['misses'] += 1
+            else:
+                self.stats['hits'] += 1
+        return solution, key
+
+    def store(self, key, solution):
+        """按颜色保存求解结果；同一颜色的节点或元件取值不同时不缓存"""
+        digest, node_color, element_color = key
+        node_values = _values_by_color(node_color, solution.node_voltages)
+        current_values = _values_by_color(element_color, solution.current)
+        if node_values is None or current_values is None:
+            with self._lock:
+                self.stats['uncacheable'] += 1
+            return
+        entry = (node_values, current_values)
+        size = sum(a.nbytes + b.nbytes for a, b in entry) + 256
+        with self._lock:
+            if digest in self._entries:
+                old = self._entries.pop(digest)
+                self.size_bytes -= sum(a.nbytes + b.nbytes for a, b in old) + 256
+            self._entries[digest] = entry
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes and self._entries:
+                _, old = self._entries.popitem(last=False)
+                self.size_bytes -= sum(a.nbytes + b.nbytes for a, b in old) + 256
+
+    def _rebuild(self, netlist, ideal, key, entry):
+        """
+        把按颜色保存的结果映射回当前网表并校验，校验失败返回None
+        缓存不知道方程组的变量编号，结果中的解向量 x 为空，由求解器按符号结构补全（见 NetlistSolver.solve）
+        """
+        _, node_color, element_color = key
+        (node_keys, node_vals), (element_keys, element_vals) = entry
+        node_at = np.searchsorted(node_keys, node_color)
+        element_at = np.searchsorted(element_keys, element_color)
+        if (np.any(node_at >= len(node_keys)) or np.any(element_at >= len(element_keys))
+                or np.any(node_keys[node_at] != node_color) or np.any(element_keys[element_at] != element_color)):
+            return None
+        node_voltages = node_vals[node_at]
+        current = element_vals[element_at].copy()
+
+        connected = (netlist.node1 >= 0) & (netlist.node2 >= 0)
+        conn = np.flatnonzero(connected)
+        a = netlist.node1[conn]
+        b = netlist.node2[conn]
+
+        # 参考节点与直接求解一致：每个连通部分中编号最小的节点电位为0
+        if len(node_voltages):
+            island = circuit_solver.connected_labels(len(node_voltages), a, b)
+            reference = np.full(island.max() + 1, len(node_voltages), dtype=np.int64)
+            np.minimum.at(reference, island, np.arange(len(node_voltages)))
+            node_voltages = node_voltages - node_voltages[reference[island]]
+
+        padded = np.append(node_voltages, 0.0)  # 未连接的端子(-1)取末尾的0
+        v1 = padded[netlist.node1]
+        v2 = padded[netlist.node2]
+        voltage = np.abs(v1 - v2)
+
+        # 校验：各节点KCL、电源两端电压、电阻类元件欧姆定律、理想导体两端等电位
+        scale_i = SOLUTION_CACHE_TOLERANCE * max(1.0, float(np.abs(current).max(initial=0.0)))
+        scale_v = SOLUTION_CACHE_TOLERANCE * max(1.0, float(np.abs(node_voltages).max(initial=0.0)))
+        is_source = is_voltage_source(netlist.type_codes[conn])
+        leaving = np.where(is_source, current[conn], -current[conn])
+        kcl = (np.bincount(a, weights=leaving, minlength=len(node_voltages))
+               - np.bincount(b, weights=leaving, minlength=len(node_voltages)))
+        if np.any(np.abs(kcl) > scale_i * max(1, len(conn))):
+            return None
+        dv = v1[conn] - v2[conn]
+        r = netlist.resistance[conn]
+        ohm_error = np.abs(current[conn] * r + dv)
+        ok = np.where(is_source, np.abs(dv - netlist.source_value[conn]) <= scale_v,
+                      ohm_error <= scale_v + SOLUTION_CACHE_TOLERANCE * np.abs(dv))
+        ok |= ideal[conn] & (np.abs(dv) <= scale_v)
+        if not np.all(ok):
+            return None
+
+        source_index = np.flatnonzero(is_voltage_source(netlist.type_codes) & connected)
+        return NetlistSolution(np.zeros(0), node_voltages, voltage, current, connected, current[source_index])
+
+
+def _values_by_color(colors, values):
+    """同色元素取值相同时返回 (排序后的颜色, 对应取值)，否则返回None"""
+    if len(colors) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    order = np.argsort(colors, kind='stable')
+    colors = colors[order]
+    values = np.asarray(values, dtype=float)[order]
+    unique, first = np.unique(colors, return_index=True)
+    representative = values[first]
+    spread = np.abs(values - np.repeat(representative, np.diff(np.append(first, len(colors)))))
+    if np.any(spread > SOLUTION_CACHE_TOLERANCE * max(1.0, float(np.abs(values).max()))):
+        return None
+    return unique, representative
+
+
+class _IdealCurrentRecovery:
+    """
+    合并节点后理想导体的电流恢复
+
+    理想导体两端电位相同，其电流由KCL确定：各原始节点上其余元件流出的电流之和
+    必须经由理想导体流走。理想导体构成回路时按其标称电导分流，
+    即求解以标称电导加权的拉普拉斯方程（每个连通分量固定一个节点的电位）。
+    """
+
+    def __init__(self, netlist, ideal_index, others):
+        k = len(ideal_index)
+        ideal_a = netlist.node1[ideal_index]
+        ideal_b = netlist.node2[ideal_index]
+        nodes, local = np.unique(np.concatenate([ideal_a, ideal_b]), return_inverse=True)
+        local_a, local_b = local[:k], local[k:]
+        m = len(nodes)
+        self.ideal_a = local_a
+        self.ideal_b = local_b
+        r = netlist.resistance[ideal_index]
+        self.g = 1.0 / np.where(r > 0, r, IDEAL_CONDUCTOR_RESISTANCE)
+
+        # 其余元件在理想导体节点上的注入：电阻类元件电流 (v2-v1)/r 从node2流向node1，
+        # 电压源支路电流从正极(node1)流入电源
+        local_of = np.full(netlist.num_nodes, -1, dtype=np.int64)
+        local_of[nodes] = np.arange(m)
+        sign = np.where(is_voltage_source(netlist.type_codes[others]), 1.0, -1.0)
+        rows = []
+        cols = []
+        vals = []
+        for end_nodes, end_sign in ((netlist.node1[others], sign), (netlist.node2[others], -sign)):
+            at = local_of[end_nodes]
+            hit = at >= 0
+            rows.append(at[hit])
+            cols.append(others[hit])
+            vals.append(end_sign[hit])
+        self.injection = sp.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                                       shape=(m, len(netlist)))
+
+        # 加权拉普拉斯矩阵，每个连通分量去掉第一个节点（电位取0）后分解
+        labels = circuit_solver.connected_labels(m, local_a, local_b)
+        keep = np.ones(m, dtype=bool)
+        keep[np.unique(labels, return_index=True)[1]] = False
+        self.keep = keep
+        self.factorization = None
+        if keep.any():
+            laplacian = sp.coo_matrix(
+                (np.concatenate([self.g, self.g, -self.g, -self.g]),
+                 (np.concatenate([local_a, local_b, local_a, local_b]),
+                  np.concatenate([local_a, local_b, local_b, local_a]))), shape=(m, m)).tocsc()
+            reduced = laplacian[keep][:, keep]
+            if not circuit_solver.use_sparse(reduced.shape[0]):
+                reduced = reduced.toarray()
+            self.factorization = circuit_solver.LUFactorization(reduced)
+
+    def currents(self, current):
+        """
+        由其余元件的电流计算理想导体的电流，current 可以带前置的批量维度
+
+        Returns:
+            理想导体电流，约定与电阻类元件相同：正值表示从node2流向node1
+        """
+        batch_shape = current.shape[:-1]
+        flat = current.reshape(-1, current.shape[-1])
+        # Lφ = -注入，φ 为理想导体网络上的辅助电位
+        rhs = -(self.injection @ flat.T)
+        phi = np.zeros_like(rhs)
+        if self.factorization is not None:
+            phi[self.keep] = self.factorization.solve(rhs[self.keep])
+        ideal_current = self.g[:, None] * (phi[self.ideal_b] - phi[self.ideal_a])
+        return ideal_current.T.reshape(batch_shape + (len(self.g),))
+
+    def weights(self, k):
+        """
+        第k个理想导体的电流表示为其余元件电流的线性组合 I_k = wᵀ·current，返回长度为元件数的系数 w
+        拉普拉斯矩阵对称，只需一次回代
+        """
+        d = np.zeros(len(self.keep))
+        np.add.at(d, [self.ideal_b[k], self.ideal_a[k]], [self.g[k], -self.g[k]])
+        psi = np.zeros_like(d)
+        if self.factorization is not None:
+            psi[self.keep] = self.factorization.solve(d[self.keep])
+        return -(self.injection.T @ psi)
+
+
+class NetlistSolver:
+    """
+    在 Netlist 上求解直流工作点
+    理想导体两端的节点在组装前合并；网表拓扑不变时复用 MNA 符号结构和 LU 分解，
+    少量元件变化时使用低秩更新
+    """
+
+    def __init__(self, sparse=None, cache=None):
+        self.sparse = sparse
+        # 可选的求解结果缓存（SolutionCache），可在多个求解器之间共享
+        self.cache = cache
+        self.reuse_factorization = True
+        # 是否在组装前合并理想导体两端的节点
+        self.collapse_ideal = True
+        # 单电源的串并联电路是否按串并联化简直接求解（不建矩阵），无法化简时仍用 MNA
+        self.reduce_series_parallel = True
+        self.structure = None
+        # MNA符号结构缓存：(拓扑, 理想导体标记, 稀疏选项) -> MNAStructure，
+        # 每个结构上保存其最近一次的LU分解（factorization / factorized_conductances）
+        self._structures = {}
+        # 是否按非线性灯丝模型求解小灯泡（否则按固定的"电阻值"处理）
+        self.nonlinear_bulbs = True
+        # 作为激励的元件类型：不含这些元件的孤岛电压、电流均为0，不参与求解
+        # （瞬态分析中储能元件的初始状态也是激励）
+        self.excitation_types = tuple(component_models.codes_where("stamp", STAMP_VOLTAGE_SOURCE))
+        # 求解统计：完整分解次数、基于缓存分解的低秩更新次数，
+        # 以及非线性求解次数、牛顿迭代总次数和未收敛次数
+        self.solve_counts = {'factorizations': 0, 'low_rank_updates': 0, 'series_parallel': 0,
+                             'newton_solves': 0, 'newton_iterations': 0, 'newton_failures': 0}
+        # 最近一次非线性求解的迭代次数
+        self.last_newton_iterations = 0
+        # 可选的分阶段计时器（perf_stats.PhaseTimer），记录组装与求解两个阶段
+        self.timer = None
+
+    def ideal_conductors(self, netlist, connected):
+        """按类型和电阻判断哪些已连接的元件作为理想导体合并"""
+        if not self.collapse_ideal:
+            return np.zeros(len(netlist), dtype=bool)
+        return (connected & is_ideal_conductor_type(netlist.type_codes)
+                & (netlist.resistance <= IDEAL_CONDUCTOR_RESISTANCE) & (netlist.node1 != netlist.node2))
+
+    def prepare(self, netlist, sparse=None):
+        """
+        获取网表对应的MNA符号结构，拓扑和理想导体集合不变时直接复用
+        返回None表示方程组为空
+        """
+        sparse = self.sparse if sparse is None else sparse
+        connected = (netlist.node1 >= 0) & (netlist.node2 >= 0)
+        ideal = self.ideal_conductors(netlist, connected)
+        key = (netlist.type_codes.tobytes(), netlist.node1.tobytes(), netlist.node2.tobytes(),
+               ideal.tobytes(), sparse)
+        structure = self._structures.get(key)
+        if structure is not None:
+            self.structure = structure
+            return structure
+
+        is_source = is_voltage_source(netlist.type_codes)
+        source_index = np.flatnonzero(is_source & connected)
+        num_nodes = netlist.num_nodes
+
+        # 合并理想导体两端的节点；被理想导体短接的电源所在的那组导体仍按电阻处理
+        labels = np.arange(num_nodes)
+        if ideal.any():
+            labels = circuit_solver.connected_labels(num_nodes, netlist.node1[ideal], netlist.node2[ideal])
+            shorted = labels[netlist.node1[source_index]] == labels[netlist.node2[source_index]]
+            if shorted.any():
+                ideal &= ~np.isin(labels[netlist.node1], labels[netlist.node1[source_index[shorted]]])
+                labels = circuit_solver.connected_labels(num_nodes, netlist.node1[ideal], netlist.node2[ideal])
+
+        others = np.flatnonzero(connected & ~ideal)
+        if len(others) == 0:
+            return None
+        num_merged = labels.max() + 1
+        others_a = labels[netlist.node1[others]]
+        others_b = labels[netlist.node2[others]]
+
+        # 按合并后的节点划分互不相连的子电路（孤岛）。不含电源的孤岛没有激励，
+        # 其中各元件的电压、电流均为0，直接排除在方程组之外
+        island = circuit_solver.connected_labels(num_merged, others_a, others_b)
+        exciting = np.flatnonzero(connected & np.isin(netlist.type_codes, self.excitation_types))
+        excited = np.unique(island[labels[netlist.node1[exciting]]])
+        used = np.unique(np.concatenate([others_a, others_b]))
+        used = used[np.isin(island[used], excited)]
+
+        # 每个孤岛中编号最小的节点作为该孤岛的参考节点(地)，不包含在方程中
+        _, first = np.unique(island[used], return_index=True)
+        is_reference = np.zeros(len(used), dtype=bool)
+        is_reference[first] = True
+        variables = used[~is_reference]
+
+        merged_index = np.full(num_merged, -1, dtype=np.int64)
+        merged_index[variables] = np.arange(len(variables))
+        node_index = merged_index[labels]
+
+        element_island = np.full(len(netlist), -1, dtype=np.int64)
+        element_island[connected] = island[labels[netlist.node1[connected]]]
+
+        # 参考节点在矩阵中没有对应行列，node_index 中为-1
+        is_branch = np.isin(netlist.type_codes, component_models.codes_where("stamp", STAMP_CONDUCTANCE))
+        branch_index = np.flatnonzero(is_branch & connected & ~ideal & np.isin(element_island, excited))
+        branch_nodes = np.stack([node_index[netlist.node1[branch_index]],
+                                 node_index[netlist.node2[branch_index]]], axis=1)
+        # 电压源方程: v1 - v2 = V
+        source_nodes = np.stack([node_index[netlist.node1[source_index]],
+                                 node_index[netlist.node2[source_index]]], axis=1)
+
+        structure = circuit_solver.MNAStructure(len(variables), branch_nodes, source_nodes, sparse)
+        structure.node_index = node_index
+        structure.branch_index = branch_index
+        structure.source_index = source_index
+        structure.element_island = element_island
+        # 多个孤岛时记录每个孤岛的变量，整体分解失败时逐个孤岛求解
+        structure.island_variables = []
+        if len(excited) > 1:
+            variable_island = np.concatenate([island[variables], island[labels[netlist.node1[source_index]]]])
+            structure.island_variables = [(i, np.flatnonzero(variable_island == i)) for i in excited]
+        structure.ideal_index = np.flatnonzero(ideal)
+        structure.ideal_recovery = (_IdealCurrentRecovery(netlist, structure.ideal_index, others)
+                                    if len(structure.ideal_index) else None)
+        # 按印记函数预先分组的下标：印记顺序中的两端元件、全部元件，求解时按组整体求电导
+        structure.conductance_groups = conductance_groups(netlist.type_codes[branch_index])
+        structure.element_groups = conductance_groups(netlist.type_codes)
+        structure.factorization = None
+        structure.factorized_conductances = None
+        # 上一次非线性求解收敛时的 (灯泡在印记顺序中的位置, 灯泡电压)，作为下次迭代的初值
+        structure.operating_point = None
+        # 串并联化简计划只取决于拓扑，首次需要时规划（None 表示无法化简）
+        structure.reduction_plan = None
+        structure.reduction_planned = False
+
+        if len(self._structures) >= STRUCTURE_CACHE_SIZE:
+            del self._structures[next(iter(self._structures))]
+        self._structures[key] = structure
+        self.structure = structure
+        return structure
+
+    def conductances(self, netlist, structure):
+        """按印记顺序取两端元件的电导（按类型分组调用各自的印记函数），无效电阻的元件电导记为0"""
+        return stamp_conductances(structure.conductance_groups, netlist.resistance[structure.branch_index])
+
+    def rhs(self, netlist, structure):
+        return structure.rhs(netlist.source_value[structure.source_index])
+
+    def build_system(self, netlist, sparse=None):
+        """组装 MNA 方程组，返回 (A, z, structure)，方程组为空时返回 (None, None, None)"""
+        structure = self.prepare(netlist, sparse)
+        if structure is None:
+            return None, None, None
+        return structure.assemble(self.conductances(netlist, structure)), self.rhs(netlist, structure), structure
+
+    def factorize(self, structure, g):
+        """返回电导向量g下的LU分解，与该结构上缓存的分解一致时直接复用"""
+        if (structure.factorization is not None
+                and np.array_equal(g, structure.factorized_conductances)):
+            return structure.factorization
+
+        factorization = circuit_solver.LUFactorization(structure.assemble(g))
+        self.solve_counts['factorizations'] += 1
+        if self.reuse_factorization:
+            structure.factorization = factorization
+            structure.factorized_conductances = g
+        return factorization
+
+    def nonlinear_elements(self, netlist):
+        """按非线性灯丝模型求解的元件：设置了额定电压且电阻有效的小灯泡"""
+        if not self.nonlinear_bulbs:
+            return np.zeros(len(netlist), dtype=bool)
+        return ((netlist.type_codes == TYPE_BULB) & (netlist.rated_voltage > 0)
+                & (netlist.resistance > 0) & np.isfinite(netlist.resistance))
+
+    def solve(self, netlist):
+        """
+        求解网表的直流工作点
+        复用模式下：电导未变时直接用缓存的LU分解回代；少数元件（如开关切换、滑片移动）
+        变化时用 Sherman–Morrison/Woodbury 低秩更新；其余情况重新组装并分解。
+        含非线性小灯泡时用牛顿迭代求工作点（见 solve_nonlinear）
+
+        电路含多个互不相连的孤岛且整体分解失败时，逐个孤岛求解，
+        无法求解的孤岛中的元件在结果中标记为无效，不影响其余孤岛
+
+        Returns:
+            NetlistSolution，方程组为空时返回None
+
+        Raises:
+            np.linalg.LinAlgError: 方程组奇异（多个孤岛时为全部孤岛都无法求解）
+        """
+        timer = self.timer
+        t = timer.clock() if timer is not None else 0.0
+
+        nonlinear = self.nonlinear_elements(netlist)
+        cache_key = None
+        # 结果缓存按线性元件方程校验，含非线性元件的电路不使用缓存
+        if self.cache is not None and 0 < len(netlist) <= SOLUTION_CACHE_MAX_ELEMENTS and not nonlinear.any():
+            connected = (netlist.node1 >= 0) & (netlist.node2 >= 0)
+            cached, cache_key = self.cache.lookup(netlist, self.ideal_conductors(netlist, connected))
+            if cached is not None:
+                structure = self.prepare(netlist)
+                if structure is not None:
+                    x = self.solution_vector(structure, cached.node_voltages, cached.current)
+                    cached = NetlistSolution(x, cached.node_voltages, cached.voltage, cached.current,
+                                             cached.connected, cached.branch_currents)
+                if timer is not None:
+                    timer.lap('solve', t)
+                return cached
+
+        structure = self.prepare(netlist)
+        if structure is None:
+            return None
+        g = self.conductances(netlist, structure)
+        z = self.rhs(netlist, structure)
+        if timer is not None:
+            t = timer.lap('build_mna', t)
+
+        bulbs = np.flatnonzero(nonlinear[structure.branch_index])
+        if len(bulbs):
+            x, failed, netlist = self.solve_nonlinear(netlist, structure, g, z, bulbs)
+        else:
+            x = self.solve_series_parallel(structure, g, z) if self.reduce_series_parallel else None
+            failed = []
+            if x is None:
+                x, failed = self.solve_linear(structure, g, z)
+
+        node_voltages, voltage, current = self.component_values(netlist, structure, x)
+        connected = (netlist.node1 >= 0) & (netlist.node2 >= 0)
+        if failed:
+            connected &= ~np.isin(structure.element_island, failed)
+        branch_currents = x[structure.num_node_vars:]
+        solution = NetlistSolution(x, node_voltages, voltage, current, connected, branch_currents)
+        if cache_key is not None and not failed:
+            self.cache.store(cache_key, solution)
+        if timer is not None:
+            timer.lap('solve', t)
+        return solution
+
+    def solution_vector(self, structure, node_voltages, current):
+        """由节点电压和各元件电流拼出与直接求解布局相同的解向量（节点电压变量在前，电源支路电流在后）"""
+        x = np.zeros(structure.n)
+        variable = structure.node_index >= 0
+        x[structure.node_index[variable]] = node_voltages[variable]
+        x[structure.num_node_vars:] = current[structure.source_index]
+        return x
+
+    def reduction_plan(self, structure):
+        """结构对应的串并联化简计划（见 series_parallel.plan_reduction），无法化简时返回None"""
+        if not structure.reduction_planned:
+            structure.reduction_plan = series_parallel.plan_reduction(structure)
+            structure.reduction_planned = True
+            logger.debug(f"串并联化简: {'可以' if structure.reduction_plan is not None else '无法'}化简")
+        return structure.reduction_plan
+
+    def solve_series_parallel(self, structure, g, z):
+        """
+        按串并联化简求解，不组装、不分解矩阵
+
+        Returns:
+            解向量，电路无法化简或含无效电阻的元件时返回None
+        """
+        plan = self.reduction_plan(structure)
+        if plan is None or not np.all(g > 0):
+            return None
+        voltage = float(z[structure.num_node_vars])
+        potential, _, total = series_parallel.solve(plan, g.tolist(), voltage)
+        x = np.empty(structure.n)
+        x[:structure.num_node_vars] = potential[:-1]
+        # 电源的支路电流变量为从正极流入电源的电流
+        x[structure.num_node_vars] = -voltage / total
+        self.solve_counts['series_parallel'] += 1
+        return x
+
+    def series_parallel(self, netlist):
+        """
+        串并联化简的推导过程，供提示系统展示；非线性小灯泡按工作点电阻 U/I 计算，与电表读数一致
+
+        Returns:
+            series_parallel.Reduction，电路无法化简（桥式连接、多个电源等）时返回None
+        """
+        structure = self.prepare(netlist)
+        if structure is None:
+            return None
+        plan = self.reduction_plan(structure)
+        if plan is not None and self.nonlinear_elements(netlist).any():
+            try:
+                netlist = self.operating_point(netlist)[3]
+            except np.linalg.LinAlgError:
+                return None
+        g = self.conductances(netlist, structure)
+        if plan is None or not np.all(g > 0):
+            return None
+        voltage = float(netlist.source_value[structure.source_index[0]])
+        _, resistances, _ = series_parallel.solve(plan, g.tolist(), voltage)
+        return series_parallel.Reduction(plan, resistances, voltage, structure.branch_index)
+
+    def solve_linear(self, structure, g, z):
+        """
+        求解电导为g、右端项为z的线性方程组，优先对缓存的分解做低秩更新
+
+        Returns:
+            (解向量, 无法求解的孤岛编号列表)
+        """
+        x = None
+        if self.reuse_factorization and structure.factorization is not None:
+            x = circuit_solver.low_rank_update_solve(
+                structure.factorization, structure, structure.factorized_conductances, g, z)
+            if x is not None:
+                self.solve_counts['low_rank_updates'] += 1
+                return x, []
+            logger.debug("低秩更新不适用或病态，重新分解矩阵")
+        if structure.n == 0:
+            # 所有孤岛都没有电源
+            return np.zeros(0), []
+        try:
+            return self.factorize(structure, g).solve(z), []
+        except np.linalg.LinAlgError:
+            if not structure.island_variables:
+                raise
+            return self.solve_islands(structure, g, z)
+
+    def solve_nonlinear(self, netlist, structure, g, z, bulbs):
+        """
+        牛顿-拉夫逊法求含非线性小灯泡的工作点
+        每次迭代在当前灯泡电压处线性化：灯泡换为微分电导 G = dI/dV 并联等效电流源 I - G·V，
+        重新印记后求解。只有灯泡的电导变化，少量灯泡时每次迭代都是对缓存分解的低秩更新。
+        初值取同一结构上一次收敛的工作点（没有时从冷态出发），拖动滑块等小幅改动通常一两次迭代即收敛；
+        单次迭代的灯泡电压变化限制在 NEWTON_STEP_LIMIT 倍的额定电压（或当前电压）以内，且不越过0
+
+        Args:
+            bulbs: 非线性灯泡在印记顺序（structure.branch_index）中的位置
+
+        Returns:
+            (解向量, 无法求解的孤岛编号列表, 灯泡电阻换为工作点电阻的网表)
+        """
+        elements = structure.branch_index[bulbs]
+        hot_resistance = netlist.resistance[elements]
+        rated_voltage = netlist.rated_voltage[elements]
+        v = np.zeros(len(bulbs))
+        previous = structure.operating_point
+        if previous is not None and np.array_equal(previous[0], bulbs):
+            v = previous[1].copy()
+
+        converged = False
+        iterations = 0
+        while iterations < NEWTON_MAX_ITERATIONS:
+            iterations += 1
+            _, current, conductance = bulb_characteristic(v, hot_resistance, rated_voltage)
+            g_k = g.copy()
+            g_k[bulbs] = conductance
+            # 等效电流源 J = I - G·V 从 node1 流经灯泡到 node2
+            z_k = structure.stamp_currents(z.copy(), bulbs, current - conductance * v)
+            x, failed = self.solve_linear(structure, g_k, z_k)
+
+            v_new = structure.branch_voltages(x, bulbs)
+            step = v_new - v
+            if np.all(np.abs(step) <= NEWTON_ABSTOL + NEWTON_RELTOL * np.abs(v_new)):
+                v = v_new
+                converged = True
+                break
+            limit = NEWTON_STEP_LIMIT * np.maximum(rated_voltage, np.abs(v))
+            v_next = v + np.clip(step, -limit, limit)
+            # 电流随电压饱和，越过0的牛顿步会越走越远（如灯泡所在支路断开时）：先停在0处。
+            # 伏安特性在0的两侧分别为凹、凸函数，从0出发的迭代单调逼近解
+            v = np.where(v * v_next < 0, 0.0, v_next)
+
+        self.last_newton_iterations = iterations
+        self.solve_counts['newton_solves'] += 1
+        self.solve_counts['newton_iterations'] += iterations
+        if converged:
+            structure.operating_point = (bulbs, v)
+        else:
+            self.solve_counts['newton_failures'] += 1
+            structure.operating_point = None
+            logger.warning(f"小灯泡工作点迭代 {iterations} 次未收敛，使用最后一次迭代结果")
+
+        # 元件电流按工作点电阻计算
+        effective = netlist.copy()
+        effective.resistance[elements] = bulb_characteristic(v, hot_resistance, rated_voltage)[0]
+        return x, failed, effective
+
+    def solve_islands(self, structure, g, z):
+        """
+        分别求解每个孤岛对应的对角块，规模较大时多个孤岛并行分解
+
+        Returns:
+            (解向量, 无法求解的孤岛编号列表)，无法求解的孤岛对应的变量取0
+
+        Raises:
+            np.linalg.LinAlgError: 所有孤岛都无法求解
+        """
+        A = structure.assemble(g)
+        if structure.sparse:
+            A = A.tocsc()
+
+        def solve_block(item):
+            island, variables = item
+            block = A[variables][:, variables] if structure.sparse else A[np.ix_(variables, variables)]
+            try:
+                return island, variables, circuit_solver.LUFactorization(block).solve(z[variables])
+            except np.linalg.LinAlgError:
+                return island, variables, None
+
+        if circuit_solver.use_sparse(structure.n):
+            # LAPACK / SuperLU 分解时释放GIL，大电路的多个孤岛可以并行
+            with ThreadPoolExecutor(max_workers=min(len(structure.island_variables), os.cpu_count() or 1)) as pool:
+                results = list(pool.map(solve_block, structure.island_variables))
+        else:
+            results = [solve_block(item) for item in structure.island_variables]
+
+        x = np.zeros(structure.n)
+        failed = []
+        for island, variables, values in results:
+            if values is None:
+                failed.append(island)
+            else:
+                x[variables] = values
+        if len(failed) == len(results):
+            raise np.linalg.LinAlgError("Singular matrix")
+        logger.warning(f"{len(failed)} 个孤立子电路无法求解，已跳过")
+        return x, failed
+
+    def component_values(self, netlist, structure, x, element_currents=None):
+        """
+        由解向量计算节点电压及各元件的电压、电流，x 可以带前置的批量维度，也可以是复相量
+
+        元件电压取两端电压差的绝对值；电流 = (v2 - v1)·G（G 由各类型的印记函数求出），电源电流取支路电流变量，
+        element_currents=(元件下标, 电流) 给出不按电阻计算的元件电流（如瞬态分析中的电容、电感），
+        合并掉的理想导体电流由KCL恢复
+
+        Returns:
+            (node_voltages, voltage, current)
+        """
+        x = np.asarray(x)
+        node_index = structure.node_index
+        # 末尾补一个0，参考节点和未参与方程的节点都映射到该位置
+        padded = np.concatenate([x, np.zeros(x.shape[:-1] + (1,))], axis=-1)
+        node_voltages = padded[..., np.where(node_index >= 0, node_index, x.shape[-1])]
+        v1, v2 = terminal_voltages(netlist, node_voltages)
+        voltage = np.abs(v1 - v2)
+
+        current = (v2 - v1) * stamp_conductances(structure.element_groups, netlist.resistance)
+        current[..., structure.source_index] = x[..., structure.num_node_vars + np.arange(structure.num_sources)]
+        if element_currents is not None:
+            current[..., element_currents[0]] = element_currents[1]
+        if structure.ideal_recovery is not None:
+            current[..., structure.ideal_index] = structure.ideal_recovery.currents(current)
+        return node_voltages, voltage, current
+
+    def operating_point(self, netlist):
+        """
+        求直流工作点及该处的雅可比矩阵电导（线性电路即各元件电导，小灯泡取微分电导 dI/dV）
+
+        Returns:
+            (structure, 解向量, 雅可比电导, 灯泡电阻换为工作点电阻的网表)
+
+        Raises:
+            np.linalg.LinAlgError: 方程组为空或奇异
+        """
+        structure = self.prepare(netlist)
+        if structure is None or structure.n == 0:
+            raise np.linalg.LinAlgError("Empty system")
+        g = self.conductances(netlist, structure)
+        z = self.rhs(netlist, structure)
+        bulbs = np.flatnonzero(self.nonlinear_elements(netlist)[structure.branch_index])
+        if len(bulbs) == 0:
+            x, _ = self.solve_linear(structure, g, z)
+            return structure, x, g, netlist
+        x, _, effective = self.solve_nonlinear(netlist, structure, g, z, bulbs)
+        elements = structure.branch_index[bulbs]
+        jacobian = g.copy()
+        jacobian[bulbs] = bulb_characteristic(structure.branch_voltages(x, bulbs), netlist.resistance[elements],
+                                              netlist.rated_voltage[elements])[2]
+        return structure, x, jacobian, effective
+
+    def thevenin(self, netlist, node_a, node_b):
+        """
+        从节点 node_a、node_b 两端看进去的戴维南等效电路
+
+        开路电压取直流工作点的 v(a) - v(b)；等效电阻为电源置零后从 a 注入、从 b 流出 1A 电流时的两点电压，
+        与工作点共用同一个分解（线性电路即直流求解缓存的分解），只多一次回代。
+        含小灯泡时等效电阻按工作点处的微分电阻计算（小信号等效）
+
+        Returns:
+            (开路电压, 等效电阻)，两点被理想导体或电源直接相连时等效电阻为0
+
+        Raises:
+            ValueError: 两个节点不在同一个有电源的连通电路中
+            np.linalg.LinAlgError: 方程组为空或奇异
+        """
+        structure, x, jacobian, _ = self.operating_point(netlist)
+        # 参考节点与未参与方程的节点都映射到末尾补的0上
+        index = np.where(structure.node_index >= 0, structure.node_index, structure.n)
+        ia, ib = index[node_a], index[node_b]
+        islands = structure.element_island
+        island_of = np.full(netlist.num_nodes, -1, dtype=np.int64)
+        connected = islands >= 0
+        island_of[netlist.node1[connected]] = islands[connected]
+        island_of[netlist.node2[connected]] = islands[connected]
+        excited = np.unique(islands[np.concatenate([structure.branch_index, structure.source_index])])
+        if island_of[node_a] < 0 or island_of[node_a] != island_of[node_b] or island_of[node_a] not in excited:
+            raise ValueError("两个节点不在同一个有电源的连通电路中")
+
+        padded = np.append(x, 0.0)
+        voltage = float(padded[ia] - padded[ib])
+        rhs = np.zeros(structure.n + 1)
+        rhs[ia] += 1.0
+        rhs[ib] -= 1.0
+        response = np.append(self.factorize(structure, jacobian).solve(rhs[:-1]), 0.0)
+        return voltage, float(response[ia] - response[ib])
+
+    def sensitivity(self, netlist, element, quantity=None):
+        """
+        伴随法灵敏度：第element个元件的读数对所有元件电阻和电源电压的导数
+
+        读数 y 是工作点 x 的函数，x 满足 F(x, p) = 0，则 dy/dp = ∂y/∂p - λᵀ·∂F/∂p，其中 Jᵀλ = ∂y/∂x，
+        J 为工作点处的雅可比矩阵（线性电路即 MNA 矩阵，复用直流求解缓存的LU分解；
+        含小灯泡时灯泡取微分电导）。所有参数的导数只需一次转置回代，而不是每个参数各求解一次。
+        元件电流 I = v/R（小灯泡的工作点电阻与额定电阻成正比）对电阻的偏导均为 -I/R。
+        合并掉的理想导体（导线、闭合的开关、电流表）不在方程组中，其电阻的导数记为0
+
+        Args:
+            netlist: 电路网表
+            element: 读数所在元件的下标
+            quantity: "current" 或 "voltage"，默认电流表取电流，其余元件取电压；
+                      电流的符号约定与直流求解相同，电压为两端电压差的绝对值
+
+        Returns:
+            (读数, 对各元件电阻的导数, 对各电源电压的导数)，后两者长度为元件数
+
+        Raises:
+            np.linalg.LinAlgError: 方程组为空或奇异
+        """
+        if quantity is None:
+            quantity = "current" if netlist.type_codes[element] == TYPE_AMMETER else "voltage"
+        structure, x, jacobian, effective = self.operating_point(netlist)
+        _, voltage, current = self.component_values(effective, structure, x)
+
+        # 读数 y = wᵀ·current（电流）或 ±(v1 - v2)（电压），dy_dx 为其对解向量的偏导
+        num_elements = len(netlist)
+        weights = np.zeros(num_elements)
+        dy_dx = np.zeros(structure.n)
+        if quantity == "current":
+            reading = current[element]
+            ideal = np.flatnonzero(structure.ideal_index == element)
+            if len(ideal):
+                weights = structure.ideal_recovery.weights(ideal[0])
+            else:
+                weights[element] = 1.0
+            # 电阻类元件电流 (v2 - v1)·G，电源电流为支路电流变量
+            w_branch = weights[structure.branch_index]
+            dy_dx -= structure.incidence_matrix(np.flatnonzero(w_branch)) @ (w_branch * jacobian)[w_branch != 0]
+            dy_dx[structure.num_node_vars:] += weights[structure.source_index]
+        else:
+            reading = voltage[element]
+            ends = np.array([netlist.node1[element], netlist.node2[element]])
+            ends = np.where(ends >= 0, structure.node_index[np.maximum(ends, 0)], -1)
+            # 索引-1（参考节点或未连接）落在末尾补的0上
+            padded = np.append(x, 0.0)
+            sign = 1.0 if padded[ends[0]] >= padded[ends[1]] else -1.0
+            np.add.at(dy_dx, ends[ends >= 0], np.array([sign, -sign])[ends >= 0])
+
+        adjoint = self.factorize(structure, jacobian).solve(dy_dx, transpose=True)
+
+        d_resistance = np.zeros(num_elements)
+        branches = structure.branch_index
+        r = netlist.resistance[branches]
+        valid = (r > 0) & np.isfinite(r)
+        # 元件从 node1 流向 node2 的电流为 -current，∂I/∂R = -I/R
+        through = -current[branches]
+        coupling = weights[branches] + structure.branch_voltages(adjoint, np.arange(len(branches)))
+        d_resistance[branches] = np.where(valid, coupling * through / np.where(valid, r, 1.0), 0.0)
+
+        d_source = np.zeros(num_elements)
+        d_source[structure.source_index] = adjoint[structure.num_node_vars:]
+        return reading, d_resistance, d_source
+
+    def sweep_resistance(self, netlist, index, resistances):
+        """
+        扫描第index个两端元件的电阻，一次性求出所有取值下各元件的电压和电流
+
+        Returns:
+            (voltage, current)，形状均为 (m, 元件数)
+        """
+        if self.nonlinear_elements(netlist).any():
+            return self._sweep_by_solving(netlist, 'resistance', index, resistances)
+        structure = self.prepare(netlist)
+        if structure is None:
+            raise np.linalg.LinAlgError("Empty system")
+        g = self.conductances(netlist, structure)
+        z = self.rhs(netlist, structure)
+        factorization = self.factorize(structure, g)
+
+        branch = np.flatnonzero(structure.branch_index == index)
+        resistances = np.asarray(resistances, dtype=float)
+        if len(branch) == 0:
+            # 未接入方程的元件不影响结果
+            X = np.repeat(factorization.solve(z)[None, :], len(resistances), axis=0)
+        else:
+            branch_conductances = component_models.model_for_code(netlist.type_codes[index]).conductance(resistances)
+            X = circuit_solver.sweep_conductance(structure, factorization, g, z, branch[0], branch_conductances)
+
+        batch = netlist_with_resistance(netlist, index, resistances)
+        _, voltage, current = self.component_values(batch, structure, X)
+        return voltage, current
+
+    def sweep_source(self, netlist, index, voltages):
+        """
+        扫描第index个电压源的电压：每个取值一列右端项，共用同一个分解
+
+        Returns:
+            (voltage, current)，形状均为 (m, 元件数)
+        """
+        if self.nonlinear_elements(netlist).any():
+            return self._sweep_by_solving(netlist, 'source_value', index, voltages)
+        structure = self.prepare(netlist)
+        if structure is None:
+            raise np.linalg.LinAlgError("Empty system")
+        factorization = self.factorize(structure, self.conductances(netlist, structure))
+        z = self.rhs(netlist, structure)
+
+        voltages = np.asarray(voltages, dtype=float)
+        Z = np.repeat(z[:, None], len(voltages), axis=1)
+        j = np.flatnonzero(structure.source_index == index)
+        if len(j):
+            Z[structure.num_node_vars + j[0], :] = voltages
+        X = factorization.solve(Z).T
+        _, voltage, current = self.component_values(netlist, structure, X)
+        return voltage, current
+
+    def _sweep_by_solving(self, netlist, column, index, values):
+        """含非线性元件时工作点不随参数线性变化：逐个取值求解，每次以上一个取值的工作点为初值"""
+        sweep = netlist.copy()
+        voltage = np.zeros((len(values), len(netlist)))
+        current = np.zeros((len(values), len(netlist)))
+        timer, self.timer = self.timer, None  # 扫描不计入求解阶段的耗时统计
+        try:
+            for k, value in enumerate(values):
+                getattr(sweep, column)[index] = value
+                solution = self.solve(sweep)
+                if solution is None:
+                    raise np.linalg.LinAlgError("Empty system")
+                voltage[k] = solution.voltage
+                current[k] = solution.current
+        finally:
+            self.timer = timer
+        return voltage, current
+
+
+def terminal_voltages(netlist, node_voltages):
+    """
+    各元件两端的节点电压 (v1, v2)，未连接的端子记为0，node_voltages 可以带前置的批量维度
+
+    Returns:
+        (v1, v2)，形状均为 node_voltages.shape[:-1] + (元件数,)
+    """
+    def voltage_at(nodes):
+        valid = nodes >= 0
+        return np.where(valid, node_voltages[..., np.where(valid, nodes, 0)], 0.0)
+
+    return voltage_at(netlist.node1), voltage_at(netlist.node2)
+
+
+def netlist_with_resistance(netlist, index, resistances):
+    """返回电阻数组带批量维度的网表副本，第index个元件的电阻依次取resistances中的值"""
+    resistance = np.repeat(netlist.resistance[None, :], len(resistances), axis=0)
+    resistance[:, index] = resistances
+    return Netlist(netlist.names, netlist.node1, netlist.node2, resistance, netlist.source_value,
+                   netlist.type_codes, netlist.rated_voltage, netlist.storage_value)
+
+
+class _Column:
+    """ComponentRecord 的字段描述符：读写 ComponentTable 中对应列的一个元素"""
+
+    def __init__(self, column, convert):
+        self.column = column
+        self.convert = convert
+
+    def __get__(self, record, owner=None):
+        if record is None:
+            return self
+        return self.convert(getattr(record.table, self.column)[record.row])
+
+    def __set__(self, record, value):
+        getattr(record.table, self.column)[record.row] = value
+
+
+class ComponentRecord:
+    """ComponentTable 中一行的句柄，本身只保存表和行号"""
+
+    __slots__ = ('table', 'row')
+
+    type_code = _Column('type_code', int)
+    node1 = _Column('node1', int)
+    node2 = _Column('node2', int)
+    resistance = _Column('resistance', float)
+    source_value = _Column('source_value', float)
+    rated_voltage = _Column('rated_voltage', float)
+    storage_value = _Column('storage_value', float)
+    voltage = _Column('voltage', float)
+    current = _Column('current', float)
+    power = _Column('power', float)
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    @property
+    def name(self):
+        return self.table.names[self.row]
+
+    @name.setter
+    def name(self, value):
+        self.table.names[self.row] = value
+        self.type_code = type_code(value)
+
+
+class ComponentTable:
+    """
+    电路元件的结构数组存储：每个字段一列连续的 numpy 数组，按容量倍增扩展
+    行顺序与 Circuit.components 一致，求解时可直接切片得到网表而无需逐个访问组件
+    """
+
+    COLUMNS = {
+        'type_code': (np.int8, TYPE_OTHER),
+        'node1': (np.int64, -1),
+        'node2': (np.int64, -1),
+        'resistance': (float, 0.0),
+        'source_value': (float, 0.0),
+        'rated_voltage': (float, 0.0),
+        'storage_value': (float, 0.0),
+        'voltage': (float, 0.0),
+        'current': (float, 0.0),
+        'power': (float, 0.0),
+    }
+
+    def __init__(self, capacity=16):
+        self.size = 0
+        self.names = []
+        self.records = []
+        for column, (dtype, default) in self.COLUMNS.items():
+            setattr(self, column, np.full(capacity, default, dtype=dtype))
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        capacity = max(16, 2 * len(self.node1))
+        for column, (dtype, default) in self.COLUMNS.items():
+            old = getattr(self, column)
+            new = np.full(capacity, default, dtype=dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+    def add(self, name):
+        """在末尾追加一行，返回其句柄"""
+        if self.size == len(self.node1):
+            self._grow()
+        row = self.size
+        for column, (dtype, default) in self.COLUMNS.items():
+            getattr(self, column)[row] = default
+        self.size += 1
+        self.names.append(name)
+        record = ComponentRecord(self, row)
+        record.type_code = type_code(name)
+        self.records.append(record)
+        return record
+
+    def remove(self, record):
+        """删除句柄对应的行，之后的行依次前移并更新其句柄的行号"""
+        row = record.row
+        for column in self.COLUMNS:
+            values = getattr(self, column)
+            values[row:self.size - 1] = values[row + 1:self.size]
+        self.size -= 1
+        del self.names[row]
+        del self.records[row]
+        for moved in self.records[row:]:
+            moved.row -= 1
+        record.table = None
+
+    def netlist(self):
+        """以当前各列的视图构造网表（不复制数据）"""
+        n = self.size
+        return Netlist(self.names, self.node1[:n], self.node2[:n], self.resistance[:n],
+                       self.source_value[:n], self.type_code[:n], self.rated_voltage[:n],
+                       self.storage_value[:n])
@@ -0,0 +1,108 @@
+"""
+求解各阶段的耗时统计
+
+PhaseTimer 默认关闭，关闭时 clock()/lap() 只做一次属性判断；
+开启后每个阶段的耗时写入固定长度的环形缓冲区，只有在界面查看时才计算均值和p95，
+计时路径上不做字符串格式化和日志输出。
+后台求解时组装与求解阶段在工作线程中计时，其余阶段在界面线程中计时，缓冲区的读写都加锁。
+"""
+import time
+import threading
+
+import numpy as np
+
+# Circuit.calculate_circuit 依次经过的阶段
+CIRCUIT_PHASES = ("identify_nodes", "assign_node_ids", "build_mna", "solve", "update_component_values", "total")
+
+PHASE_LABELS = {
+    "identify_nodes": "节点识别",
+    "assign_node_ids": "分配节点编号",
+    "build_mna": "组装方程组",
+    "solve": "求解",
+    "update_component_values": "结果写回",
+    "total": "总计",
+}
+
+
+class RollingStats:
+    """最近 window 个样本的环形缓冲区，可在多个线程中同时追加和读取"""
+
+    def __init__(self, window=256):
+        self.samples = np.zeros(window)
+        self.count = 0  # 累计样本数
+        self.last = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, value):
+        with self._lock:
+            self.samples[self.count % len(self.samples)] = value
+            self.count += 1
+            self.last = value
+
+    def values(self):
+        """当前保存的样本（副本）"""
+        with self._lock:
+            return self.samples[:min(self.count, len(self.samples))].copy()
+
+    def mean(self):
+        values = self.values()
+        return float(values.mean()) if len(values) else 0.0
+
+    def percentile(self, q):
+        values = self.values()
+        return float(np.percentile(values, q)) if len(values) else 0.0
+
+    def summary(self):
+        """同一时刻的 {'last', 'mean', 'p95', 'count'}"""
+        with self._lock:
+            values = self.samples[:min(self.count, len(self.samples))].copy()
+            count, last = self.count, self.last
+        return {
+            'last': last,
+            'mean': float(values.mean()) if len(values) else 0.0,
+            'p95': float(np.percentile(values, 95)) if len(values) else 0.0,
+            'count': count,
+        }
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.last = 0.0
+
+
+class PhaseTimer:
+    """
+    分阶段计时器，用法:
+        t = timer.clock()
+        ...阶段1...
+        t = timer.lap("阶段1", t)
+    """
+
+    def __init__(self, phases=CIRCUIT_PHASES, window=256, enabled=False):
+        self.enabled = enabled
+        self.stats = {phase: RollingStats(window) for phase in phases}
+
+    def clock(self):
+        """开启时返回当前时间，关闭时返回0"""
+        return time.perf_counter() if self.enabled else 0.0
+
+    def lap(self, phase, start):
+        """记录从start到现在的耗时并返回当前时间，作为下一阶段的起点"""
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        self.stats[phase].add(now - start)
+        return now
+
+    def reset(self):
+        for stats in self.stats.values():
+            stats.reset()
+
+    def summary(self):
+        """
+        各阶段统计
+
+        Returns:
+            字典 {阶段: {'last': 秒, 'mean': 秒, 'p95': 秒, 'count': 样本数}}
+        """
+        return {phase: stats.summary() for phase, stats in self.stats.items()}
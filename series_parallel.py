@@ -0,0 +1,271 @@
+"""
+串并联化简：不建矩阵、按闭式求解单电源的串并联电路，并给出化简的推导过程
+
+在 MNA 符号结构上（理想导体两端的节点已合并）把两端元件看作图的边，反复
+    并联：同一对节点之间的多条边合并，G = ΣG_i
+    串联：只连接两条边的中间节点消去，R = R_1 + R_2
+    悬空：只连接一条边的中间节点连同该边去掉（该边没有电流）
+直到只剩电源两端之间的一条边，每个节点只处理常数次，总耗时接近线性。
+化简顺序只取决于拓扑，对每个符号结构只规划一次（ReductionPlan），之后每次求解只按计划代入电阻：
+先自底向上求出等效电阻，再按消去的逆序由分压公式恢复各节点电位。
+含桥式连接（如惠斯通电桥）、多个电源或多个孤岛的电路无法化简，由调用方回退到 MNA。
+"""
+import logging
+
+logger = logging.getLogger('CircuitSimulator')
+
+SERIES = "series"
+PARALLEL = "parallel"
+OPEN = "open"
+SHORTED = "shorted"
+STEP_LABELS = {SERIES: "串联", PARALLEL: "并联", OPEN: "一端悬空，没有电流", SHORTED: "两端被短接，没有电流"}
+
+# 两端元件数超过该值时不尝试化简：化简为逐个节点的 Python 循环，大电路的稀疏LU分解更快
+SERIES_PARALLEL_MAX_BRANCHES = 500
+
+
+class ReductionPlan:
+    """
+    一个符号结构的串并联化简计划
+
+    编号 0..num_branches-1 的"边"为印记顺序中的两端元件，之后依次为合并产生的等效元件。
+
+    Attributes:
+        ops: 按执行顺序的化简操作
+            (SERIES, 新边, 边a, 边b, 消去的节点w, a的另一端p, b的另一端q)
+            (PARALLEL, 新边, 边a, 边b)
+            (OPEN, 边, 消去的节点w, 另一端)
+            (SHORTED, 边) 两端为同一节点的元件
+        groups: 合并产生的边 -> (类型, 展开后的成员边列表)
+        final: 最后剩下的连接电源两端的边，-1 表示电源两端之间断路
+        positive, negative: 电源正、负极的节点（参考节点编号为 num_node_vars）
+    """
+
+    def __init__(self, num_node_vars, num_branches, positive, negative):
+        self.num_node_vars = num_node_vars
+        self.num_branches = num_branches
+        self.positive = positive
+        self.negative = negative
+        self.ops = []
+        self.groups = {}
+        self.final = -1
+
+    @property
+    def num_edges(self):
+        return self.num_branches + len(self.groups)
+
+
+def plan_reduction(structure):
+    """
+    为单电源、单孤岛的符号结构规划串并联化简
+
+    Returns:
+        ReductionPlan，电路无法完全化简（桥式连接等）或不满足条件时返回None
+    """
+    if structure.num_sources != 1 or structure.island_variables:
+        return None
+    if structure.num_branches > SERIES_PARALLEL_MAX_BRANCHES:
+        return None
+    reference = structure.num_node_vars
+    num_nodes = reference + 1
+
+    def node(index):
+        return int(index) if index >= 0 else reference
+
+    positive, negative = (node(i) for i in structure.source_nodes[0])
+    if positive == negative:
+        return None
+    plan = ReductionPlan(structure.num_node_vars, structure.num_branches, positive, negative)
+
+    adjacency = [dict() for _ in range(num_nodes)]  # 节点 -> {边: 另一端}
+    between = {}  # (较小节点, 较大节点) -> 当前连接这对节点的边
+    pending = []
+
+    def group_members(kind, edge):
+        group = plan.groups.get(edge)
+        return group[1] if group is not None and group[0] == kind else [edge]
+
+    def connect(edge, u, v):
+        key = (u, v) if u < v else (v, u)
+        existing = between.get(key)
+        if existing is not None:
+            del adjacency[u][existing]
+            del adjacency[v][existing]
+            merged = plan.num_edges
+            plan.groups[merged] = (PARALLEL, group_members(PARALLEL, existing) + group_members(PARALLEL, edge))
+            plan.ops.append((PARALLEL, merged, existing, edge))
+            edge = merged
+        between[key] = edge
+        adjacency[u][edge] = v
+        adjacency[v][edge] = u
+        pending.extend((u, v))
+
+    def disconnect(edge, u, v):
+        del adjacency[u][edge]
+        del adjacency[v][edge]
+        del between[(u, v) if u < v else (v, u)]
+
+    for edge, (a, b) in enumerate(structure.branch_nodes):
+        u, v = node(a), node(b)
+        if u == v:
+            plan.ops.append((SHORTED, edge))
+        else:
+            connect(edge, u, v)
+
+    eliminated = 0
+    while pending:
+        w = pending.pop()
+        if w == positive or w == negative:
+            continue
+        neighbours = adjacency[w]
+        if len(neighbours) == 1:
+            (edge, other), = neighbours.items()
+            disconnect(edge, w, other)
+            plan.ops.append((OPEN, edge, w, other))
+            pending.append(other)
+            eliminated += 1
+        elif len(neighbours) == 2:
+            (a, p), (b, q) = neighbours.items()
+            disconnect(a, w, p)
+            disconnect(b, w, q)
+            merged = plan.num_edges
+            plan.groups[merged] = (SERIES, group_members(SERIES, a) + group_members(SERIES, b))
+            plan.ops.append((SERIES, merged, a, b, w, p, q))
+            connect(merged, p, q)
+            eliminated += 1
+
+    # 电源两极之外的节点必须全部消去，且至多剩下一条连接两极的边
+    if eliminated != num_nodes - 2 or len(adjacency[positive]) > 1:
+        return None
+    if adjacency[positive]:
+        plan.final = next(iter(adjacency[positive]))
+    return plan
+
+
+def solve(plan, g, voltage):
+    """
+    按化简计划求解
+
+    Args:
+        plan: ReductionPlan
+        g: 按印记顺序的两端元件电导，必须全部为正
+        voltage: 电源电压
+
+    Returns:
+        (各节点电位列表（参考节点为末尾一项，已取0）, 各边的电阻列表, 等效电阻)
+    """
+    resistance = [1.0 / value for value in g]
+    resistance.extend([0.0] * len(plan.groups))
+    for op in plan.ops:
+        if op[0] == SERIES:
+            resistance[op[1]] = resistance[op[2]] + resistance[op[3]]
+        elif op[0] == PARALLEL:
+            ra, rb = resistance[op[2]], resistance[op[3]]
+            resistance[op[1]] = ra * rb / (ra + rb)
+    total = resistance[plan.final] if plan.final >= 0 else float('inf')
+
+    # 按消去的逆序由分压公式恢复节点电位，先以负极为0
+    potential = [0.0] * (plan.num_node_vars + 1)
+    potential[plan.positive] = voltage
+    for op in reversed(plan.ops):
+        if op[0] == SERIES:
+            _, _, a, b, w, p, q = op
+            potential[w] = potential[p] + (potential[q] - potential[p]) * resistance[a] / (resistance[a] + resistance[b])
+        elif op[0] == OPEN:
+            potential[op[2]] = potential[op[3]]
+    reference = potential[plan.num_node_vars]
+    return [value - reference for value in potential], resistance, total
+
+
+class ReductionStep:
+    """
+    推导中的一步
+
+    Attributes:
+        kind: SERIES / PARALLEL / OPEN / SHORTED
+        members: 参与合并的元件或等效元件（边编号）
+        edge: 合并得到的边，OPEN / SHORTED 时为该元件本身
+        resistance: 合并后的电阻（OPEN / SHORTED 时为该元件的电阻）
+    """
+
+    __slots__ = ('kind', 'members', 'edge', 'resistance')
+
+    def __init__(self, kind, members, edge, resistance):
+        self.kind = kind
+        self.members = members
+        self.edge = edge
+        self.resistance = resistance
+
+
+class Reduction:
+    """
+    一次串并联化简的结果与推导过程
+
+    Attributes:
+        steps: ReductionStep 列表，按化简顺序；连续的同类合并已展开为一步
+        resistance: 电源两端的总电阻，两端之间断路时为inf
+        voltage: 电源电压
+        current: 电源输出的总电流
+        elements: 印记顺序中各两端元件在网表中的下标
+    """
+
+    def __init__(self, plan, resistances, voltage, elements):
+        self.voltage = voltage
+        self.resistance = resistances[plan.final] if plan.final >= 0 else float('inf')
+        self.current = voltage / self.resistance if self.resistance > 0 else float('inf')
+        self.elements = elements
+        self._groups = plan.groups
+
+        # 被下一步同类合并吸收的中间结果（如三个电阻串联时的前两个）不单独列出
+        absorbed = set()
+        for op in plan.ops:
+            if op[0] in (SERIES, PARALLEL):
+                absorbed.update(edge for edge in op[2:4]
+                                if edge in plan.groups and plan.groups[edge][0] == op[0])
+        self.steps = []
+        for op in plan.ops:
+            if op[0] in (SERIES, PARALLEL):
+                edge = op[1]
+                if edge in absorbed:
+                    continue
+                self.steps.append(ReductionStep(op[0], plan.groups[edge][1], edge, resistances[edge]))
+            else:
+                self.steps.append(ReductionStep(op[0], [op[1]], op[1], resistances[op[1]]))
+        self._resistances = resistances
+
+    def label(self, edge, labels):
+        """边的名称：元件名称，或由成员名称组成的等效元件表达式"""
+        if edge < len(self.elements):
+            return labels[self.elements[edge]]
+        kind, members = self._groups[edge]
+        separator = " + " if kind == SERIES else " ∥ "
+        return "(" + separator.join(self.label(member, labels) for member in members) + ")"
+
+    def describe(self, labels):
+        """
+        推导过程的文字说明
+
+        Args:
+            labels: 按网表下标的元件名称
+
+        Returns:
+            字符串列表，每步一行，最后一行为总电阻与总电流
+        """
+        lines = []
+        for step in self.steps:
+            names = [self.label(member, labels) for member in step.members]
+            values = [self._resistances[member] for member in step.members]
+            if step.kind == SERIES:
+                formula = " + ".join(f"{value:.4g}" for value in values)
+                lines.append(f"{' 与 '.join(names)} 串联: R = {formula} = {step.resistance:.4g} Ω")
+            elif step.kind == PARALLEL:
+                formula = " + ".join(f"1/{value:.4g}" for value in values)
+                lines.append(f"{' 与 '.join(names)} 并联: 1/R = {formula}，R = {step.resistance:.4g} Ω")
+            else:
+                lines.append(f"{names[0]} {STEP_LABELS[step.kind]}")
+        if self.resistance == float('inf'):
+            lines.append("电源两端之间断路，电路中没有电流")
+        else:
+            lines.append(f"总电阻 R = {self.resistance:.4g} Ω，总电流 I = U/R = {self.voltage:.4g} V / "
+                         f"{self.resistance:.4g} Ω = {self.current:.4g} A")
+        return lines
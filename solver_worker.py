@@ -0,0 +1,100 @@
+"""
+后台电路求解：在工作线程中求解网表快照，避免大电路求解时界面卡顿
+
+GUI线程只负责识别节点并复制网表，求解在单独的线程中进行。
+求解期间到达的多个请求只保留最新的一个，过时的请求直接丢弃。
+"""
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PyQt6.QtCore import QObject, pyqtSignal
+
+import netlist
+
+logger = logging.getLogger('CircuitSimulator')
+
+
+class SolveRequest:
+    """一次后台求解请求：网表快照及其对应的电路和版本"""
+
+    def __init__(self, circuit, circuit_netlist, version, timer=None):
+        self.circuit = circuit  # 只在GUI线程中使用，工作线程不访问
+        self.netlist = circuit_netlist
+        self.version = version
+        self.timer = timer  # 记录组装和求解阶段耗时的 perf_stats.PhaseTimer
+        self.submitted_at = time.perf_counter()
+
+
+class SolveResult:
+    """后台求解结果，solution 为 None 时 error 记录失败原因"""
+
+    def __init__(self, request, solution, error=None):
+        self.request = request
+        self.solution = solution
+        self.error = error
+
+    @property
+    def latency(self):
+        """从提交到当前的耗时（秒），在显示结果时调用即为提交到显示的延迟"""
+        return time.perf_counter() - self.request.submitted_at
+
+
+class SolverWorker(QObject):
+    """
+    单线程求解器：submit() 提交请求后立即返回，结果通过 solved 信号发回GUI线程
+    工作线程拥有自己的 NetlistSolver，其中缓存的分解只在该线程中使用
+    """
+
+    solved = pyqtSignal(object)  # SolveResult
+
+    def __init__(self, parent=None, cache=None):
+        super().__init__(parent)
+        self.solver = netlist.NetlistSolver(cache=cache)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="circuit-solver")
+        self._lock = threading.Lock()
+        self._pending = None
+        self._running = False
+        # 统计：提交的请求数、被更新请求取代而未求解的请求数
+        self.submitted = 0
+        self.dropped = 0
+
+    def submit(self, request):
+        """提交求解请求；若已有尚未开始的请求，则用新请求替换它"""
+        with self._lock:
+            self.submitted += 1
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = request
+            if self._running:
+                return
+            self._running = True
+        self._executor.submit(self._run)
+
+    def _run(self):
+        """工作线程：依次求解最新的待处理请求，直到没有新请求"""
+        while True:
+            with self._lock:
+                request = self._pending
+                self._pending = None
+                if request is None:
+                    self._running = False
+                    return
+            try:
+                self.solver.timer = request.timer
+                solution = self.solver.solve(request.netlist)
+                result = SolveResult(request, solution, None if solution is not None else "构建方程组失败")
+            except np.linalg.LinAlgError as e:
+                result = SolveResult(request, None, str(e))
+            except Exception as e:
+                logger.error(f"后台求解出错: {str(e)}", exc_info=True)
+                result = SolveResult(request, None, str(e))
+            self.solved.emit(result)
+
+    def shutdown(self):
+        """停止工作线程，丢弃尚未开始的请求"""
+        with self._lock:
+            self._pending = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,76 @@
+"""
+交流分析（ac_analysis.ac_sweep）的测试：与 RC、RLC 电路的解析解对照，稠密与稀疏求解结果一致
+运行：python -m pytest -q test_ac_analysis.py
+"""
+import numpy as np
+import pytest
+
+import ac_analysis
+import circuit_solver
+from netlist import Netlist
+
+FREQUENCIES = np.logspace(0, 5, 26)
+
+
+def rc_low_pass(resistance=1000.0, capacitance=1e-6):
+    """1V 电源，R(节点1-2) 与 C(节点2-0)：输出为电容两端，截止频率 1/(2πRC) ≈ 159Hz"""
+    return Netlist(["电源", "定值电阻", "电容"], [1, 1, 2], [0, 2, 0], [0.001, resistance, 1e9],
+                   [1.0, 0, 0], storage_value=[0.0, 0.0, capacitance])
+
+
+@pytest.mark.parametrize("sparse", [None, False, True])
+def test_rc_low_pass_matches_analytic(sparse):
+    """H(jω) = 1 / (1 + jωRC)：|H| = 1/sqrt(1 + (ωRC)²)，相位 -arctan(ωRC)"""
+    result = ac_analysis.ac_sweep(rc_low_pass(), FREQUENCIES, sparse=sparse)
+    wrc = 2 * np.pi * FREQUENCIES * 1e-3
+    np.testing.assert_allclose(result.magnitude[:, 2], 1 / np.sqrt(1 + wrc ** 2), rtol=1e-9)
+    np.testing.assert_allclose(result.phase[:, 2], -np.degrees(np.arctan(wrc)), atol=1e-7)
+    gain, phase = result.transfer(2, 1)
+    np.testing.assert_allclose(gain, -10 * np.log10(1 + wrc ** 2), atol=1e-8)
+    np.testing.assert_allclose(phase, -np.degrees(np.arctan(wrc)), atol=1e-7)
+
+
+def test_series_rlc_resonance():
+    """串联 RLC：谐振频率 1/(2π√(LC)) 处电流最大，等于 U/R"""
+    netlist = Netlist(["电源", "定值电阻", "电感", "电容"], [1, 1, 2, 3], [0, 2, 3, 0],
+                      [0.001, 10.0, 0.001, 1e9], [1.0, 0, 0, 0], storage_value=[0.0, 0.0, 0.1, 1e-6])
+    resonance = 1 / (2 * np.pi * np.sqrt(0.1 * 1e-6))
+    frequencies = resonance * np.array([0.5, 1.0, 2.0])
+    result = ac_analysis.ac_sweep(netlist, frequencies)
+    current = np.abs(result.current[:, 1])
+    assert current[1] == pytest.approx(0.1, rel=1e-9)
+    omega = 2 * np.pi * frequencies
+    expected = 1 / np.abs(10 + 1j * omega * 0.1 + 1 / (1j * omega * 1e-6))
+    np.testing.assert_allclose(current, expected, rtol=1e-9)
+
+
+def test_large_circuit_dense_and_sparse_agree():
+    """超过批量求解规模的 RC 梯形网络逐个频率分解，稠密与稀疏结果一致"""
+    sections = circuit_solver.SWEEP_BATCH_LIMIT
+    names, node1, node2, resistance, storage = ["电源"], [1], [0], [0.001], [0.0]
+    for k in range(1, sections + 1):
+        names += ["定值电阻", "电容"]
+        node1 += [k, k + 1]
+        node2 += [k + 1, 0]
+        resistance += [100.0, 1e9]
+        storage += [0.0, 1e-7]
+    netlist = Netlist(names, node1, node2, resistance, [1.0] + [0.0] * (2 * sections), storage_value=storage)
+    dense = ac_analysis.ac_sweep(netlist, FREQUENCIES[::5], sparse=False)
+    sparse = ac_analysis.ac_sweep(netlist, FREQUENCIES[::5], sparse=True)
+    assert np.all(np.isfinite(sparse.node_voltages))
+    np.testing.assert_allclose(sparse.node_voltages, dense.node_voltages, rtol=1e-8, atol=1e-14)
+
+
+def test_source_phasor():
+    """电源相量的相位整体平移各节点电压的相位"""
+    result = ac_analysis.ac_sweep(rc_low_pass(), [159.0], source_phasors=[2 * np.exp(1j * np.pi / 6)])
+    reference = ac_analysis.ac_sweep(rc_low_pass(), [159.0])
+    np.testing.assert_allclose(result.magnitude, 2 * reference.magnitude, rtol=1e-12)
+    np.testing.assert_allclose(result.phase[:, 1:], reference.phase[:, 1:] + 30.0, atol=1e-9)
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        ac_analysis.ac_sweep(rc_low_pass(), [0.0, 100.0])
+    with pytest.raises(ValueError):
+        ac_analysis.ac_sweep(rc_low_pass(), [100.0], source_phasors=[1.0, 2.0])
@@ -0,0 +1,156 @@
+"""
+Circuit（界面层电路模型）的测试：节点识别、版本号
+需要 PyQt6，在无显示环境下使用 offscreen 平台
+运行：python -m pytest -q test_circuit.py
+"""
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+from PyQt6.QtWidgets import QApplication
+
+app = QApplication.instance() or QApplication([])
+
+from components import Circuit, Component, Wire
+
+
+def connect(a, a_point, b, b_point):
+    """用导线连接两个元件的连接点"""
+    wire = Wire(a.connection_points[a_point].scenePos())
+    wire.connect_endpoint(a.connection_points[a_point], True)
+    wire.connect_endpoint(b.connection_points[b_point], False)
+    return wire
+
+
+def build(names):
+    """按顺序首尾相连成一个回路的电路，返回 (电路, 元件列表, 导线列表)"""
+    circuit = Circuit()
+    components = [Component(name) for name in names]
+    for component in components:
+        circuit.add_component(component)
+    wires = [connect(components[k], 1, components[(k + 1) % len(components)], 0)
+             for k in range(len(components))]
+    return circuit, components, wires
+
+
+@pytest.fixture
+def loop():
+    return build(["电源", "定值电阻", "定值电阻"])
+
+
+def test_nodes_merge_incrementally(loop):
+    circuit, components, wires = loop
+    nodes = circuit.identify_nodes()
+    assert len(nodes) == 3
+    assert not circuit._node_sets_stale
+    # 再接一根导线把两个电阻之间的节点与电源负极相连：增量合并，不重建并查集
+    version = circuit.topology_version
+    connect(components[1], 1, components[0], 0)
+    assert circuit.topology_version == version + 1
+    assert not circuit._node_sets_stale
+    assert len(circuit.identify_nodes()) == 2
+
+
+def test_identify_nodes_cached_until_topology_changes(loop):
+    circuit, components, wires = loop
+    nodes = circuit.identify_nodes()
+    assert circuit.identify_nodes() is nodes
+    # 参数变化不影响节点划分
+    components[1].set_property("电阻值", 50.0)
+    assert circuit.identify_nodes() is nodes
+    wires[1].delete_wire()
+    assert circuit._node_sets_stale
+    split = circuit.identify_nodes()
+    assert split is not nodes
+    assert len(split) == 4
+    assert not circuit._node_sets_stale
+
+
+def test_version_counters(loop):
+    circuit, components, wires = loop
+    topology, values = circuit.state_version()
+    components[1].set_property("电阻值", 50.0)
+    assert circuit.state_version() == (topology, values + 1)
+    circuit.add_component(Component("定值电阻"))
+    assert circuit.topology_version == topology + 1
+
+
+def test_needs_solve_tracks_changes(loop):
+    circuit, components, wires = loop
+    assert circuit.needs_solve()
+    assert circuit.calculate_circuit()
+    assert not circuit.needs_solve()
+    assert components[1].current == pytest.approx(12.0 / 200.0)
+    components[1].set_property("电阻值", 50.0)
+    assert circuit.needs_solve() and not circuit.solve_pending()
+    assert circuit.calculate_circuit()
+    assert components[1].current == pytest.approx(12.0 / 150.0)
+
+
+def test_failed_solve_clears_readings(loop):
+    circuit, components, wires = loop
+    assert circuit.calculate_circuit()
+    # 与电源并联一个电压不同的电源：方程组奇异，求解失败
+    other = Component("电源")
+    other.properties["电压值"] = 5.0
+    circuit.add_component(other)
+    other.sync_record()
+    connect(components[0], 1, other, 1)
+    connect(components[0], 0, other, 0)
+    assert not circuit.calculate_circuit()
+    assert circuit.solution is None
+    assert components[1].current == 0.0
+    # 读数与电路不符，但同一版本不再重复求解
+    assert circuit.needs_solve() and circuit.solve_pending()
+
+
+def test_thevenin_across_resistor(loop):
+    """12V 电源与两个 100Ω 电阻串联，从第二个电阻两端看进去：开路电压 6V，等效电阻 100∥100 = 50Ω"""
+    circuit, components, wires = loop
+    points = components[2].connection_points
+    result = circuit.thevenin(points[0], points[1])
+    assert abs(result['voltage']) == pytest.approx(6.0, rel=1e-4)
+    assert result['resistance'] == pytest.approx(50.0, rel=1e-4)
+    assert result['current'] == pytest.approx(result['voltage'] / result['resistance'])
+    # 电路不变时直接返回缓存的结果，参数变化后重新计算
+    assert circuit.thevenin(points[0], points[1]) is result
+    components[1].set_property("电阻值", 300.0)
+    assert abs(circuit.thevenin(points[0], points[1])['voltage']) == pytest.approx(3.0, rel=1e-4)
+
+
+def test_update_simulation_skips_unchanged_circuit():
+    import main
+
+    work_area = main.WorkArea()
+    work_area.background_solving = False
+    circuit, components, wires = build(["电源", "定值电阻"])
+    work_area.circuit = circuit
+    work_area.simulation_running = True
+    assert work_area.update_simulation()
+    assert not work_area.update_simulation()
+    components[1].set_property("电阻值", 60.0)
+    assert work_area.update_simulation()
+    assert components[1].current == pytest.approx(0.2)
+    work_area.solver_worker.shutdown()
+
+
+def test_readings_current_does_not_solve_in_background():
+    """后台求解运行时读数过期即视为不可用，不在界面线程中求解；同步模式下直接求解"""
+    import main
+
+    work_area = main.WorkArea()
+    circuit, components, wires = build(["电源", "定值电阻"])
+    work_area.circuit = circuit
+    work_area.simulation_running = True
+    assert work_area.background_solving
+    assert not work_area.readings_current()
+    assert circuit.needs_solve()
+    work_area.background_solving = False
+    assert work_area.readings_current()
+    assert not circuit.needs_solve()
+    # 写回之后电路又有变化：旧读数同样过期
+    work_area.background_solving = True
+    components[1].set_property("电阻值", 60.0)
+    assert not work_area.readings_current()
+    work_area.solver_worker.shutdown()
@@ -0,0 +1,82 @@
+"""
+circuit_solver 的单元测试：并查集与连通分量划分
+运行：python -m pytest -q test_circuit_solver.py
+"""
+import numpy as np
+import pytest
+
+import circuit_solver
+from circuit_solver import DisjointSet
+
+
+def test_disjoint_set_union_and_find():
+    sets = DisjointSet()
+    for item in "abcde":
+        sets.add(item)
+    sets.union("a", "b")
+    sets.union("c", "d")
+    assert sets.find("a") == sets.find("b")
+    assert sets.find("c") == sets.find("d")
+    assert sets.find("a") != sets.find("c")
+    root = sets.union("b", "d")
+    assert {sets.find(item) for item in "abcd"} == {root}
+    assert sets.size[root] == 4
+    assert sets.find("e") == "e"
+
+
+def test_disjoint_set_adds_unknown_items():
+    """未出现过的元素自动成为单元素集合，重复合并同一集合不改变大小"""
+    sets = DisjointSet()
+    assert sets.find("x") == "x"
+    root = sets.union("x", "y")
+    assert sets.union("y", "x") == root
+    assert sets.size[root] == 2
+
+
+def test_disjoint_set_long_chain():
+    """按大小合并加路径减半：长链合并后所有元素指向同一代表元"""
+    sets = DisjointSet()
+    for k in range(1000):
+        sets.union(k, k + 1)
+    root = sets.find(0)
+    assert all(sets.find(k) == root for k in range(1001))
+    assert sets.size[root] == 1001
+
+
+def test_connected_labels_orders_by_smallest_node():
+    labels = circuit_solver.connected_labels(6, [4, 1, 2], [5, 2, 1])
+    np.testing.assert_array_equal(labels, [0, 1, 1, 2, 3, 3])
+
+
+def bridge_structure():
+    """惠斯通电桥的 MNA 结构：节点1-3为变量，电源接在节点1与参考节点之间"""
+    structure = circuit_solver.MNAStructure(3, [[0, 1], [0, 2], [1, -1], [2, -1], [1, 2]], [[0, -1]])
+    g = 1.0 / np.array([100.0, 200.0, 300.0, 100.0, 50.0])
+    return structure, g, structure.rhs([10.0])
+
+
+def test_matvec_matches_assembled_matrix():
+    structure, g, _ = bridge_structure()
+    x = np.array([10.0, 5.0, 4.0, -0.07])
+    product, bound = structure.matvec(g, x)
+    A = structure.assemble(g)
+    np.testing.assert_allclose(product, A @ x, atol=1e-15)
+    np.testing.assert_allclose(bound, np.abs(A) @ np.abs(x), atol=1e-15)
+
+
+def test_low_rank_update_matches_refactorization(monkeypatch):
+    structure, g, z = bridge_structure()
+    factorization = circuit_solver.LUFactorization(structure.assemble(g))
+    changed = g.copy()
+    changed[[1, 4]] = [1 / 20.0, 1 / 5.0]
+    expected = np.linalg.solve(structure.assemble(changed), z)
+    # 条件良好的更新不再组装矩阵校验残差
+    monkeypatch.setattr(structure, "assemble", lambda conductances: pytest.fail("assembled"))
+    x = circuit_solver.low_rank_update_solve(factorization, structure, g, changed, z)
+    np.testing.assert_allclose(x, expected, rtol=1e-10)
+
+
+def test_low_rank_update_rejects_too_many_changes():
+    structure, g, z = bridge_structure()
+    factorization = circuit_solver.LUFactorization(structure.assemble(g))
+    assert circuit_solver.low_rank_update_solve(factorization, structure, g, g * 2, z) is None
@@ -0,0 +1,84 @@
+"""
+元件模型注册表（component_models）的测试：注册、按标志汇总类型编码、按类型分组
+运行：python -m pytest -q test_component_models.py
+"""
+import numpy as np
+import pytest
+
+import component_models
+from component_models import ComponentModel
+
+
+@pytest.fixture
+def registry():
+    """测试中注册的模型在测试结束后移除，恢复内置元件的注册状态"""
+    saved = (dict(component_models._models), dict(component_models._models_by_code))
+    yield
+    component_models._models.clear()
+    component_models._models.update(saved[0])
+    component_models._models_by_code.clear()
+    component_models._models_by_code.update(saved[1])
+    component_models._code_cache.clear()
+
+
+def test_builtin_models():
+    resistor = component_models.get_model("定值电阻")
+    assert resistor.type_code == component_models.TYPE_RESISTOR
+    assert component_models.model_for_code(component_models.TYPE_RESISTOR) is resistor
+    assert resistor.parameters({"电阻值": 47.0})[0] == 47.0
+    assert resistor.default_properties() is not resistor.defaults
+    assert component_models.get_model("二极管") is component_models.UNKNOWN_MODEL
+    assert component_models.model_for_code(127) is component_models.UNKNOWN_MODEL
+
+
+def test_codes_where():
+    sources = component_models.codes_where("stamp", component_models.STAMP_VOLTAGE_SOURCE)
+    assert list(sources) == [component_models.TYPE_SOURCE]
+    assert sources.dtype == np.int8
+    ideal = component_models.codes_where("ideal_conductor")
+    assert set(ideal) == {component_models.TYPE_SWITCH, component_models.TYPE_WIRE,
+                          component_models.TYPE_AMMETER}
+    # 结果按 (属性, 取值) 缓存
+    assert component_models.codes_where("ideal_conductor") is ideal
+
+
+def test_register_new_model(registry):
+    ideal = component_models.codes_where("ideal_conductor")
+    diode = component_models.register(ComponentModel("二极管", 20, ideal_conductor=True,
+                                                     resistance=lambda properties: 5.0))
+    assert component_models.get_model("二极管") is diode
+    assert component_models.model_for_code(20) is diode
+    assert component_models.models()[-1] is diode
+    # 注册后汇总的类型编码重新计算
+    assert set(component_models.codes_where("ideal_conductor")) == set(ideal) | {20}
+
+
+def test_reregister_same_name_replaces(registry):
+    replacement = ComponentModel("定值电阻", component_models.TYPE_RESISTOR, defaults={"电阻值": 10.0})
+    component_models.register(replacement)
+    assert component_models.get_model("定值电阻") is replacement
+    assert component_models.model_for_code(component_models.TYPE_RESISTOR) is replacement
+
+
+def test_register_rejects_duplicate_or_invalid_code(registry):
+    with pytest.raises(ValueError):
+        component_models.register(ComponentModel("二极管", component_models.TYPE_RESISTOR))
+    with pytest.raises(ValueError):
+        component_models.register(ComponentModel("二极管", component_models.TYPE_OTHER))
+    with pytest.raises(ValueError):
+        component_models.register(ComponentModel("二极管", 128))
+    assert component_models.get_model("二极管") is component_models.UNKNOWN_MODEL
+
+
+def test_type_groups():
+    codes = [component_models.TYPE_RESISTOR, component_models.TYPE_SOURCE, component_models.TYPE_RESISTOR,
+             component_models.TYPE_OTHER, component_models.TYPE_BULB]
+    groups = component_models.type_groups(codes)
+    assert [model.type_code for model, _ in groups] == [0, 1, 2, 8]
+    assert [list(indices) for _, indices in groups] == [[3], [1], [0, 2], [4]]
+    assert groups[0][0] is component_models.UNKNOWN_MODEL
+
+
+def test_resistive_conductance():
+    np.testing.assert_allclose(component_models.resistive_conductance([[2.0, 0.0], [np.inf, -1.0]]),
+                               [[0.5, 0.0], [0.0, 0.0]])
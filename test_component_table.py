@@ -0,0 +1,77 @@
+"""
+元件表（netlist.ComponentTable / ComponentRecord）的测试
+运行：python -m pytest -q test_component_table.py
+"""
+import numpy as np
+import pytest
+
+import netlist
+from netlist import ComponentTable, NetlistSolver
+
+
+def fill(table, rows):
+    """按 (名称, 节点1, 节点2, 电阻, 电源电压) 追加元件，返回句柄列表"""
+    records = []
+    for name, node1, node2, resistance, source_value in rows:
+        record = table.add(name)
+        record.node1, record.node2 = node1, node2
+        record.resistance, record.source_value = resistance, source_value
+        records.append(record)
+    return records
+
+
+DIVIDER = [("电源", 1, 0, 0.001, 12.0), ("定值电阻", 1, 2, 100.0, 0.0), ("定值电阻", 2, 0, 200.0, 0.0)]
+
+
+def test_record_reads_and_writes_columns():
+    table = ComponentTable()
+    source, r1, r2 = fill(table, DIVIDER)
+    assert len(table) == 3
+    assert source.type_code == netlist.type_code("电源")
+    assert r1.resistance == 100.0 and isinstance(r1.node1, int)
+    r1.resistance = 150.0
+    assert table.resistance[1] == 150.0
+    r2.name = "小灯泡"
+    assert table.names[2] == "小灯泡"
+    assert table.type_code[2] == netlist.type_code("小灯泡")
+
+
+def test_records_have_no_instance_dict():
+    record = ComponentTable().add("定值电阻")
+    with pytest.raises(AttributeError):
+        record.extra = 1
+
+
+def test_table_grows_beyond_capacity():
+    table = ComponentTable(capacity=2)
+    records = [table.add("定值电阻") for _ in range(40)]
+    for k, record in enumerate(records):
+        record.resistance = float(k + 1)
+    assert len(table) == 40
+    assert [record.resistance for record in records] == [float(k + 1) for k in range(40)]
+
+
+def test_remove_shifts_rows_and_updates_handles():
+    table = ComponentTable()
+    source, r1, r2 = fill(table, DIVIDER)
+    table.remove(r1)
+    assert len(table) == 2
+    assert r1.table is None
+    assert r2.row == 1
+    assert r2.resistance == 200.0
+    assert table.names == ["电源", "定值电阻"]
+    # 删除后追加的行从默认值开始
+    record = table.add("定值电阻")
+    assert record.row == 2 and record.node1 == -1 and record.voltage == 0.0
+
+
+def test_netlist_views_table_columns():
+    table = ComponentTable()
+    fill(table, DIVIDER)
+    circuit_netlist = table.netlist()
+    assert len(circuit_netlist) == 3
+    # 网表直接引用表中的列，修改元件参数后无需重新编译
+    table.resistance[2] = 400.0
+    assert circuit_netlist.resistance[2] == 400.0
+    solution = NetlistSolver().solve(circuit_netlist)
+    np.testing.assert_allclose(solution.voltage[1:], [12.0 * 100 / 500, 12.0 * 400 / 500], rtol=1e-9)
@@ -0,0 +1,105 @@
+"""
+等效电阻（equivalent_resistance.EquivalentResistance）的测试：预先计算全部节点对与按需查询两种模式
+与手算结果、拉普拉斯矩阵伪逆的结果一致
+运行：python -m pytest -q test_equivalent_resistance.py
+"""
+import numpy as np
+import pytest
+
+from equivalent_resistance import EquivalentResistance
+from netlist import Netlist
+
+
+@pytest.fixture(params=[True, False], ids=['all_pairs', 'on_demand'])
+def all_pairs(request):
+    return request.param
+
+
+def bridge():
+    """
+    10V 电源接在节点1-0，R1=100(1-2)、R2=200(1-3)、R3=300(2-0)、R4=100(3-0)，桥臂 R5=50(2-3)
+    电源置零后节点1与0合并：节点2对地为 100∥300 = 75Ω，节点3对地为 200∥100 = 200/3 Ω
+    """
+    return Netlist(["电源", "定值电阻", "定值电阻", "定值电阻", "定值电阻", "定值电阻"],
+                   [1, 1, 1, 2, 3, 2], [0, 2, 3, 0, 0, 3],
+                   [0.001, 100.0, 200.0, 300.0, 100.0, 50.0], [10.0, 0, 0, 0, 0, 0])
+
+
+def parallel(*resistances):
+    return 1.0 / sum(1.0 / r for r in resistances)
+
+
+def test_bridge(all_pairs):
+    network = EquivalentResistance(bridge(), all_pairs=all_pairs)
+    assert network.resistance(2, 3) == pytest.approx(parallel(50.0, 75.0 + 200.0 / 3))
+    assert network.resistance(2, 0) == pytest.approx(parallel(75.0, 50.0 + 200.0 / 3))
+    assert network.resistance(3, 2) == network.resistance(2, 3)
+    # 电源两端被合并为同一个节点
+    assert network.resistance(1, 0) == 0.0
+    assert network.resistance(2, 2) == 0.0
+
+
+def test_ideal_conductors_and_open_elements(all_pairs):
+    """导线两端合并、断开的开关视为断路、悬空的部分与其余电路不连通"""
+    netlist = Netlist(["定值电阻", "导线", "定值电阻", "开关", "定值电阻"],
+                      [0, 1, 2, 2, 4], [1, 2, 0, 3, 5],
+                      [100.0, 0.001, 100.0, 1e9, 30.0], [0, 0, 0, 0, 0])
+    network = EquivalentResistance(netlist, all_pairs=all_pairs)
+    assert network.resistance(1, 2) == 0.0
+    assert network.resistance(0, 2) == pytest.approx(50.0)
+    assert network.resistance(2, 3) == np.inf
+    assert network.resistance(4, 5) == pytest.approx(30.0)
+    assert network.resistance(0, 4) == np.inf
+
+
+def random_network(num_nodes=30, num_resistors=70, seed=0):
+    rng = np.random.default_rng(seed)
+    node1 = rng.integers(0, num_nodes, num_resistors)
+    node2 = (node1 + rng.integers(1, num_nodes, num_resistors)) % num_nodes
+    # 串起所有节点保证连通
+    node1 = np.concatenate([node1, np.arange(num_nodes - 1)])
+    node2 = np.concatenate([node2, np.arange(1, num_nodes)])
+    resistance = rng.uniform(1.0, 100.0, len(node1))
+    return Netlist(["定值电阻"] * len(node1), node1, node2, resistance, np.zeros(len(node1)))
+
+
+def pseudo_inverse_resistances(netlist):
+    """参考实现：R(a, b) = (e_a - e_b)ᵀ L⁺ (e_a - e_b)"""
+    n = netlist.num_nodes
+    laplacian = np.zeros((n, n))
+    g = 1.0 / netlist.resistance
+    np.add.at(laplacian, (netlist.node1, netlist.node1), g)
+    np.add.at(laplacian, (netlist.node2, netlist.node2), g)
+    np.add.at(laplacian, (netlist.node1, netlist.node2), -g)
+    np.add.at(laplacian, (netlist.node2, netlist.node1), -g)
+    X = np.linalg.pinv(laplacian)
+    d = np.diag(X)
+    return d[:, None] + d[None, :] - 2 * X
+
+
+def test_matches_pseudo_inverse(all_pairs):
+    netlist = random_network()
+    expected = pseudo_inverse_resistances(netlist)
+    network = EquivalentResistance(netlist, all_pairs=all_pairs)
+    np.testing.assert_allclose(network.matrix(), expected, rtol=1e-9, atol=1e-9)
+    pairs = [(0, 29), (3, 17), (17, 3), (5, 5)]
+    np.testing.assert_allclose(network.resistances(pairs), [expected[a, b] for a, b in pairs],
+                               rtol=1e-9, atol=1e-9)
+    assert network.resistance(4, 11) == pytest.approx(expected[4, 11], rel=1e-9)
+
+
+def test_on_demand_caches_queries():
+    network = EquivalentResistance(random_network(), all_pairs=False)
+    value = network.resistance(2, 9)
+    assert len(network._cache) == 1
+    assert network.resistance(9, 2) == value
+    assert len(network._cache) == 1
+
+
+def test_all_pairs_selected_by_size():
+    assert EquivalentResistance(bridge())._merged_matrix is not None
+
+
+def test_invalid_node():
+    with pytest.raises(ValueError):
+        EquivalentResistance(bridge()).resistance(0, 10)
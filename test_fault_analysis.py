@@ -0,0 +1,64 @@
+"""
+故障注入诊断（fault_analysis.fault_scan）的测试：秩1更新批量求出的各故障读数与逐个修改网表后重新求解一致
+运行：python -m pytest -q test_fault_analysis.py
+"""
+import numpy as np
+import pytest
+
+import fault_analysis
+from netlist import Netlist, NetlistSolver
+
+NAMES = ["电源", "电流表", "小灯泡", "小灯泡", "定值电阻"]
+OBSERVED = [1, 2, 3]
+
+
+def lamp_circuit(resistance=(0.001, 0.001, 12.0, 12.0, 100.0)):
+    """6V 电源经电流表(节点1-2)接两个并联的小灯泡和一个电阻(节点2-0)"""
+    return Netlist(NAMES, [1, 1, 2, 2, 2], [0, 2, 0, 0, 0], list(resistance), [6.0, 0, 0, 0, 0])
+
+
+def solve_readings(resistance):
+    """逐个求解的参考读数：电流表和小灯泡的电流大小"""
+    solver = NetlistSolver(sparse=False)
+    solver.collapse_ideal = False
+    solver.nonlinear_bulbs = False
+    solution = solver.solve(lamp_circuit(resistance))
+    return np.abs(solution.current[OBSERVED])
+
+
+def faulted(element, kind):
+    resistance = list(lamp_circuit().resistance)
+    resistance[element] = (fault_analysis.FAULT_OPEN_RESISTANCE if kind == fault_analysis.OPEN
+                           else fault_analysis.FAULT_SHORT_RESISTANCE)
+    return resistance
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_fault_readings_match_resolve(sparse):
+    netlist = lamp_circuit()
+    observed = solve_readings(netlist.resistance)
+    faults, baseline = fault_analysis.fault_scan(netlist, OBSERVED, observed, sparse=sparse)
+    assert baseline.element is None
+    assert baseline.error == pytest.approx(0.0, abs=1e-9)
+    # 电流表已相当于短路，只假设断路；其余三个元件断路、短路都假设
+    assert sorted((f.element, f.kind) for f in faults) == sorted(
+        [(1, fault_analysis.OPEN)] + [(k, kind) for k in (2, 3, 4)
+                                      for kind in (fault_analysis.OPEN, fault_analysis.SHORT)])
+    for fault in faults:
+        np.testing.assert_allclose(fault.readings, solve_readings(faulted(fault.element, fault.kind)),
+                                   rtol=1e-6, atol=1e-9)
+    assert [f.error for f in faults] == sorted(f.error for f in faults)
+
+
+def test_open_bulb_ranked_first():
+    """第一个灯泡断路时的读数，诊断结果排在第一位的应为该灯泡断路"""
+    observed = solve_readings(faulted(2, fault_analysis.OPEN))
+    faults, baseline = fault_analysis.fault_scan(lamp_circuit(), OBSERVED, observed)
+    assert (faults[0].element, faults[0].kind) == (2, fault_analysis.OPEN)
+    assert faults[0].error == pytest.approx(0.0, abs=1e-6)
+    assert baseline.error > faults[0].error
+
+
+def test_default_quantities():
+    quantities = fault_analysis.default_quantities(lamp_circuit(), np.array([1, 2, 4]))
+    assert list(quantities) == ["current", "current", "voltage"]
@@ -0,0 +1,510 @@
+"""
+求解器行为测试：用手算结果校验网表求解器的各条求解路径
+
+每个电路都同时用基准的稠密 MNA 求解（不化简、不合并理想导体、不复用分解）和各种加速路径求解，结果应一致。
+运行：python -m pytest -q test_solver.py
+"""
+import numpy as np
+import pytest
+
+import circuit_solver
+from netlist import Netlist, NetlistSolver, SolutionCache, bulb_characteristic
+
+
+def baseline_solver():
+    """基准求解器：稠密 MNA，每次重新组装分解"""
+    solver = NetlistSolver(sparse=False)
+    solver.reduce_series_parallel = False
+    solver.collapse_ideal = False
+    solver.reuse_factorization = False
+    return solver
+
+
+def dense_solver():
+    solver = NetlistSolver(sparse=False)
+    solver.reduce_series_parallel = False
+    return solver
+
+
+def sparse_solver():
+    solver = NetlistSolver(sparse=True)
+    solver.reduce_series_parallel = False
+    return solver
+
+
+def uncollapsed_solver():
+    solver = NetlistSolver()
+    solver.collapse_ideal = False
+    return solver
+
+
+SOLVERS = {
+    'dense': dense_solver,
+    'sparse': sparse_solver,
+    'uncollapsed': uncollapsed_solver,
+    'cached': lambda: NetlistSolver(cache=SolutionCache()),
+    'default': NetlistSolver,
+}
+
+
+@pytest.fixture(params=sorted(SOLVERS))
+def solver(request):
+    return SOLVERS[request.param]()
+
+
+def assert_matches_baseline(solution, netlist, rtol=1e-6, atol=1e-9):
+    """与基准稠密求解的各元件电压、电流一致"""
+    expected = baseline_solver().solve(netlist)
+    np.testing.assert_array_equal(solution.connected, expected.connected)
+    np.testing.assert_allclose(solution.voltage, expected.voltage, rtol=rtol, atol=atol)
+    np.testing.assert_allclose(solution.current, expected.current, rtol=rtol, atol=atol)
+
+
+def divider():
+    """12V 电源，R1=100Ω(节点1-2) 与 R2=200Ω(节点2-0) 串联分压"""
+    return Netlist(["电源", "定值电阻", "定值电阻"], [1, 1, 2], [0, 2, 0],
+                   [0.001, 100.0, 200.0], [12.0, 0.0, 0.0])
+
+
+def bridge(r5=50.0):
+    """
+    10V 电源接在节点1，R1=100(1-2)、R2=200(1-3)、R3=300(2-0)、R4=100(3-0)，桥臂 R5(2-3)
+    节点方程手算：V2 = 135/23 V，V3 = 110/23 V
+    """
+    return Netlist(["电源", "定值电阻", "定值电阻", "定值电阻", "定值电阻", "定值电阻"],
+                   [1, 1, 1, 2, 3, 2], [0, 2, 3, 0, 0, 3],
+                   [0.001, 100.0, 200.0, 300.0, 100.0, r5], [10.0, 0, 0, 0, 0, 0])
+
+
+def ladder(sections):
+    """12V 电源驱动的 R-2R 梯形网络，节点数随 sections 线性增长"""
+    names, node1, node2, resistance = ["电源"], [1], [0], [0.001]
+    for k in range(1, sections + 1):
+        names += ["定值电阻", "定值电阻"]
+        node1 += [k, k + 1]
+        node2 += [k + 1, 0]
+        resistance += [10.0, 20.0]
+    return Netlist(names, node1, node2, resistance, [12.0] + [0.0] * (2 * sections))
+
+
+def test_divider(solver):
+    netlist = divider()
+    solution = solver.solve(netlist)
+    np.testing.assert_allclose(solution.node_voltages, [0.0, 12.0, 8.0], atol=1e-9)
+    np.testing.assert_allclose(solution.voltage, [12.0, 4.0, 8.0], atol=1e-9)
+    np.testing.assert_allclose(np.abs(solution.current), [0.04, 0.04, 0.04], atol=1e-12)
+    # 电源支路电流为从正极流入电源的电流，对外供电时为负
+    assert solution.current[0] == pytest.approx(-0.04)
+    assert_matches_baseline(solution, netlist)
+
+
+def test_bridge(solver):
+    netlist = bridge()
+    solution = solver.solve(netlist)
+    np.testing.assert_allclose(solution.node_voltages, [0.0, 10.0, 135 / 23, 110 / 23], rtol=1e-9)
+    assert solution.current[0] == pytest.approx(-1.55 / 23)
+    assert abs(solution.current[5]) == pytest.approx(0.5 / 23)
+    assert_matches_baseline(solution, netlist)
+
+
+def test_shorted_source(solver):
+    """导线把 12V 电源两端直接短接：短路电流按导线电阻 0.001Ω 计，并联的电阻照常分得 0.12A"""
+    netlist = Netlist(["电源", "导线", "定值电阻"], [1, 1, 1], [0, 0, 0],
+                      [0.001, 0.001, 100.0], [12.0, 0, 0])
+    solution = solver.solve(netlist)
+    np.testing.assert_allclose(solution.voltage, 12.0, rtol=1e-9)
+    np.testing.assert_allclose(solution.current, [-12000.12, -12000.0, -0.12], rtol=1e-9)
+    assert_matches_baseline(solution, netlist)
+
+
+def test_sparse_selected_by_size():
+    """未指定时按方程组规模选择：小电路用稠密矩阵，超过阈值用稀疏LU，两者结果一致"""
+    solver = NetlistSolver()
+    solver.reduce_series_parallel = False
+    small = solver.prepare(divider())
+    assert not small.sparse
+    netlist = ladder(circuit_solver.SPARSE_MATRIX_THRESHOLD)
+    solution = solver.solve(netlist)
+    assert solver.structure.sparse
+    # 节数足够多时从输入端看进去的电阻趋于 R = 10 + 20∥R 的解 20Ω
+    assert solution.current[0] == pytest.approx(-12.0 / 20.0, rel=1e-6)
+    assert_matches_baseline(solution, netlist)
+
+
+def test_source_change_reuses_factorization(solver):
+    """只改变电源电压时电导不变，直接用缓存的LU分解回代"""
+    solver.solve(bridge())
+    for voltage in (5.0, 20.0):
+        netlist = bridge()
+        netlist.source_value[0] = voltage
+        solution = solver.solve(netlist)
+        np.testing.assert_allclose(solution.node_voltages, np.array([0.0, 10.0, 135 / 23, 110 / 23]) * voltage / 10,
+                                   rtol=1e-9)
+    assert solver.solve_counts['factorizations'] == 1
+
+
+def test_value_change_reuses_structure(solver):
+    """电阻变化时复用符号结构，结果与重新组装分解一致"""
+    structure = solver.prepare(bridge())
+    for r5 in (20.0, 80.0, 5.0, 500.0, 1.0):
+        netlist = bridge(r5)
+        solution = solver.solve(netlist)
+        assert solver.structure is structure
+        assert_matches_baseline(solution, netlist, rtol=1e-8)
+
+
+def switched_bridge(closed):
+    """桥臂 R5 与开关串联：开关断开时电路化简为 (100 + 300) ∥ (200 + 100)"""
+    netlist = Netlist(["电源", "定值电阻", "定值电阻", "定值电阻", "定值电阻", "定值电阻", "开关"],
+                      [1, 1, 1, 2, 3, 2, 4], [0, 2, 3, 0, 0, 4, 3],
+                      [0.001, 100.0, 200.0, 300.0, 100.0, 50.0, 0.001 if closed else 1e9],
+                      [10.0, 0, 0, 0, 0, 0, 0])
+    return netlist
+
+
+def test_switch_toggle_matches_full_resolve(solver):
+    open_current = -10.0 / 400 - 10.0 / 300
+    for closed in (False, True, False, True):
+        netlist = switched_bridge(closed)
+        solution = solver.solve(netlist)
+        fresh = baseline_solver().solve(netlist)
+        # 合并闭合的开关（0.001Ω）与基准的差别在 1e-5 量级
+        rtol = 1e-4 if solver.collapse_ideal else 1e-6
+        np.testing.assert_allclose(solution.current, fresh.current, rtol=rtol, atol=1e-9)
+        np.testing.assert_allclose(solution.voltage, fresh.voltage, rtol=rtol, atol=1e-4)
+        if not closed:
+            assert solution.current[0] == pytest.approx(open_current, rel=1e-6)
+        elif solver.collapse_ideal:
+            # 闭合的开关合并两端节点后与无开关的电桥相同
+            np.testing.assert_allclose(solution.current[:6], baseline_solver().solve(bridge()).current,
+                                       rtol=1e-5)
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_switch_toggle_uses_low_rank_update(sparse):
+    """不合并理想导体时开关切换只改变一个电导，用缓存分解的低秩更新求解"""
+    solver = NetlistSolver(sparse=sparse)
+    solver.collapse_ideal = False
+    solver.solve(switched_bridge(True))
+    assert solver.solve_counts['factorizations'] == 1
+    for closed in (False, True, False):
+        netlist = switched_bridge(closed)
+        solution = solver.solve(netlist)
+        np.testing.assert_allclose(solution.current, baseline_solver().solve(netlist).current,
+                                   rtol=1e-6, atol=1e-9)
+    assert solver.solve_counts['factorizations'] == 1
+    assert solver.solve_counts['low_rank_updates'] == 3
+
+
+def test_rheostat_change_uses_low_rank_update():
+    solver = dense_solver()
+    solver.solve(bridge(50.0))
+    for r5 in (20.0, 80.0, 5.0):
+        netlist = bridge(r5)
+        solution = solver.solve(netlist)
+        np.testing.assert_allclose(solution.current, baseline_solver().solve(netlist).current, rtol=1e-8)
+    assert solver.solve_counts['factorizations'] == 1
+    assert solver.solve_counts['low_rank_updates'] == 3
+
+
+def test_sweep_resistance_divider(solver):
+    """R–I 实验：扫描 R2，电流 I = 12 / (100 + R2)"""
+    resistances = np.array([50.0, 100.0, 200.0, 400.0])
+    voltage, current = solver.sweep_resistance(divider(), 2, resistances)
+    np.testing.assert_allclose(np.abs(current[:, 2]), 12.0 / (100.0 + resistances), rtol=1e-9)
+    np.testing.assert_allclose(voltage[:, 2], 12.0 * resistances / (100.0 + resistances), rtol=1e-9)
+
+
+def test_sweep_source_divider(solver):
+    """U–I 实验：扫描电源电压，电流 I = U / 300"""
+    voltages = np.linspace(0.0, 24.0, 7)
+    voltage, current = solver.sweep_source(divider(), 0, voltages)
+    np.testing.assert_allclose(np.abs(current[:, 1]), voltages / 300.0, atol=1e-12)
+    np.testing.assert_allclose(voltage[:, 0], voltages, atol=1e-9)
+
+
+def test_sweep_resistance_large_circuit_matches_solves():
+    """方程组超过批量求解的规模时按秩1更新扫描，与逐个取值重新求解一致"""
+    netlist = ladder(circuit_solver.SWEEP_BATCH_LIMIT)
+    resistances = [1.0, 15.0, 300.0]
+    voltage, current = dense_solver().sweep_resistance(netlist, 4, resistances)
+    for k, resistance in enumerate(resistances):
+        changed = netlist.copy()
+        changed.resistance[4] = resistance
+        expected = baseline_solver().solve(changed)
+        np.testing.assert_allclose(voltage[k], expected.voltage, rtol=1e-8, atol=1e-12)
+        np.testing.assert_allclose(current[k], expected.current, rtol=1e-8, atol=1e-12)
+
+
+def test_ammeter_in_series(solver):
+    """电流表串联在 60Ω 与 40Ω 之间：合并理想导体时读数为 12/100，不合并时按 0.1Ω 内阻为 12/100.1"""
+    netlist = Netlist(["电源", "电流表", "定值电阻", "定值电阻"], [1, 1, 2, 3], [0, 2, 3, 0],
+                      [0.001, 0.1, 60.0, 40.0], [12.0, 0, 0, 0])
+    solution = solver.solve(netlist)
+    expected = 12.0 / 100.1 if not solver.collapse_ideal else 0.12
+    np.testing.assert_allclose(np.abs(solution.current), expected, rtol=1e-9)
+    if solver.collapse_ideal:
+        # 合并后电流表两端等电位，与按 0.1Ω 内阻求解的基准相差不超过内阻占比
+        assert solution.voltage[1] == 0.0
+        expected = baseline_solver().solve(netlist)
+        np.testing.assert_allclose(solution.current, expected.current, rtol=2e-3)
+        np.testing.assert_allclose(solution.voltage[2:], expected.voltage[2:], rtol=2e-3)
+    else:
+        assert_matches_baseline(solution, netlist)
+
+
+def test_wire_chain_collapses_to_one_node():
+    """多段导线、闭合开关和电流表串成一串时合并为同一节点，方程组只剩电阻两端的节点"""
+    netlist = Netlist(["电源", "导线", "开关", "电流表", "导线", "定值电阻"],
+                      [1, 1, 2, 3, 4, 5], [0, 2, 3, 4, 5, 0],
+                      [0.001, 0.001, 0.001, 0.1, 0.001, 40.0], [12.0, 0, 0, 0, 0, 0])
+    solver = dense_solver()
+    solution = solver.solve(netlist)
+    assert solver.structure.num_node_vars == 1
+    np.testing.assert_allclose(solution.current, -0.3, rtol=1e-9)
+    np.testing.assert_allclose(solution.voltage[1:5], 0.0)
+
+
+def test_floating_island(solver):
+    """
+    三个互不相连的部分：两个各自带电源的分压电路，以及一个没有电源的电阻环
+    无电源的孤岛电压、电流均为0，其余孤岛各自按参考节点求解
+    """
+    netlist = Netlist(["电源", "定值电阻", "定值电阻", "电源", "定值电阻", "定值电阻", "定值电阻", "定值电阻"],
+                      [1, 1, 2, 4, 4, 5, 6, 7], [0, 2, 0, 3, 5, 3, 7, 6],
+                      [0.001, 100.0, 200.0, 0.001, 10.0, 30.0, 50.0, 50.0], [12.0, 0, 0, 6.0, 0, 0, 0, 0])
+    solution = solver.solve(netlist)
+    assert solution.connected.all()
+    np.testing.assert_allclose(solution.voltage, [12.0, 4.0, 8.0, 6.0, 1.5, 4.5, 0.0, 0.0], atol=1e-9)
+    np.testing.assert_allclose(np.abs(solution.current), [0.04, 0.04, 0.04, 0.15, 0.15, 0.15, 0.0, 0.0],
+                               atol=1e-12)
+    assert_matches_baseline(solution, netlist)
+
+
+def test_singular_island_is_isolated():
+    """一个孤岛中两个电压不同的电源并联（方程奇异）时，只有该孤岛的结果无效"""
+    netlist = Netlist(["电源", "定值电阻", "电源", "电源"], [1, 1, 2, 2], [0, 0, 3, 3],
+                      [0.001, 100.0, 0.001, 0.001], [12.0, 0, 3.0, 5.0])
+    solution = NetlistSolver(sparse=False).solve(netlist)
+    np.testing.assert_array_equal(solution.connected, [True, True, False, False])
+    assert solution.current[1] == pytest.approx(-0.12)
+
+
+def test_islands_solved_as_blocks_when_whole_system_is_singular():
+    """整体分解失败后逐个孤岛求解，正常的孤岛结果与单独求解时相同"""
+    netlist = Netlist(["电源", "定值电阻", "定值电阻", "电源", "电源"], [1, 1, 2, 3, 3], [0, 2, 0, 4, 4],
+                      [0.001, 100.0, 200.0, 0.001, 0.001], [12.0, 0, 0, 3.0, 5.0])
+    solution = sparse_solver().solve(netlist)
+    np.testing.assert_array_equal(solution.connected, [True, True, True, False, False])
+    np.testing.assert_allclose(solution.voltage[:3], [12.0, 4.0, 8.0], rtol=1e-9)
+
+
+def test_cache_hit_matches_solve():
+    """命中缓存（包括同构但元件顺序不同的电路）的结果与直接求解一致，并带有完整的解向量"""
+    cache = SolutionCache()
+    solver = NetlistSolver(cache=cache)
+    solver.reduce_series_parallel = False
+    first = solver.solve(bridge())
+    second = solver.solve(bridge())
+    assert cache.stats['hits'] == 1
+    np.testing.assert_allclose(second.current, first.current)
+    np.testing.assert_allclose(second.x, first.x, atol=1e-12)
+
+    order = [0, 5, 3, 4, 1, 2]
+    original = bridge()
+    permuted = Netlist([original.names[k] for k in order], original.node1[order], original.node2[order],
+                       original.resistance[order], original.source_value[order])
+    hit = solver.solve(permuted)
+    assert cache.stats['hits'] == 2
+    np.testing.assert_allclose(hit.current, first.current[order], rtol=1e-9)
+    np.testing.assert_allclose(hit.x, baseline_solver().solve(permuted).x, atol=1e-9)
+
+
+def test_cache_misses_on_changed_values():
+    cache = SolutionCache()
+    solver = NetlistSolver(cache=cache)
+    solver.solve(bridge(50.0))
+    solution = solver.solve(bridge(60.0))
+    assert cache.stats['hits'] == 0 and cache.stats['misses'] == 2
+    assert_matches_baseline(solution, bridge(60.0))
+
+
+def test_cache_evicts_least_recently_used():
+    """按占用内存淘汰：容量只够一个条目时，新条目挤掉旧条目"""
+    cache = SolutionCache(max_bytes=600)
+    solver = NetlistSolver(cache=cache)
+    solver.solve(bridge(50.0))
+    solver.solve(bridge(60.0))
+    assert len(cache) == 1
+    solver.solve(bridge(60.0))
+    solver.solve(bridge(50.0))
+    assert cache.stats['hits'] == 1
+    assert cache.size_bytes <= 600
+
+
+def test_bulb_at_rated_voltage(solver):
+    """6V 电源直接接额定电压 6V、热态电阻 20Ω 的小灯泡：工作在额定点，电流 0.3A"""
+    netlist = Netlist(["电源", "小灯泡"], [1, 1], [0, 0], [0.001, 20.0], [6.0, 0.0], rated_voltage=[0.0, 6.0])
+    solution = solver.solve(netlist)
+    np.testing.assert_allclose(solution.current, [-0.3, -0.3], rtol=1e-6)
+    assert solver.solve_counts['newton_solves'] == 1
+    assert solver.solve_counts['newton_failures'] == 0
+
+
+def test_bulb_in_series_matches_baseline(solver):
+    """灯泡与电阻串联：牛顿迭代的工作点满足 KVL，且与基准求解一致"""
+    netlist = Netlist(["电源", "小灯泡", "定值电阻"], [1, 1, 2], [0, 2, 0], [0.001, 20.0, 10.0],
+                      [6.0, 0, 0], rated_voltage=[0.0, 6.0, 0.0])
+    solution = solver.solve(netlist)
+    assert solution.voltage[1] + solution.voltage[2] == pytest.approx(6.0)
+    assert solution.voltage[2] == pytest.approx(abs(solution.current[2]) * 10.0)
+    # 未达额定电压时灯丝较冷，电阻低于热态电阻
+    assert solution.voltage[1] / abs(solution.current[1]) < 20.0
+    assert_matches_baseline(solution, netlist)
+
+
+def test_bulb_characteristic():
+    """额定电压下电阻等于热态电阻；微分电导与中心差分一致；电流随电压单调增加"""
+    resistance, current, _ = bulb_characteristic(6.0, 20.0, 6.0)
+    assert resistance == pytest.approx(20.0)
+    assert current == pytest.approx(0.3)
+    voltage = np.linspace(-8.0, 8.0, 33)
+    _, current, conductance = bulb_characteristic(voltage, 20.0, 6.0)
+    h = 1e-6
+    numeric = (bulb_characteristic(voltage + h, 20.0, 6.0)[1] - bulb_characteristic(voltage - h, 20.0, 6.0)[1]) / (2 * h)
+    np.testing.assert_allclose(conductance, numeric, rtol=1e-6)
+    assert np.all(np.diff(current) > 0)
+
+
+def test_bulb_newton_warm_start():
+    """参数小幅变化后以上次的工作点为初值，牛顿迭代次数不多于冷启动"""
+    netlist = Netlist(["电源", "小灯泡", "定值电阻"], [1, 1, 2], [0, 2, 0], [0.001, 20.0, 10.0],
+                      [6.0, 0, 0], rated_voltage=[0.0, 6.0, 0.0])
+    solver = dense_solver()
+    solver.solve(netlist)
+    cold = solver.last_newton_iterations
+    netlist.source_value[0] = 6.1
+    solver.solve(netlist)
+    assert solver.last_newton_iterations <= cold
+    assert solver.solve_counts['newton_failures'] == 0
+
+
+def test_sweep_with_bulb_matches_solves():
+    """含小灯泡时逐个取值求解扫描，与单独求解一致"""
+    netlist = Netlist(["电源", "小灯泡", "定值电阻"], [1, 1, 2], [0, 2, 0], [0.001, 20.0, 10.0],
+                      [6.0, 0, 0], rated_voltage=[0.0, 6.0, 0.0])
+    voltages = [1.0, 3.0, 9.0]
+    _, current = dense_solver().sweep_source(netlist, 0, voltages)
+    for k, voltage in enumerate(voltages):
+        changed = netlist.copy()
+        changed.source_value[0] = voltage
+        np.testing.assert_allclose(current[k], baseline_solver().solve(changed).current, rtol=1e-6)
+
+
+def metered_bridge():
+    """电桥的 R1 支路串入电流表(节点1-4)，桥臂换成小灯泡，含理想导体和非线性元件"""
+    return Netlist(["电源", "电流表", "定值电阻", "定值电阻", "定值电阻", "定值电阻", "小灯泡"],
+                   [1, 1, 4, 1, 2, 3, 2], [0, 4, 2, 3, 0, 0, 3],
+                   [0.001, 0.01, 100.0, 200.0, 300.0, 100.0, 50.0], [10.0, 0, 0, 0, 0, 0, 0],
+                   rated_voltage=[0, 0, 0, 0, 0, 0, 3.0])
+
+
+def finite_difference(solver, netlist, element, quantity, parameter, index, step=1e-4):
+    """读数对第index个元件参数的中心差分；步长不小于 step，以免被牛顿迭代的收敛误差淹没"""
+    h = step * max(abs(getattr(netlist, parameter)[index]), 1.0)
+    readings = []
+    for delta in (h, -h):
+        perturbed = netlist.copy()
+        getattr(perturbed, parameter)[index] += delta
+        readings.append(solver.sensitivity(perturbed, element, quantity)[0])
+    return (readings[0] - readings[1]) / (2 * h)
+
+
+@pytest.mark.parametrize("build, element, quantity", [
+    (bridge, 5, "current"),
+    (bridge, 3, "voltage"),
+    (metered_bridge, 1, None),
+    (metered_bridge, 6, "voltage"),
+])
+def test_sensitivity_matches_finite_differences(solver, build, element, quantity):
+    """伴随法求出的导数与中心差分一致，读数与直流求解一致"""
+    netlist = build()
+    reading, d_resistance, d_source = solver.sensitivity(netlist, element, quantity)
+    solution = solver.solve(netlist)
+    expected = solution.current[element] if (quantity or "current") == "current" else abs(solution.voltage[element])
+    assert reading == pytest.approx(expected, rel=1e-6)
+    for k in range(len(netlist)):
+        if netlist.names[k] == "电源":
+            assert d_source[k] == pytest.approx(finite_difference(solver, netlist, element, quantity,
+                                                                  'source_value', k), rel=1e-5, abs=1e-9)
+        else:
+            assert d_resistance[k] == pytest.approx(finite_difference(solver, netlist, element, quantity,
+                                                                      'resistance', k), rel=1e-4, abs=1e-9)
+
+
+def test_thevenin_bridge(solver):
+    """
+    从桥臂两端（节点2、3）看进去：开路电压即工作点 V2 - V3 = 25/23 V，
+    电源置零后节点2对地 100∥300 = 75Ω、节点3对地 200∥100 = 200/3 Ω，等效电阻为 50 ∥ (75 + 200/3)
+    """
+    voltage, resistance = solver.thevenin(bridge(), 2, 3)
+    assert voltage == pytest.approx(25 / 23, rel=1e-6)
+    assert resistance == pytest.approx(1 / (1 / 50 + 1 / (75 + 200 / 3)), rel=1e-4)
+    # 反向看进去开路电压变号，等效电阻不变
+    reverse = solver.thevenin(bridge(), 3, 2)
+    assert reverse == pytest.approx((-voltage, resistance))
+
+
+def test_thevenin_short_circuit_current(solver):
+    """诺顿电流 Voc/Rth 等于用导线短接两点后流过导线的电流"""
+    voltage, resistance = solver.thevenin(bridge(), 2, 0)
+    shorted = Netlist(["电源", "定值电阻", "定值电阻", "定值电阻", "定值电阻", "定值电阻", "导线"],
+                      [1, 1, 1, 2, 3, 2, 2], [0, 2, 3, 0, 0, 3, 0],
+                      [0.001, 100.0, 200.0, 300.0, 100.0, 50.0, 0.001], [10.0, 0, 0, 0, 0, 0, 0])
+    current = baseline_solver().solve(shorted).current[6]
+    assert voltage / resistance == pytest.approx(abs(current), rel=1e-4)
+
+
+def test_thevenin_requires_source():
+    """两点在没有电源的部分中时无法求开路电压"""
+    netlist = Netlist(["电源", "定值电阻", "定值电阻"], [1, 1, 2], [0, 0, 3], [0.001, 100.0, 50.0], [5.0, 0, 0])
+    with pytest.raises(ValueError):
+        NetlistSolver().thevenin(netlist, 2, 3)
+
+
+def test_divider_uses_series_parallel_fast_path():
+    solver = NetlistSolver()
+    solver.solve(divider())
+    assert solver.solve_counts['series_parallel'] == 1
+    assert solver.solve_counts['factorizations'] == 0
+
+
+def test_mixed_series_parallel():
+    """12V 电源，R1=50 与 (100 ∥ (60 + 40)) 串联：总电阻100Ω，I=0.12A"""
+    netlist = Netlist(["电源", "定值电阻", "定值电阻", "定值电阻", "定值电阻"],
+                      [1, 1, 2, 2, 3], [0, 2, 0, 3, 0],
+                      [0.001, 50.0, 100.0, 60.0, 40.0], [12.0, 0, 0, 0, 0])
+    solver = NetlistSolver()
+    solution = solver.solve(netlist)
+    assert solver.solve_counts['series_parallel'] == 1
+    np.testing.assert_allclose(solution.node_voltages, [0.0, 12.0, 6.0, 2.4], atol=1e-9)
+    np.testing.assert_allclose(np.abs(solution.current), [0.12, 0.12, 0.06, 0.06, 0.06], atol=1e-12)
+    assert_matches_baseline(solution, netlist)
+
+    reduction = solver.series_parallel(netlist)
+    assert reduction.resistance == pytest.approx(100.0)
+    assert reduction.current == pytest.approx(0.12)
+    assert reduction.describe(["E", "R1", "R2", "R3", "R4"]) == [
+        "R3 与 R4 串联: R = 60 + 40 = 100 Ω",
+        "R2 与 (R3 + R4) 并联: 1/R = 1/100 + 1/100，R = 50 Ω",
+        "R1 与 (R2 ∥ (R3 + R4)) 串联: R = 50 + 50 = 100 Ω",
+        "总电阻 R = 100 Ω，总电流 I = U/R = 12 V / 100 Ω = 0.12 A",
+    ]
+
+
+def test_bridge_falls_back_to_mna():
+    solver = NetlistSolver()
+    solver.solve(bridge())
+    assert solver.series_parallel(bridge()) is None
+    assert solver.solve_counts['series_parallel'] == 0
+    assert solver.solve_counts['factorizations'] == 1
@@ -0,0 +1,89 @@
+"""
+后台求解线程（solver_worker.SolverWorker）的测试：只求解最新的请求、失败时返回错误
+需要 PyQt6，在无显示环境下使用 offscreen 平台
+运行：python -m pytest -q test_solver_worker.py
+"""
+import os
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+import pytest
+from PyQt6.QtWidgets import QApplication
+
+app = QApplication.instance() or QApplication([])
+
+from netlist import Netlist
+from solver_worker import SolverWorker, SolveRequest
+
+
+def divider(r2):
+    return Netlist(["电源", "定值电阻", "定值电阻"], [1, 1, 2], [0, 2, 0], [0.001, 100.0, r2], [12.0, 0.0, 0.0])
+
+
+def wait_for(results, count, timeout=5.0):
+    """处理事件直到收到 count 个结果（结果由工作线程经信号发回）"""
+    deadline = time.monotonic() + timeout
+    while len(results) < count and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.005)
+    app.processEvents()
+    return results
+
+
+@pytest.fixture
+def worker():
+    worker = SolverWorker()
+    results = []
+    worker.solved.connect(results.append)
+    yield worker, results
+    worker.shutdown()
+
+
+def test_solves_in_background(worker):
+    worker, results = worker
+    worker.submit(SolveRequest(None, divider(200.0), (0, 0)))
+    wait_for(results, 1)
+    assert len(results) == 1
+    assert results[0].error is None
+    assert results[0].solution.current[1] == pytest.approx(-0.04)
+    assert results[0].request.version == (0, 0)
+
+
+def test_coalesces_to_latest_request(worker):
+    worker, results = worker
+    started = threading.Event()
+    release = threading.Event()
+    solve = worker.solver.solve
+
+    def blocking_solve(circuit_netlist):
+        if not started.is_set():
+            started.set()
+            release.wait(5.0)
+        return solve(circuit_netlist)
+
+    worker.solver.solve = blocking_solve
+    worker.submit(SolveRequest(None, divider(100.0), (0, 0)))
+    assert started.wait(5.0)
+    # 第一个请求求解期间到达的请求只保留最新的一个
+    for k, r2 in enumerate([200.0, 300.0, 400.0, 500.0], start=1):
+        worker.submit(SolveRequest(None, divider(r2), (0, k)))
+    release.set()
+    wait_for(results, 2)
+    time.sleep(0.05)
+    app.processEvents()
+    assert [result.request.version for result in results] == [(0, 0), (0, 4)]
+    assert worker.submitted == 5 and worker.dropped == 3
+    np.testing.assert_allclose(abs(results[1].solution.current[1]), 12.0 / 600.0)
+
+
+def test_reports_singular_system(worker):
+    worker, results = worker
+    # 两个电压不同的电源并联
+    shorted = Netlist(["电源", "电源"], [1, 1], [0, 0], [0.001, 0.001], [12.0, 5.0])
+    worker.submit(SolveRequest(None, shorted, (0, 0)))
+    wait_for(results, 1)
+    assert results[0].solution is None
+    assert results[0].error
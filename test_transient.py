@@ -0,0 +1,77 @@
+"""
+瞬态分析（transient.TransientSimulator）的测试：与RC、RL电路的解析解对照
+运行：python -m pytest -q test_transient.py
+"""
+import numpy as np
+import pytest
+
+from netlist import Netlist
+from transient import TransientSimulator, BACKWARD_EULER, TRAPEZOIDAL, INITIAL_STEP_RATIO
+
+
+def rc_circuit():
+    """10V 电源经 1kΩ 对 100μF 电容充电，RC = 0.1s"""
+    return Netlist(["电源", "定值电阻", "电容"], [1, 1, 2], [0, 2, 0], [0.001, 1000.0, 1e9],
+                   [10.0, 0, 0], storage_value=[0.0, 0.0, 100e-6])
+
+
+def rl_circuit():
+    """10V 电源经 100Ω 给 1H 电感充磁，L/R = 0.01s，稳态电流 0.1A"""
+    return Netlist(["电源", "定值电阻", "电感"], [1, 1, 2], [0, 2, 0], [0.001, 100.0, 0.001],
+                   [10.0, 0, 0], storage_value=[0.0, 0.0, 1.0])
+
+
+def test_rc_charging_matches_analytic():
+    """Vc(t) = 10(1 - e^(-t/RC))，充电电流 I(t) = (10 / 1000) e^(-t/RC)"""
+    simulator = TransientSimulator(rc_circuit(), 1e-4)
+    simulator.run(0.3)
+    t, v, i = simulator.snapshot()
+    assert t[-1] == pytest.approx(0.3, rel=1e-12)
+    np.testing.assert_allclose(v[:, 2], 10.0 * (1.0 - np.exp(-t / 0.1)), atol=1e-4)
+    np.testing.assert_allclose(np.abs(i[1:, 1]), 0.01 * np.exp(-t[1:] / 0.1), atol=1e-6)
+
+
+@pytest.mark.parametrize("method", [BACKWARD_EULER, TRAPEZOIDAL])
+def test_rl_current_matches_analytic(method):
+    simulator = TransientSimulator(rl_circuit(), 1e-5, method=method)
+    simulator.run(0.05)
+    t, v, i = simulator.snapshot()
+    # 后向欧拉为一阶方法，误差比梯形法大
+    tolerance = 1e-3 if method == BACKWARD_EULER else 1e-6
+    np.testing.assert_allclose(np.abs(i[:, 2]), 0.1 * (1.0 - np.exp(-t / 0.01)), atol=tolerance)
+
+
+def test_adaptive_matches_analytic_with_fewer_steps():
+    adaptive = TransientSimulator(rc_circuit(), 1e-5, adaptive=True)
+    adaptive.run(0.3)
+    t, v, _ = adaptive.snapshot()
+    assert adaptive.steps < 0.3 / 1e-5 / 4
+    np.testing.assert_allclose(v[:, 2], 10.0 * (1.0 - np.exp(-t / 0.1)), atol=1e-2)
+
+
+@pytest.mark.parametrize("adaptive", [False, True])
+@pytest.mark.parametrize("duration", [5e-3, 0.0123, 0.3])
+def test_run_ends_exactly_at_duration(adaptive, duration):
+    """最后一步截短到结束时刻：自适应步长增大或时长不是步长的整数倍时都不越过 duration"""
+    simulator = TransientSimulator(rc_circuit(), 1e-4, adaptive=adaptive)
+    simulator.run(duration)
+    t, _, _ = simulator.snapshot()
+    assert t[-1] == pytest.approx(duration, rel=1e-12)
+    assert np.all(np.diff(t) > 0)
+    # 继续运行时从上次结束的时刻接着算
+    simulator.run(duration)
+    assert simulator.snapshot()[0][-1] == pytest.approx(2 * duration, rel=1e-12)
+
+
+def test_clamped_step_does_not_pollute_factorization_cache():
+    simulator = TransientSimulator(rc_circuit(), 1e-4)
+    simulator.run(0.01234)
+    assert {h for h, _ in simulator._factorizations} <= {1e-4, 1e-4 * INITIAL_STEP_RATIO}
+
+
+def test_capacitor_discharge_from_dc_state():
+    """从直流稳态出发时电容已充满，电路没有变化，电压保持不变"""
+    simulator = TransientSimulator(rc_circuit(), 1e-4, initial="dc")
+    simulator.run(0.01)
+    _, v, _ = simulator.snapshot()
+    np.testing.assert_allclose(v[:, 2], 10.0, rtol=1e-5)
@@ -0,0 +1,302 @@
+"""
+瞬态分析：电容、电感用伴随模型离散后，在 MNA 方程组上逐步求解
+
+每一步电容、电感都换成电导并联电流源：
+    后向欧拉  电容 G = C/h,   J = -G·v(n)            电感 G = h/L,    J = i(n)
+    梯形法    电容 G = 2C/h,  J = -(G·v(n) + i(n))   电感 G = h/(2L), J = i(n) + G·v(n)
+其中 v 为元件两端电压（node1 - node2），i 为从 node1 经元件流向 node2 的电流。
+运行期间拓扑不变，电导只取决于步长，因此每个步长只分解一次，之后每一步只需组装右端项并回代。
+结果逐步写入有界的 TransientBuffer，界面可以在运行过程中读取并绘图。
+缓冲区只保存每一步的解向量，各元件的电压、电流在读取时成批计算，每一步的开销只有一次回代。
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import circuit_solver
+from netlist import NetlistSolver, terminal_voltages, TYPE_CAPACITOR, TYPE_INDUCTOR
+
+logger = logging.getLogger('CircuitSimulator')
+
+BACKWARD_EULER = "backward_euler"
+TRAPEZOIDAL = "trapezoidal"
+METHODS = (BACKWARD_EULER, TRAPEZOIDAL)
+
+# 结果缓冲区默认保存的样本数，写满后覆盖最早的样本
+TRANSIENT_BUFFER_SIZE = 10000
+# 自适应步长：步长取 初始步长·2^k，k 的范围；局部截断误差的相对/绝对容差
+MIN_STEP_EXPONENT = -10
+MAX_STEP_EXPONENT = 6
+TRANSIENT_RELTOL = 1e-3
+TRANSIENT_ABSTOL = 1e-6
+# 缓存的LU分解个数（每个步长和积分方法各一个）
+FACTORIZATION_CACHE_SIZE = 8
+# 初始状态为零时，t=0 的样本用该倍数的初始步长做一次后向欧拉求得（电容相当于短路、电感相当于断路）
+INITIAL_STEP_RATIO = 1e-6
+
+
+class TransientBuffer:
+    """
+    有界的瞬态结果缓冲区（环形），求解线程追加、界面线程读取
+    每个样本为一个时刻和一行定长的数据，写满后覆盖最早的样本
+    """
+
+    def __init__(self, width, capacity=TRANSIENT_BUFFER_SIZE):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.values = np.zeros((capacity, width))
+        self.count = 0  # 累计追加的样本数
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, t, values):
+        with self._lock:
+            row = self.count % self.capacity
+            self.times[row] = t
+            self.values[row] = values
+            self.count += 1
+
+    def snapshot(self):
+        """
+        按时间顺序复制当前保存的样本
+
+        Returns:
+            (times, values)，形状为 (样本数,) 和 (样本数, width)
+        """
+        with self._lock:
+            if self.count <= self.capacity:
+                order = np.arange(self.count)
+            else:
+                order = np.roll(np.arange(self.capacity), -(self.count % self.capacity))
+            return self.times[order], self.values[order]
+
+    def clear(self):
+        with self._lock:
+            self.count = 0
+
+
+class TransientSimulator:
+    """
+    网表的时域仿真
+
+    用法:
+        sim = TransientSimulator(circuit_netlist, step=1e-4)
+        sim.run(0.05)
+        times, voltage, current = sim.snapshot()
+
+    小灯泡在瞬态分析中按固定电阻处理，使每个步长的矩阵保持不变
+    """
+
+    def __init__(self, netlist, step, method=TRAPEZOIDAL, adaptive=False, initial="zero",
+                 buffer_size=TRANSIENT_BUFFER_SIZE, sparse=None):
+        """
+        Args:
+            netlist: 电路网表（内部复制，之后修改原网表不影响仿真）
+            step: 步长(s)，自适应时为初始步长
+            method: BACKWARD_EULER 或 TRAPEZOIDAL（第一步总是用后向欧拉，梯形法需要上一时刻的电流）
+            adaptive: 是否按局部截断误差调整步长
+            initial: "zero" 电容不带电、电感无电流；"dc" 从直流工作点出发
+            buffer_size: 结果缓冲区保存的样本数
+
+        Raises:
+            ValueError: 步长、积分方法或初始状态无效
+            np.linalg.LinAlgError: 方程组为空
+        """
+        if method not in METHODS:
+            raise ValueError(f"未知的积分方法: {method}")
+        if initial not in ("zero", "dc"):
+            raise ValueError(f"未知的初始状态: {initial}")
+        if not step > 0:
+            raise ValueError("步长必须为正数")
+
+        self.netlist = netlist.copy()
+        self.method = method
+        self.adaptive = adaptive
+
+        self.solver = NetlistSolver(sparse)
+        self.solver.nonlinear_bulbs = False
+        # 带电的电容、有电流的电感所在的孤岛即使没有电源也需要求解（如电容放电）
+        self.solver.excitation_types = self.solver.excitation_types + (TYPE_CAPACITOR, TYPE_INDUCTOR)
+        structure = self.solver.prepare(self.netlist)
+        if structure is None:
+            raise np.linalg.LinAlgError("Empty system")
+        self.structure = structure
+        self.g = self.solver.conductances(self.netlist, structure)
+        self.z = self.solver.rhs(self.netlist, structure)
+
+        # 储能元件在印记顺序中的位置：电容在前、电感在后
+        types = self.netlist.type_codes[structure.branch_index]
+        storage = self.netlist.storage_value[structure.branch_index]
+        capacitors = np.flatnonzero((types == TYPE_CAPACITOR) & (storage > 0))
+        inductors = np.flatnonzero((types == TYPE_INDUCTOR) & (storage > 0))
+        self.reactive = np.concatenate([capacitors, inductors])
+        self.is_capacitor = np.arange(len(self.reactive)) < len(capacitors)
+        self.storage = storage[self.reactive]
+        self.reactive_elements = structure.branch_index[self.reactive]
+        # 每个样本保存解向量和储能元件电流
+        self.buffer = TransientBuffer(structure.n + len(self.reactive), buffer_size)
+
+        self.base_step = step
+        self.exponent = 0
+        self.time = 0.0
+        self.steps = 0
+        self.rejected_steps = 0
+        self._factorizations = OrderedDict()
+        # 储能元件的状态：两端电压与电流，以及自适应步长用的最近几个已接受的 (t, 状态)
+        self.v = np.zeros(len(self.reactive))
+        self.i = np.zeros(len(self.reactive))
+        self._history = []
+
+        if initial == "dc":
+            solution = self.solver.solve(self.netlist)
+            x = solution.x
+            self.v = structure.branch_voltages(x, self.reactive)
+            # 直流稳态：电容电流为0，电感电流由其（很小的）电阻求出
+            self.i = np.where(self.is_capacitor, 0.0, -solution.current[self.reactive_elements])
+            current = self.i
+        else:
+            x, _, current = self._solve(step * INITIAL_STEP_RATIO, BACKWARD_EULER)
+        self._record(x, current)
+        self._history.append((0.0, self._state()))
+
+    @property
+    def step_size(self):
+        """当前步长(s)"""
+        return self.base_step * 2.0 ** self.exponent
+
+    def _state(self):
+        """状态变量：电容电压与电感电流"""
+        return np.where(self.is_capacitor, self.v, self.i)
+
+    def _factorization(self, h, method, cache=True):
+        """步长为h时的LU分解，同一步长和方法只分解一次；cache为False时（一次性的步长）不放入缓存"""
+        key = (h, method)
+        factorization = self._factorizations.get(key)
+        if factorization is not None:
+            self._factorizations.move_to_end(key)
+            return factorization
+
+        conductance, _ = self._companion(h, method)
+        g = self.g.copy()
+        g[self.reactive] = conductance
+        factorization = circuit_solver.LUFactorization(self.structure.assemble(g))
+        if not cache:
+            return factorization
+        if len(self._factorizations) >= FACTORIZATION_CACHE_SIZE:
+            self._factorizations.popitem(last=False)
+        self._factorizations[key] = factorization
+        return factorization
+
+    def _companion(self, h, method):
+        """储能元件在步长h下的伴随模型 (电导, 并联电流源)"""
+        c = self.storage
+        if method == BACKWARD_EULER:
+            conductance = np.where(self.is_capacitor, c / h, h / c)
+            source = np.where(self.is_capacitor, -conductance * self.v, self.i)
+        else:
+            conductance = np.where(self.is_capacitor, 2 * c / h, h / (2 * c))
+            source = np.where(self.is_capacitor, -(conductance * self.v + self.i), self.i + conductance * self.v)
+        return conductance, source
+
+    def _solve(self, h, method, cache=True):
+        """从当前状态求步长h之后的解，返回 (解向量, 储能元件电压, 储能元件电流)，不修改状态"""
+        conductance, source = self._companion(h, method)
+        z = self.structure.stamp_currents(self.z.copy(), self.reactive, source)
+        x = self._factorization(h, method, cache).solve(z)
+        v = self.structure.branch_voltages(x, self.reactive)
+        return x, v, conductance * v + source
+
+    def _error(self, h, v, i):
+        """
+        用已接受的样本外推出预测值，与本步结果之差作为局部截断误差的估计，
+        返回按容差归一化的最大误差（不超过1即可接受），已接受的样本不够外推时返回None
+        """
+        order = 2 if self.method == TRAPEZOIDAL else 1
+        if len(self._history) <= order or len(self.reactive) == 0:
+            return None
+        times = np.array([t for t, _ in self._history[-(order + 1):]])
+        states = np.array([state for _, state in self._history[-(order + 1):]])
+        # 拉格朗日插值外推到 t + h
+        t_new = self.time + h
+        predicted = np.zeros(states.shape[1])
+        for k in range(order + 1):
+            others = np.delete(times, k)
+            predicted += states[k] * np.prod((t_new - others) / (times[k] - others))
+        state = np.where(self.is_capacitor, v, i)
+        tolerance = TRANSIENT_ABSTOL + TRANSIENT_RELTOL * np.maximum(np.abs(state), np.abs(states[-1]))
+        return float(np.max(np.abs(state - predicted) / tolerance))
+
+    def step(self, max_step=None):
+        """
+        前进一步（自适应时误差过大会减半步长重算），结果写入缓冲区
+
+        Args:
+            max_step: 本步步长的上限（如 run() 的最后一步不越过结束时刻），
+                      受限的步长只用一次，其分解不缓存，也不据此增大后续步长
+
+        Returns:
+            新的时刻(s)
+        """
+        method = BACKWARD_EULER if self.steps == 0 else self.method
+        while True:
+            h = self.step_size
+            clamped = max_step is not None and max_step < h
+            if clamped:
+                h = max_step
+            x, v, i = self._solve(h, method, cache=not clamped)
+            error = self._error(h, v, i) if self.adaptive else None
+            if error is None or error <= 1.0 or self.exponent <= MIN_STEP_EXPONENT:
+                break
+            self.exponent -= 1
+            self.rejected_steps += 1
+
+        self.time += h
+        self.steps += 1
+        self.v = v
+        self.i = i
+        self._history = self._history[-2:] + [(self.time, self._state())]
+        self._record(x, i)
+        if not clamped and error is not None and error < 0.1 and self.exponent < MAX_STEP_EXPONENT:
+            self.exponent += 1
+        return self.time
+
+    def run(self, duration, stop_event=None):
+        """
+        仿真 duration 秒，stop_event（threading.Event）置位时提前结束
+
+        Returns:
+            结果缓冲区
+        """
+        end = self.time + duration
+        while self.time < end - 1e-9 * duration:
+            if stop_event is not None and stop_event.is_set():
+                break
+            # 最后一步截短到结束时刻，最后一个样本恰好落在 end 上
+            self.step(end - self.time)
+        logger.debug(f"瞬态分析: {self.steps} 步, 拒绝 {self.rejected_steps} 步, "
+                     f"{len(self._factorizations)} 个LU分解")
+        return self.buffer
+
+    def _record(self, x, reactive_current):
+        self.buffer.append(self.time, np.concatenate([x, reactive_current]))
+
+    def snapshot(self):
+        """
+        读取缓冲区中的样本并成批计算各元件的电压、电流，可在仿真线程运行时调用
+
+        Returns:
+            (times, voltage, current)，形状为 (样本数,)、(样本数, 元件数)、(样本数, 元件数)；
+            电压为 node1 - node2（带符号），电流的符号约定与直流求解相同
+        """
+        times, values = self.buffer.snapshot()
+        n = self.structure.n
+        X = values[:, :n]
+        # 直流求解的电流符号约定为 (v2 - v1) / r，与 node1→node2 的电流相反
+        node_voltages, _, current = self.solver.component_values(
+            self.netlist, self.structure, X, (self.reactive_elements, -values[:, n:]))
+        v1, v2 = terminal_voltages(self.netlist, node_voltages)
+        return times, v1 - v2, current